@@ -0,0 +1,268 @@
+"""
+HausPet AI Server - AI Request Scheduler
+Runs OpenAI work on a small per-process pool instead of on whichever request
+thread received it. Chat, transcription and TTS each have their own workers,
+so one kind can't starve another. Queued jobs are served round-robin across
+users and a full queue sheds from its heaviest user, so one busy user can't
+starve the rest. Queues are bounded and jobs carry deadlines, so requests
+beyond capacity fail fast rather than parking the server threads that pet
+and auth requests need. Identical jobs already in flight share one upstream
+call, and streamed completions hold a worker for as long as they stream.
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+import collections
+import concurrent.futures
+from typing import Callable, Dict, Hashable, Iterable, Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+CHAT, TRANSCRIPTION, TTS = "chat", "transcription", "tts"
+
+
+class AIRejected(RuntimeError):
+    """Raised when a job is refused or runs out of time; `status` and `retry_after` shape the HTTP answer"""
+
+    def __init__(self, message: str, status: int = 503, retry_after: int = 1):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _Job:
+    __slots__ = ("fn", "user", "key", "deadline", "future")
+
+    def __init__(self, fn: Callable, user: Hashable, key: Optional[Hashable], deadline: float):
+        self.fn = fn
+        self.user = user
+        self.key = key
+        self.deadline = deadline
+        self.future = concurrent.futures.Future()
+
+
+class _Lane:
+    """Workers and per-user queues for one kind of AI work"""
+
+    def __init__(self, kind: str, workers: int, max_queue: int, max_queue_per_user: int):
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.queues: "collections.OrderedDict[Hashable, collections.deque]" = collections.OrderedDict()
+        self.queued = 0
+        self.running = 0
+        self.inflight: Dict[Hashable, concurrent.futures.Future] = {}
+        lock = threading.Lock()
+        self.ready = threading.Condition(lock)
+        # Signalled when a job leaves the queue, for submitters waiting for room
+        self.space = threading.Condition(lock)
+        self.started_pid = None
+        self.counters = collections.Counter()
+
+    def next_job(self) -> _Job:
+        """Head job of the user at the front of the rotation, who then moves to the back"""
+        user, jobs = next(iter(self.queues.items()))
+        job = jobs.popleft()
+        if jobs:
+            self.queues.move_to_end(user)
+        else:
+            del self.queues[user]
+        self.queued -= 1
+        self.space.notify_all()
+        return job
+
+    def shed_longest(self, own: int) -> bool:
+        """Make room for a user with `own` jobs queued by failing the newest job of a longer queue.
+
+        Without this a full queue would belong to whoever filled it first, and
+        a light user arriving later would be refused outright.
+        """
+        user, jobs = max(self.queues.items(), key=lambda item: len(item[1]))
+        if len(jobs) <= own + 1:
+            return False
+        job = jobs.pop()
+        self.queued -= 1
+        self.space.notify_all()
+        if job.key is not None and self.inflight.get(job.key) is job.future:
+            del self.inflight[job.key]
+        self.counters["shed"] += 1
+        job.future.set_exception(AIRejected(f"The {self.kind} service is busy, try again shortly", 503))
+        return True
+
+
+class AIScheduler:
+    """Per-process pool for AI calls: one lane per kind with its own workers.
+
+    `run()` blocks the calling request thread only until its job is done or
+    its deadline passes. A full queue raises AIRejected straight away (429
+    when the caller's own queue is full, 503 when the lane's is); a job
+    submitted with `wait=True` waits for room until its deadline instead.
+    When the lane is full, a user with a shorter queue displaces the newest
+    job of the longest one. Jobs with the same `key` that are queued or
+    running together share one call. Worker threads start on first use and
+    again after a fork. `max_queue_per_user` may be given per kind.
+    """
+
+    def __init__(self, workers: Dict[str, int], max_queue: int = 32,
+                 max_queue_per_user: Union[int, Dict[str, int]] = 4, deadline: float = 60.0):
+        self.deadline = deadline
+        if not isinstance(max_queue_per_user, dict):
+            max_queue_per_user = dict.fromkeys(workers, max_queue_per_user)
+        self._lanes = {
+            kind: _Lane(kind, count, max_queue, max_queue_per_user.get(kind, 4)) for kind, count in workers.items()
+        }
+
+    def submit(self, kind: str, user: Hashable, fn: Callable, key: Optional[Hashable] = None,
+               deadline: Optional[float] = None, wait: bool = False) -> concurrent.futures.Future:
+        """Queue fn() on the `kind` lane for `user`; returns a Future of its result"""
+        lane = self._lanes[kind]
+        self._ensure_workers(lane)
+        expires = time.monotonic() + (deadline or self.deadline)
+        with lane.ready:
+            while True:
+                if key is not None and key in lane.inflight:
+                    lane.counters["coalesced"] += 1
+                    return lane.inflight[key]
+                pending = lane.queues.get(user)
+                own = len(pending) if pending else 0
+                if own >= lane.max_queue_per_user:
+                    counter, refusal = "rejected_user", AIRejected(
+                        f"Too many {kind} requests in progress for this account", 429)
+                elif lane.queued >= lane.max_queue and not lane.shed_longest(own):
+                    counter, refusal = "rejected_full", AIRejected(f"The {kind} service is busy, try again shortly", 503)
+                else:
+                    break
+                if not wait:
+                    lane.counters[counter] += 1
+                    raise refusal
+                remaining = expires - time.monotonic()
+                if remaining <= 0:
+                    lane.counters["deadline_exceeded"] += 1
+                    raise AIRejected(f"The {kind} request waited longer than {deadline or self.deadline:g}s", 504)
+                lane.counters["waited"] += 1
+                lane.space.wait(remaining)
+            job = _Job(fn, user, key, expires)
+            if pending is None:
+                pending = lane.queues[user] = collections.deque()
+            pending.append(job)
+            lane.queued += 1
+            if key is not None:
+                lane.inflight[key] = job.future
+            lane.counters["submitted"] += 1
+            lane.ready.notify()
+        return job.future
+
+    def run(self, kind: str, user: Hashable, fn: Callable, key: Optional[Hashable] = None,
+            deadline: Optional[float] = None):
+        """submit() and wait for the result, raising AIRejected (504) once the deadline passes"""
+        timeout = deadline or self.deadline
+        future = self.submit(kind, user, fn, key, timeout)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            lane = self._lanes[kind]
+            with lane.ready:
+                lane.counters["deadline_exceeded"] += 1
+            raise AIRejected(f"The {kind} request took longer than {timeout:g}s", 504)
+
+    def stream(self, kind: str, user: Hashable, open_stream: Callable[[], Iterable],
+               deadline: Optional[float] = None) -> Iterator:
+        """Run `open_stream()` on a `kind` worker and relay the items it yields to the caller.
+
+        Admission happens here, so a refusal raises AIRejected before the caller
+        has started its response. The worker is held until the stream ends or
+        the returned iterator is closed, and the whole stream shares one deadline.
+        """
+        timeout = deadline or self.deadline
+        expires = time.monotonic() + timeout
+        items = queue.Queue()
+        closed = threading.Event()
+
+        def pump():
+            source = open_stream()
+            try:
+                for item in source:
+                    if closed.is_set():
+                        break
+                    items.put((True, item))
+            finally:
+                close = getattr(source, "close", None)
+                if close:
+                    close()
+
+        future = self.submit(kind, user, pump, deadline=timeout)
+        # Also fires when the job is shed or expires without running
+        future.add_done_callback(lambda _: items.put((False, None)))
+        return self._relay(kind, future, items, closed, expires, timeout)
+
+    def _relay(self, kind, future, items, closed, expires, timeout) -> Iterator:
+        try:
+            while True:
+                try:
+                    more, item = items.get(timeout=max(0.0, expires - time.monotonic()))
+                except queue.Empty:
+                    lane = self._lanes[kind]
+                    with lane.ready:
+                        lane.counters["deadline_exceeded"] += 1
+                    raise AIRejected(f"The {kind} request took longer than {timeout:g}s", 504)
+                if not more:
+                    future.result()  # raises the stream's error, if it failed
+                    return
+                yield item
+        finally:
+            closed.set()
+
+    # --- Workers ---
+    def _ensure_workers(self, lane: _Lane):
+        if lane.started_pid == os.getpid():
+            return
+        with lane.ready:
+            if lane.started_pid == os.getpid():
+                return
+            lane.started_pid = os.getpid()
+            for i in range(lane.workers):
+                threading.Thread(target=self._work, args=(lane,), name=f"ai-{lane.kind}-{i}", daemon=True).start()
+
+    def _work(self, lane: _Lane):
+        while True:
+            with lane.ready:
+                while not lane.queued:
+                    lane.ready.wait()
+                job = lane.next_job()
+                expired = time.monotonic() > job.deadline
+                lane.counters["expired" if expired else "started"] += 1
+                lane.running += 1
+            try:
+                if expired:
+                    # Nobody is waiting any more; don't spend an upstream call on it
+                    job.future.set_exception(AIRejected(f"The {lane.kind} request expired in the queue", 504))
+                elif job.future.set_running_or_notify_cancel():
+                    try:
+                        job.future.set_result(job.fn())
+                    except Exception as e:
+                        job.future.set_exception(e)
+            except Exception:
+                logger.exception("AI %s job failed to complete", lane.kind)
+            finally:
+                with lane.ready:
+                    lane.running -= 1
+                    lane.counters["completed"] += 1
+                    if job.key is not None and lane.inflight.get(job.key) is job.future:
+                        del lane.inflight[job.key]
+
+    def stats(self) -> Dict:
+        stats = {}
+        for kind, lane in self._lanes.items():
+            with lane.ready:
+                stats[kind] = {
+                    "workers": lane.workers,
+                    "running": lane.running,
+                    "queued": lane.queued,
+                    "users_queued": len(lane.queues),
+                    **lane.counters,
+                }
+        return stats
@@ -0,0 +1,210 @@
+"""
+HausPet AI Server - Streaming Health Detector
+Scores each collar reading in microseconds with O(1) state per pet:
+species-specific normal ranges for the 0-100 health score, EWMA mean and
+variance for z-score spikes, and two-sided CUSUM for slow drifts. Only
+confirmed anomalies are escalated for an LLM review.
+"""
+
+import math
+import time
+import threading
+from typing import Dict, List, Optional
+
+VITALS = ("heart_rate", "temperature", "spo2", "activity_level")
+
+# Per species: (low, high, baseline) of the normal range, matching the collar simulator's profiles.
+# Resting is normal, so activity is mostly judged against the pet's own baseline (z-score/CUSUM).
+SPECIES_PROFILES = {
+    "dog": {
+        "heart_rate": (60, 140, 80),
+        "temperature": (99.5, 102.5, 101.5),
+        "spo2": (95, 100, 98),
+        "activity_level": (0.0, 10.0, 6.0),
+    },
+    "cat": {
+        "heart_rate": (140, 220, 160),
+        "temperature": (100.0, 102.5, 101.0),
+        "spo2": (95, 100, 97),
+        "activity_level": (0.0, 9.0, 4.0),
+    },
+}
+DEFAULT_SPECIES = "dog"
+
+# Maximum points each vital can cost, and how far outside the range costs all of them
+SCORE_WEIGHTS = {"heart_rate": 20, "temperature": 25, "spo2": 30, "activity_level": 15}
+SCORE_TOLERANCE = {"heart_rate": 40, "temperature": 2.0, "spo2": 8, "activity_level": 4.0}
+
+SEVERITY_RANK = {"normal": 0, "warning": 1, "critical": 2}
+
+LABELS = {
+    "heart_rate": "heart rate",
+    "temperature": "temperature",
+    "spo2": "blood oxygen",
+    "activity_level": "activity",
+}
+
+
+def severity_for(score: float, anomalous: bool) -> str:
+    """critical below 50; warning below 80 or whenever any vital is anomalous"""
+    if score < 50:
+        return "critical"
+    if score < 80 or anomalous:
+        return "warning"
+    return "normal"
+
+
+def range_penalty(value: float, low: float, high: float, vital: str) -> float:
+    """Points lost for being outside [low, high], capped at the vital's weight"""
+    outside = low - value if value < low else value - high if value > high else 0.0
+    return SCORE_WEIGHTS[vital] * min(1.0, outside / SCORE_TOLERANCE[vital])
+
+
+class PetState:
+    """Running statistics for one pet: EWMA mean/variance and CUSUM sums per vital, plus the
+    confirmation count and when it was last escalated. Plain values, so callers can store it."""
+
+    __slots__ = ("species", "profile", "count", "mean", "var", "cusum_pos", "cusum_neg",
+                 "consecutive", "last_severity", "last_escalation")
+
+    def __init__(self, species: str):
+        self.species = species if species in SPECIES_PROFILES else DEFAULT_SPECIES
+        self.profile = SPECIES_PROFILES[self.species]
+        self.count = 0
+        # Seed with the species baseline and a variance of a quarter of the range
+        self.mean = {v: self.profile[v][2] for v in VITALS}
+        self.var = {v: ((self.profile[v][1] - self.profile[v][0]) / 4) ** 2 for v in VITALS}
+        self.cusum_pos = dict.fromkeys(VITALS, 0.0)
+        self.cusum_neg = dict.fromkeys(VITALS, 0.0)
+        self.consecutive = 0
+        self.last_severity = "normal"
+        self.last_escalation = float("-inf")
+
+
+class HealthDetector:
+    """Streaming scorer. Holds no per-pet state: callers pass each pet's PetState, so several
+    workers can share it through the database (see app.load_health_states)."""
+
+    def __init__(self, alpha: float = 0.05, z_threshold: float = 4.0, cusum_k: float = 0.5,
+                 cusum_h: float = 8.0, warmup: int = 10, confirm_after: int = 3,
+                 escalation_cooldown: float = 1800.0):
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+        self.warmup = warmup
+        self.confirm_after = confirm_after
+        self.escalation_cooldown = escalation_cooldown
+        self._lock = threading.Lock()
+        self.scored = 0
+        self.escalated = 0
+
+    def score(self, reading: Dict, state: PetState, now: Optional[float] = None) -> Dict:
+        """Score one reading and fold it into `state`, the pet's running statistics.
+
+        `now` is wall-clock seconds (time.time()) so escalation cooldowns mean the
+        same thing in every process sharing the state.
+        """
+        result = self._score(reading, state, time.time() if now is None else now)
+        with self._lock:
+            self.scored += 1
+            self.escalated += result["escalate"]
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"scored": self.scored, "escalated": self.escalated}
+
+    def _score(self, reading: Dict, state: PetState, now: float) -> Dict:
+        profile = state.profile
+        warmed_up = state.count >= self.warmup
+        alpha, k, h = self.alpha, self.cusum_k, self.cusum_h
+
+        score = 100.0
+        anomalies = []
+        for vital in VITALS:
+            value = reading.get(vital)
+            if value is None:
+                continue
+            low, high, _ = profile[vital]
+            penalty = range_penalty(value, low, high, vital)
+            if penalty:
+                score -= penalty
+                direction = "above" if value > high else "below"
+                anomalies.append(f"{LABELS[vital]} {direction} normal range ({value} vs {low}-{high})")
+
+            mean, var = state.mean[vital], state.var[vital]
+            std = math.sqrt(var) or 1e-9
+            z = (value - mean) / std
+            if warmed_up:
+                if abs(z) >= self.z_threshold:
+                    anomalies.append(f"sudden {LABELS[vital]} {'spike' if z > 0 else 'drop'} (z={z:.1f})")
+                pos = max(0.0, state.cusum_pos[vital] + z - k)
+                neg = max(0.0, state.cusum_neg[vital] - z - k)
+                if pos > h or neg > h:
+                    anomalies.append(f"sustained {LABELS[vital]} {'rise' if pos > h else 'fall'}")
+                    pos = neg = 0.0
+                state.cusum_pos[vital], state.cusum_neg[vital] = pos, neg
+
+            # EWMA update (West's incremental form of the weighted variance)
+            diff = value - mean
+            increment = alpha * diff
+            state.mean[vital] = mean + increment
+            state.var[vital] = (1 - alpha) * (var + diff * increment)
+
+        state.count += 1
+        score = max(0, round(score))
+        severity = severity_for(score, bool(anomalies))
+        state.consecutive = state.consecutive + 1 if severity != "normal" else 0
+
+        confirmed = severity == "critical" or state.consecutive >= self.confirm_after
+        escalate = confirmed and now - state.last_escalation >= self.escalation_cooldown
+        if escalate:
+            state.last_escalation = now
+        alert = escalate or SEVERITY_RANK[severity] > SEVERITY_RANK[state.last_severity]
+        state.last_severity = severity
+
+        return {
+            "pet_id": reading["pet_id"],
+            "health_score": score,
+            "severity": severity,
+            "anomalies": anomalies,
+            "confirmed": confirmed,
+            "escalate": escalate,
+            "alert": alert,
+            "ai_analysis": summarize(state.species, severity, anomalies, escalate),
+            "recommendations": recommendations(severity),
+            "vital_signs": {vital: reading.get(vital) for vital in VITALS},
+        }
+
+
+def summarize(species: str, severity: str, anomalies: List[str], escalate: bool) -> str:
+    if severity == "normal":
+        return f"Your pet's vital signs are within the normal range for a {species}."
+    text = f"Detected {', '.join(anomalies) or 'unusual vital signs'}."
+    if escalate:
+        text += " Dr. HausPet is reviewing these readings."
+    return text
+
+
+def review_prompt(species: str, analysis: Dict) -> str:
+    """Question put to Dr. HausPet when an anomaly is confirmed"""
+    vitals = analysis["vital_signs"]
+    return (
+        f"My {species}'s collar flagged {', '.join(analysis['anomalies']) or 'unusual vital signs'}. "
+        f"Latest readings: heart rate {vitals['heart_rate']} bpm, temperature {vitals['temperature']}°F, "
+        f"SpO2 {vitals['spo2']}%, activity {vitals['activity_level']}/10 "
+        f"(health score {analysis['health_score']}/100, {analysis['severity']}). "
+        "What could be causing this and what should I do?"
+    )
+
+
+def recommendations(severity: str) -> List[str]:
+    if severity == "critical":
+        return ["🚨 Contact your veterinarian or an emergency clinic now",
+                "🌡️ Keep your pet calm, cool and hydrated while you arrange care"]
+    if severity == "warning":
+        return ["👀 Keep an eye on your pet over the next few hours",
+                "📞 Call your vet if the readings don't return to normal"]
+    return ["✅ Your pet's vitals are within normal range",
+            "🎾 Continue regular exercise and care routine"]
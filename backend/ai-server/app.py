@@ -5,15 +5,39 @@ Connected to GitHub for auto-deployment
 """
 import os
 import datetime
+import tempfile
 import jwt
+import json
+import time
 import base64
+import hmac
 from functools import wraps
-from flask import Flask, request, jsonify
+from concurrent.futures import Future, ThreadPoolExecutor
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from werkzeug.security import generate_password_hash, check_password_hash
 from dotenv import load_dotenv
-from openai import OpenAI
+from ingest import (BINARY_CONTENT_TYPES, IngestError, decode_binary, mimetype_of, parse_body, normalize_batch,
+                    reading_window)
+from write_behind import WriteBehindBuffer
+from vitals import VITAL_COLUMNS, parse_range_args, serialize_reading, stream_page
+from assistant import CHAT_MODEL, ConditionMarkerFilter, build_context, build_messages, parse_condition, sse_event
+from voice_pipeline import TTS_MODEL, TTS_VOICE, MultipartWriter, pipelined_reply, synthesize
+from voice_upload import UploadRejected, check_content_length, check_upload
+from ai_scheduler import CHAT, TRANSCRIPTION, TTS, AIRejected, AIScheduler
+from rollups import DEFAULT_MIN_POINTS, aggregate_readings, choose_resolution, serialize_rollup
+from response_cache import ResponseCache
+from tts_cache import AudioCache, audio_key
+from auth_cache import Principal, PrincipalCache, principal_from_user
+from etag_cache import VersionedResponseCache, resource_etag
+from passwords import HasherBusy, PasswordHasher
+from pubsub import Hub, HubFull, RedisBackend
+from anomaly import VITALS, HealthDetector, PetState, review_prompt
+from bulk_scoring import columns_from_chunks, daily_summary, score_history
+from partitions import SensorPartitions
+from geo import covering_prefixes, geohash, parse_bbox, simplify
+from geofence import Fence, GeofenceEngine, PetFences, parse_fence
+import openai_pool
 
 # --- App Initialization & Config ---
 load_dotenv('.env.development.local')
@@ -38,6 +62,71 @@ app.config['OPENAI_API_KEY'] = os.getenv('OPENAI_API_KEY')
 if not app.config['OPENAI_API_KEY']:
     raise ValueError("OPENAI_API_KEY environment variable not set!")
 
+app.config['COLLAR_MAX_BATCH'] = int(os.getenv('COLLAR_MAX_BATCH', 1000))
+app.config['COLLAR_WRITE_BEHIND'] = os.getenv('COLLAR_WRITE_BEHIND', '1') == '1'
+# Readings older than this (buffered while offline) or this far ahead of the server clock are rejected
+app.config['COLLAR_MAX_READING_AGE_HOURS'] = float(os.getenv('COLLAR_MAX_READING_AGE_HOURS', 72))
+app.config['COLLAR_CLOCK_SKEW_SECONDS'] = float(os.getenv('COLLAR_CLOCK_SKEW_SECONDS', 300))
+# Shared secret collars present (X-Provisioning-Key) to register for any pet; unset, only owners can
+app.config['COLLAR_PROVISIONING_KEY'] = os.getenv('COLLAR_PROVISIONING_KEY', '')
+app.config['WRITE_BEHIND_MAX_QUEUE'] = int(os.getenv('WRITE_BEHIND_MAX_QUEUE', 50000))
+app.config['WRITE_BEHIND_MAX_BATCH'] = int(os.getenv('WRITE_BEHIND_MAX_BATCH', 1000))
+app.config['WRITE_BEHIND_FLUSH_INTERVAL'] = float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL', 1.0))
+app.config['TTS_PIPELINE_WORKERS'] = int(os.getenv('TTS_PIPELINE_WORKERS', 4))
+app.config['VOICE_MAX_UPLOAD_BYTES'] = int(os.getenv('VOICE_MAX_UPLOAD_BYTES', 10 * 1024 * 1024))
+app.config['VOICE_MAX_SECONDS'] = float(os.getenv('VOICE_MAX_SECONDS', 120))
+app.config['OPENAI_TIMEOUT'] = float(os.getenv('OPENAI_TIMEOUT', 30))
+app.config['OPENAI_MAX_CONCURRENCY'] = int(os.getenv('OPENAI_MAX_CONCURRENCY', 16))
+app.config['OPENAI_MAX_RETRIES'] = int(os.getenv('OPENAI_MAX_RETRIES', 3))
+app.config['OPENAI_QUEUE_TIMEOUT'] = float(os.getenv('OPENAI_QUEUE_TIMEOUT', 10))
+# AI scheduler: workers per kind of call (TTS uses TTS_PIPELINE_WORKERS), queue bounds and deadline
+app.config['AI_CHAT_WORKERS'] = int(os.getenv('AI_CHAT_WORKERS', 8))
+app.config['AI_TRANSCRIPTION_WORKERS'] = int(os.getenv('AI_TRANSCRIPTION_WORKERS', 4))
+app.config['AI_MAX_QUEUE'] = int(os.getenv('AI_MAX_QUEUE', 16))
+app.config['AI_MAX_QUEUE_PER_USER'] = int(os.getenv('AI_MAX_QUEUE_PER_USER', 4))
+app.config['AI_DEADLINE'] = float(os.getenv('AI_DEADLINE', 60))
+app.config['AI_CACHE_MAX_ENTRIES'] = int(os.getenv('AI_CACHE_MAX_ENTRIES', 2048))
+app.config['AI_CACHE_TTL'] = float(os.getenv('AI_CACHE_TTL', 86400))
+app.config['AI_CACHE_SEMANTIC'] = os.getenv('AI_CACHE_SEMANTIC', '0') == '1'
+app.config['AI_CACHE_SIMILARITY'] = float(os.getenv('AI_CACHE_SIMILARITY', 0.95))
+app.config['AI_CACHE_EMBEDDING_MODEL'] = os.getenv('AI_CACHE_EMBEDDING_MODEL', 'text-embedding-3-small')
+# Seconds a lookup waits for its embedding before treating the semantic tier as a miss
+app.config['AI_CACHE_EMBEDDING_TIMEOUT'] = float(os.getenv('AI_CACHE_EMBEDDING_TIMEOUT', 2))
+app.config['TTS_CACHE_DIR'] = os.getenv('TTS_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'hauspet-tts-cache'))
+app.config['TTS_CACHE_MEMORY_BYTES'] = int(os.getenv('TTS_CACHE_MEMORY_BYTES', 32 * 1024 * 1024))
+app.config['TTS_CACHE_DISK_BYTES'] = int(os.getenv('TTS_CACHE_DISK_BYTES', 512 * 1024 * 1024))
+# db: look the user up on every request; cache: per-process TTL cache; claims: trust id/role in the token
+app.config['AUTH_MODE'] = os.getenv('AUTH_MODE', 'cache')
+app.config['AUTH_CACHE_TTL'] = float(os.getenv('AUTH_CACHE_TTL', 60))
+app.config['ETAG_CACHE_MAX_ENTRIES'] = int(os.getenv('ETAG_CACHE_MAX_ENTRIES', 10000))
+app.config['PASSWORD_HASH_ITERATIONS'] = int(os.getenv('PASSWORD_HASH_ITERATIONS', 260000))
+app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+
+app.config['REALTIME_MAX_QUEUE'] = int(os.getenv('REALTIME_MAX_QUEUE', 100))
+app.config['REALTIME_HEARTBEAT'] = float(os.getenv('REALTIME_HEARTBEAT', 15))
+# Each open stream holds a server thread; beyond this many per worker new streams get a 503
+app.config['REALTIME_MAX_CONNECTIONS'] = int(os.getenv('REALTIME_MAX_CONNECTIONS', 16))
+app.config['REALTIME_REDIS_URL'] = os.getenv('REALTIME_REDIS_URL')
+
+app.config['ANOMALY_Z_THRESHOLD'] = float(os.getenv('ANOMALY_Z_THRESHOLD', 4.0))
+app.config['ANOMALY_CONFIRM_AFTER'] = int(os.getenv('ANOMALY_CONFIRM_AFTER', 3))
+app.config['ANOMALY_REVIEW_COOLDOWN'] = float(os.getenv('ANOMALY_REVIEW_COOLDOWN', 1800))
+
+app.config['SENSOR_PARTITIONS_AHEAD'] = int(os.getenv('SENSOR_PARTITIONS_AHEAD', 3))
+app.config['SENSOR_RETENTION_MONTHS'] = int(os.getenv('SENSOR_RETENTION_MONTHS', 12))
+
+app.config['LOCATION_TRACK_MAX_POINTS'] = int(os.getenv('LOCATION_TRACK_MAX_POINTS', 20000))
+app.config['LOCATION_SIMPLIFY_METERS'] = float(os.getenv('LOCATION_SIMPLIFY_METERS', 5))
+
+app.config['GEOFENCE_EXIT_MARGIN_M'] = float(os.getenv('GEOFENCE_EXIT_MARGIN_M', 15))
+app.config['GEOFENCE_CONFIRM_READINGS'] = int(os.getenv('GEOFENCE_CONFIRM_READINGS', 2))
+app.config['GEOFENCE_SYNC_SECONDS'] = float(os.getenv('GEOFENCE_SYNC_SECONDS', 10))
+
+password_hasher = PasswordHasher(
+    iterations=app.config['PASSWORD_HASH_ITERATIONS'],
+    workers=app.config['PASSWORD_HASH_WORKERS']
+)
+
 # --- Database Models ---
 class User(db.Model):
     __tablename__ = 'users'
@@ -48,13 +137,20 @@ class User(db.Model):
     lastName = db.Column(db.String(80), nullable=True)
     role = db.Column(db.String(80), nullable=False, default='user')
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    # Bumped on every write to the user or their pets; drives the ETags of profile and pet list reads
+    data_version = db.Column(db.Integer, nullable=False, default=0)
     pets = db.relationship('Pet', backref='owner', lazy=True)
 
+    # Emails are unique case-insensitively; lookups on lower(email) stay index-only
+    __table_args__ = (
+        db.Index('ix_users_email_lower', db.func.lower(email), unique=True),
+    )
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
 
 class Pet(db.Model):
     __tablename__ = 'pets'
@@ -64,9 +160,10 @@ class Pet(db.Model):
     breed = db.Column(db.String(100), nullable=True)
     age = db.Column(db.Integer, nullable=True)
     weight = db.Column(db.Float, nullable=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
-    sensor_data = db.relationship('SensorData', backref='pet', lazy=True)
+    # Dynamic so touching pet.sensor_data never loads a pet's whole history
+    sensor_data = db.relationship('SensorData', backref='pet', lazy='dynamic')
 
 class SensorData(db.Model):
     __tablename__ = 'sensor_data'
@@ -78,10 +175,745 @@ class SensorData(db.Model):
     spo2 = db.Column(db.Integer)
     activity_level = db.Column(db.Float)
 
-with app.app_context():
-    db.create_all()
+    __table_args__ = (
+        db.Index('ix_sensor_data_pet_id_timestamp', 'pet_id', 'timestamp', 'id'),
+    )
+
+class SensorRollup(db.Model):
+    """Per-pet min/max/sum/count of each vital over a 1m, 1h or 1d bucket"""
+    __tablename__ = 'sensor_rollups'
+    id = db.Column(db.Integer, primary_key=True)
+    pet_id = db.Column(db.Integer, db.ForeignKey('pets.id'), nullable=False)
+    resolution = db.Column(db.String(4), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    reading_count = db.Column(db.Integer, nullable=False, default=0)
+    heart_rate_min = db.Column(db.Integer)
+    heart_rate_max = db.Column(db.Integer)
+    heart_rate_sum = db.Column(db.Float, nullable=False, default=0)
+    heart_rate_count = db.Column(db.Integer, nullable=False, default=0)
+    temperature_min = db.Column(db.Float)
+    temperature_max = db.Column(db.Float)
+    temperature_sum = db.Column(db.Float, nullable=False, default=0)
+    temperature_count = db.Column(db.Integer, nullable=False, default=0)
+    spo2_min = db.Column(db.Integer)
+    spo2_max = db.Column(db.Integer)
+    spo2_sum = db.Column(db.Float, nullable=False, default=0)
+    spo2_count = db.Column(db.Integer, nullable=False, default=0)
+    activity_level_min = db.Column(db.Float)
+    activity_level_max = db.Column(db.Float)
+    activity_level_sum = db.Column(db.Float, nullable=False, default=0)
+    activity_level_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('pet_id', 'resolution', 'bucket_start', name='uq_sensor_rollups_bucket'),
+    )
+
+class Collar(db.Model):
+    """A collar's registration: static pet details sent once, so binary batches carry only a handle.
+    Re-registering with different details creates a new handle, so handles never change meaning."""
+    __tablename__ = 'collars'
+    id = db.Column(db.Integer, primary_key=True)
+    collar_id = db.Column(db.String(64), nullable=False, index=True)
+    pet_id = db.Column(db.Integer, db.ForeignKey('pets.id'), nullable=False)
+    pet_species = db.Column(db.String(50), nullable=True)
+    pet_age = db.Column(db.Integer, nullable=True)
+    pet_weight = db.Column(db.Float, nullable=True)
+    registered_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+class HealthAlert(db.Model):
+    __tablename__ = 'alerts'
+    id = db.Column(db.Integer, primary_key=True)
+    pet_id = db.Column(db.Integer, db.ForeignKey('pets.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    severity = db.Column(db.String(20), nullable=False)
+    health_score = db.Column(db.Integer, nullable=False)
+    anomalies = db.Column(db.Text, nullable=True)
+    ai_analysis = db.Column(db.Text, nullable=True)
+    resolved = db.Column(db.Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        db.Index('ix_alerts_pet_id_created_at', 'pet_id', 'created_at'),
+    )
+
+class PetLocation(db.Model):
+    """Latest GPS fix per pet, upserted on ingest so the current position is one primary-key read"""
+    __tablename__ = 'pet_locations'
+    pet_id = db.Column(db.Integer, db.ForeignKey('pets.id'), primary_key=True)
+    lat = db.Column(db.Float, nullable=False)
+    lng = db.Column(db.Float, nullable=False)
+    geohash = db.Column(db.String(12), nullable=False)
+    battery_level = db.Column(db.Integer, nullable=True)
+    recorded_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+class LocationPoint(db.Model):
+    """One GPS fix of a pet's track"""
+    __tablename__ = 'location_track'
+    id = db.Column(db.Integer, primary_key=True)
+    pet_id = db.Column(db.Integer, db.ForeignKey('pets.id'), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    lat = db.Column(db.Float, nullable=False)
+    lng = db.Column(db.Float, nullable=False)
+    geohash = db.Column(db.String(12), nullable=False)
+
+    # Time-window reads use the first; "was my pet in this area" reads range-scan geohash prefixes
+    __table_args__ = (
+        db.Index('ix_location_track_pet_id_timestamp', 'pet_id', 'timestamp', 'id'),
+        db.Index('ix_location_track_pet_id_geohash', 'pet_id', 'geohash', 'timestamp'),
+    )
+
+class Geofence(db.Model):
+    """An owner-defined circle or polygon for a pet. Deletes are soft and every change bumps
+    updated_at, so each worker's geofence engine can pick up changes incrementally."""
+    __tablename__ = 'geofences'
+    id = db.Column(db.Integer, primary_key=True)
+    pet_id = db.Column(db.Integer, db.ForeignKey('pets.id'), nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    kind = db.Column(db.String(10), nullable=False)
+    center_lat = db.Column(db.Float, nullable=False)
+    center_lng = db.Column(db.Float, nullable=False)
+    radius_m = db.Column(db.Float, nullable=True)
+    polygon = db.Column(db.Text, nullable=True)
+    active = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, index=True)
+
+class PetFenceState(db.Model):
+    """Whether a pet is inside one of its geofences, and fixes seen toward a crossing. Kept in the
+    database so every worker checks crossings against the same state, across restarts."""
+    __tablename__ = 'pet_fence_state'
+    pet_id = db.Column(db.Integer, db.ForeignKey('pets.id'), primary_key=True)
+    fence_id = db.Column(db.Integer, db.ForeignKey('geofences.id'), primary_key=True)
+    inside = db.Column(db.Boolean, nullable=False)
+    pending = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+class PetHealthState(db.Model):
+    """The health detector's running statistics for a pet, shared by every worker so baselines,
+    confirmation counts and the review cooldown survive restarts and load balancing."""
+    __tablename__ = 'pet_health_state'
+    pet_id = db.Column(db.Integer, db.ForeignKey('pets.id'), primary_key=True)
+    species = db.Column(db.String(50), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    consecutive = db.Column(db.Integer, nullable=False, default=0)
+    last_severity = db.Column(db.String(20), nullable=False, default='normal')
+    last_escalation = db.Column(db.Float, nullable=True)  # Unix time of the last Dr. HausPet review
+    baselines = db.Column(db.Text, nullable=False)  # JSON: vital -> [mean, var, cusum_pos, cusum_neg]
+    updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+class Notification(db.Model):
+    __tablename__ = 'notifications'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    pet_id = db.Column(db.Integer, db.ForeignKey('pets.id'), nullable=True)
+    type = db.Column(db.String(20), nullable=False)
+    title = db.Column(db.String(200), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    priority = db.Column(db.String(10), nullable=False, default='medium')
+    action_required = db.Column(db.Boolean, nullable=False, default=False)
+    data = db.Column(db.Text, nullable=True)
+    is_read = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_notifications_user_id_created_at', 'user_id', 'created_at'),
+    )
+
+# Tables are created by `python migrate.py`, never at import: a cold start shouldn't
+# inspect the schema before it can answer a request
+
+# Monthly partitions (Postgres) / rotated shard tables (SQLite) of sensor_data, maintained by migrate.py
+sensor_partitions = SensorPartitions(SensorData.__table__, SensorRollup.__table__)
+
+def sensor_readings(start=None, end=None):
+    """Entity to query readings in [start, end) through: SensorData, or on SQLite an alias
+    over sensor_data plus the rotated monthly shards overlapping the range"""
+    source = sensor_partitions.source(db.session.connection(), start, end)
+    return SensorData if source is SensorData.__table__ else db.aliased(SensorData, source)
+
+def dialect_insert(table):
+    """INSERT construct supporting ON CONFLICT for the configured database"""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+# --- Realtime Push ---
+realtime_hub = Hub(
+    max_queue=app.config['REALTIME_MAX_QUEUE'],
+    max_subscribers=app.config['REALTIME_MAX_CONNECTIONS'],
+    backend=RedisBackend.from_url(app.config['REALTIME_REDIS_URL']) if app.config['REALTIME_REDIS_URL'] else None
+)
+
+def pet_topic(pet_id):
+    return f"pet:{pet_id}"
+
+def publish_readings(rows):
+    for row in rows:
+        realtime_hub.publish(pet_topic(row['pet_id']), {
+            "type": "reading",
+            "pet_id": row['pet_id'],
+            "timestamp": row['timestamp'].isoformat(),
+            **{column: row[column] for column in VITAL_COLUMNS}
+        })
+
+# --- Collar Ingestion ---
+health_detector = HealthDetector(
+    z_threshold=app.config['ANOMALY_Z_THRESHOLD'],
+    confirm_after=app.config['ANOMALY_CONFIRM_AFTER'],
+    escalation_cooldown=app.config['ANOMALY_REVIEW_COOLDOWN']
+)
+
+# Health alerts are stored, pushed and (when confirmed) reviewed by Dr. HausPet off the request thread
+alert_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='alerts')
+
+def load_health_states(pet_ids):
+    """The pets' stored detector state, row-locked (Postgres) until the transaction ends; pets seen
+    for the first time start from their species baseline, unknown pets are left out"""
+    states = {}
+    query = PetHealthState.query.filter(PetHealthState.pet_id.in_(pet_ids)).order_by(
+        PetHealthState.pet_id
+    ).with_for_update()
+    for row in query:
+        state = states[row.pet_id] = PetState(row.species)
+        state.count, state.consecutive, state.last_severity = row.count, row.consecutive, row.last_severity
+        if row.last_escalation is not None:
+            state.last_escalation = row.last_escalation
+        for vital, (mean, var, pos, neg) in json.loads(row.baselines).items():
+            state.mean[vital], state.var[vital] = mean, var
+            state.cusum_pos[vital], state.cusum_neg[vital] = pos, neg
+    unseen = set(pet_ids) - states.keys()
+    if unseen:
+        for pet_id, species in db.session.query(Pet.id, Pet.species).filter(Pet.id.in_(unseen)):
+            states[pet_id] = PetState((species or '').lower())
+    return states
+
+def save_health_states(states):
+    values = [
+        {'pet_id': pet_id, 'species': state.species, 'count': state.count, 'consecutive': state.consecutive,
+         'last_severity': state.last_severity,
+         'last_escalation': state.last_escalation if state.last_escalation != float('-inf') else None,
+         'baselines': json.dumps({
+             vital: [state.mean[vital], state.var[vital], state.cusum_pos[vital], state.cusum_neg[vital]]
+             for vital in VITALS
+         }),
+         'updated_at': datetime.datetime.utcnow()}
+        for pet_id, state in states.items()
+    ]
+    if not values:
+        return
+    stmt = dialect_insert(PetHealthState.__table__)
+    new = stmt.excluded
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['pet_id'],
+        set_={column: getattr(new, column) for column in values[0] if column != 'pet_id'}
+    ), values)
+
+def analyze_readings(rows):
+    """Score each reading with the streaming detector against the pets' shared state; readings for
+    unknown pets are skipped. Alerts are recorded once the new state has committed."""
+    if not rows:
+        return []
+    try:
+        states = load_health_states({row['pet_id'] for row in rows})
+        analyses = [health_detector.score(row, states[row['pet_id']]) for row in rows if row['pet_id'] in states]
+        save_health_states(states)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        app.logger.exception("Failed to analyze readings")
+        return []
+    for analysis in analyses:
+        if analysis['alert']:
+            alert_executor.submit(record_alert, analysis)
+    return analyses
+
+geofence_engine = GeofenceEngine(
+    exit_margin_m=app.config['GEOFENCE_EXIT_MARGIN_M'],
+    confirm_readings=app.config['GEOFENCE_CONFIRM_READINGS']
+)
+# Last geofences.updated_at applied to this worker's engine, and when it was last checked
+geofence_sync = {'since': None, 'checked': float('-inf')}
+
+def fence_from_model(geofence):
+    return Fence(
+        geofence.id, geofence.pet_id, geofence.name, geofence.kind, geofence.center_lat, geofence.center_lng,
+        radius_m=geofence.radius_m, points=json.loads(geofence.polygon) if geofence.polygon else None,
+        version=geofence.updated_at
+    )
+
+def sync_geofences():
+    """Apply geofences changed since the last sync (all active ones the first time), at most every GEOFENCE_SYNC_SECONDS"""
+    now = time.monotonic()
+    if now - geofence_sync['checked'] < app.config['GEOFENCE_SYNC_SECONDS']:
+        return
+    geofence_sync['checked'] = now
+    since = geofence_sync['since']
+    if since is None:
+        query = Geofence.query.filter_by(active=True)
+    else:
+        # Overlap a little for transactions that committed out of order; unchanged fences are skipped
+        query = Geofence.query.filter(Geofence.updated_at > since - datetime.timedelta(seconds=5))
+    for geofence in query.yield_per(1000):
+        if not geofence.active:
+            geofence_engine.remove(geofence.id)
+        elif geofence_engine.version(geofence.id) != geofence.updated_at:
+            geofence_engine.upsert(fence_from_model(geofence))
+        if since is None or geofence.updated_at > since:
+            since = geofence.updated_at
+    geofence_sync['since'] = since
+
+def load_fence_states(pet_ids):
+    """The pets' stored fence state, row-locked (Postgres) until the transaction ends so concurrent
+    workers fold fixes for the same pet one after another"""
+    states = {pet_id: PetFences() for pet_id in pet_ids}
+    query = PetFenceState.query.filter(PetFenceState.pet_id.in_(pet_ids)).order_by(
+        PetFenceState.pet_id, PetFenceState.fence_id
+    ).with_for_update()
+    for row in query:
+        state = states[row.pet_id]
+        state.seen.add(row.fence_id)
+        if row.inside:
+            state.inside.add(row.fence_id)
+        if row.pending:
+            state.pending[row.fence_id] = row.pending
+    return states
+
+def save_fence_states(states):
+    values = [
+        {'pet_id': pet_id, 'fence_id': fence_id, 'inside': fence_id in state.inside,
+         'pending': state.pending.get(fence_id, 0), 'updated_at': datetime.datetime.utcnow()}
+        for pet_id, state in states.items() for fence_id in state.seen
+    ]
+    if not values:
+        return
+    stmt = dialect_insert(PetFenceState.__table__)
+    new = stmt.excluded
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['pet_id', 'fence_id'],
+        set_={'inside': new.inside, 'pending': new.pending, 'updated_at': new.updated_at}
+    ), values)
+
+def check_geofences(rows):
+    """Run each GPS fix through the geofence engine against the pets' shared fence state.
+
+    Confirmed enter/exit transitions are stored as notifications in the same
+    transaction as the new state, so a crossing is notified exactly once, and
+    pushed once it commits.
+    """
+    sync_geofences()
+    fixes = [row for row in rows if row.get('gps_lat') is not None and geofence_engine.has_fences(row['pet_id'])]
+    if not fixes:
+        return []
+    try:
+        states = load_fence_states({row['pet_id'] for row in fixes})
+        transitions = []
+        for row in fixes:
+            transitions += geofence_engine.check(
+                row['pet_id'], row['gps_lat'], row['gps_lng'], states[row['pet_id']], row['timestamp']
+            )
+        save_fence_states(states)
+        notifications = geofence_notifications(transitions)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        app.logger.exception("Failed to check geofences")
+        return []
+    for notification in notifications:
+        realtime_hub.publish(pet_topic(notification.pet_id), {
+            "type": "geofence",
+            "pet_id": notification.pet_id,
+            "notification": serialize_notification(notification)
+        })
+    return transitions
+
+def score_sensor_history(pet_ids, start=None, end=None):
+    """Bulk-score the pets' stored readings in [start, end), loaded as columns with one streamed query.
+
+    Running statistics start from the first reading in the window.
+    """
+    species_by_pet = dict(db.session.query(Pet.id, Pet.species).filter(Pet.id.in_(pet_ids)))
+    readings = sensor_readings(start, end)
+    stmt = db.select(readings.pet_id, readings.timestamp, *[getattr(readings, c) for c in VITAL_COLUMNS]).where(
+        readings.pet_id.in_(pet_ids)
+    )
+    if start:
+        stmt = stmt.where(readings.timestamp >= start)
+    if end:
+        stmt = stmt.where(readings.timestamp < end)
+    stmt = stmt.order_by(readings.pet_id, readings.timestamp, readings.id)
+    result = db.session.execute(stmt, execution_options={'yield_per': 50000})
+    columns = columns_from_chunks(result.partitions())
+    return columns, score_history(columns, species_by_pet, health_detector)
+
+# Collar handle -> pet id; handles are immutable, so entries never go stale
+collar_pets = {}
+
+def resolve_collar(handle):
+    pet_id = collar_pets.get(handle)
+    if pet_id is None:
+        collar = db.session.get(Collar, handle)
+        if collar is None:
+            return None
+        pet_id = collar_pets[handle] = collar.pet_id
+    return pet_id
+
+def _public_analysis(analysis):
+    return {key: value for key, value in analysis.items() if key not in ('alert', 'escalate')}
+
+def publish_alert(alert):
+    realtime_hub.publish(pet_topic(alert.pet_id), {
+        "type": "alert",
+        "id": alert.id,
+        "pet_id": alert.pet_id,
+        "timestamp": alert.created_at.isoformat(),
+        "severity": alert.severity,
+        "health_score": alert.health_score,
+        "anomalies": json.loads(alert.anomalies or '[]'),
+        "ai_analysis": alert.ai_analysis
+    })
+
+def record_alert(analysis):
+    with app.app_context():
+        try:
+            alert = HealthAlert(
+                pet_id=analysis['pet_id'],
+                severity=analysis['severity'],
+                health_score=analysis['health_score'],
+                anomalies=json.dumps(analysis['anomalies']),
+                ai_analysis=analysis['ai_analysis']
+            )
+            db.session.add(alert)
+            db.session.commit()
+            publish_alert(alert)
+
+            if analysis['escalate']:
+                pet = db.session.get(Pet, alert.pet_id)
+                alert.ai_analysis, _, _ = complete_chat(
+                    build_context(pet), review_prompt(pet.species, analysis), pet.user_id
+                )
+                db.session.commit()
+                publish_alert(alert)
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("Failed to record health alert for pet %s", analysis['pet_id'])
+
+def serialize_notification(notification):
+    """In the shape the mobile app's Notification type expects"""
+    return {
+        "id": str(notification.id),
+        "type": notification.type,
+        "title": notification.title,
+        "message": notification.message,
+        "petId": str(notification.pet_id) if notification.pet_id else None,
+        "priority": notification.priority,
+        "isRead": notification.is_read,
+        "actionRequired": notification.action_required,
+        "data": json.loads(notification.data) if notification.data else None,
+        "createdAt": notification.created_at.isoformat()
+    }
+
+def geofence_notifications(transitions):
+    """Add a notification to the session for each transition, returning them"""
+    if not transitions:
+        return []
+    pets = {pet.id: pet for pet in Pet.query.filter(Pet.id.in_({t['pet_id'] for t in transitions}))}
+    notifications = []
+    for transition in transitions:
+        pet = pets.get(transition['pet_id'])
+        if pet is None:
+            continue
+        left = transition['event'] == 'exit'
+        title = f"{pet.name} left {transition['fence_name']}" if left else f"{pet.name} arrived at {transition['fence_name']}"
+        message = (f"{pet.name} was last seen {abs(transition['distance_m']):.0f} m outside {transition['fence_name']}."
+                   if left else f"{pet.name} is inside {transition['fence_name']}.")
+        notification = Notification(
+            user_id=pet.user_id, pet_id=pet.id, type='location', title=title, message=message,
+            priority='high' if left else 'low', action_required=left,
+            data=json.dumps({
+                "event": transition['event'], "fence_id": transition['fence_id'],
+                "lat": transition['lat'], "lng": transition['lng'],
+                "timestamp": transition['timestamp'].isoformat() if transition['timestamp'] else None
+            })
+        )
+        db.session.add(notification)
+        notifications.append(notification)
+    return notifications
+
+def store_sensor_readings(rows):
+    """Bulk insert normalized readings for known pets with one INSERT per batch"""
+    if not rows:
+        return 0
+    pet_ids = {row['pet_id'] for row in rows}
+    known_ids = {pet_id for (pet_id,) in db.session.query(Pet.id).filter(Pet.id.in_(pet_ids))}
+    rows = [row for row in rows if row['pet_id'] in known_ids]
+    if rows:
+        sensor_partitions.ensure_for(db.engine, {row['timestamp'] for row in rows})
+        db.session.execute(SensorData.__table__.insert(), rows)
+        merge_sensor_rollups(aggregate_readings(rows))
+        store_locations(rows)
+        db.session.commit()
+        publish_readings(rows)
+    return len(rows)
+
+def store_locations(rows):
+    """Append GPS fixes to location_track and move each pet's latest position forward"""
+    fixes = [
+        {'pet_id': row['pet_id'], 'timestamp': row['timestamp'], 'lat': row['gps_lat'], 'lng': row['gps_lng'],
+         'geohash': geohash(row['gps_lat'], row['gps_lng']), 'battery_level': row.get('battery_level')}
+        for row in rows if row.get('gps_lat') is not None
+    ]
+    if not fixes:
+        return
+    db.session.execute(LocationPoint.__table__.insert(), fixes)
+
+    latest = {}
+    for fix in fixes:
+        if fix['pet_id'] not in latest or fix['timestamp'] >= latest[fix['pet_id']]['timestamp']:
+            latest[fix['pet_id']] = fix
+    table = PetLocation.__table__
+    stmt = dialect_insert(table)
+    new = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['pet_id'],
+        set_={'lat': new.lat, 'lng': new.lng, 'geohash': new.geohash, 'battery_level': new.battery_level,
+              'recorded_at': new.recorded_at, 'updated_at': new.updated_at},
+        # A late batch must not move the pet back to an older position
+        where=new.recorded_at >= table.c.recorded_at
+    )
+    now = datetime.datetime.utcnow()
+    db.session.execute(stmt, [
+        {'pet_id': fix['pet_id'], 'lat': fix['lat'], 'lng': fix['lng'], 'geohash': fix['geohash'],
+         'battery_level': fix['battery_level'], 'recorded_at': fix['timestamp'], 'updated_at': now}
+        for fix in latest.values()
+    ])
+
+def _merge_extreme(existing, incoming, pick_incoming):
+    return db.case(
+        (incoming.is_(None), existing),
+        (existing.is_(None), incoming),
+        (pick_incoming, incoming),
+        else_=existing
+    )
+
+def merge_sensor_rollups(buckets):
+    """Upsert partial rollups, folding them into existing buckets in the same transaction"""
+    if not buckets:
+        return
+    table = SensorRollup.__table__
+    stmt = dialect_insert(table)
+    new = stmt.excluded
+    updates = {'reading_count': table.c.reading_count + new.reading_count}
+    for column in VITAL_COLUMNS:
+        low, high = f'{column}_min', f'{column}_max'
+        updates[low] = _merge_extreme(table.c[low], new[low], new[low] < table.c[low])
+        updates[high] = _merge_extreme(table.c[high], new[high], new[high] > table.c[high])
+        for suffix in ('_sum', '_count'):
+            updates[column + suffix] = table.c[column + suffix] + new[column + suffix]
+    stmt = stmt.on_conflict_do_update(index_elements=['pet_id', 'resolution', 'bucket_start'], set_=updates)
+    db.session.execute(stmt, buckets)
+
+def _flush_sensor_readings(rows):
+    """Write-behind flush: store the batch, then score it and check geofences off the request path"""
+    with app.app_context():
+        try:
+            store_sensor_readings(rows)
+        except Exception:
+            db.session.rollback()
+            raise
+        analyze_readings(rows)
+        check_geofences(rows)
+
+sensor_buffer = WriteBehindBuffer(
+    _flush_sensor_readings,
+    max_queue=app.config['WRITE_BEHIND_MAX_QUEUE'],
+    max_batch=app.config['WRITE_BEHIND_MAX_BATCH'],
+    flush_interval=app.config['WRITE_BEHIND_FLUSH_INTERVAL']
+)
+
+# --- OpenAI Client ---
+def _connect_openai():
+    # The SDK is the heaviest import in the app; cold starts that never call OpenAI skip it
+    from openai import OpenAI
+    return OpenAI(
+        api_key=app.config['OPENAI_API_KEY'],
+        timeout=app.config['OPENAI_TIMEOUT'],
+        max_retries=0
+    )
+
+def get_openai_client():
+    """Shared keep-alive OpenAI client for this worker, created on first use; retries are handled by openai_pool"""
+    return openai_pool.get_client(
+        _connect_openai,
+        max_concurrency=app.config['OPENAI_MAX_CONCURRENCY'],
+        max_retries=app.config['OPENAI_MAX_RETRIES'],
+        queue_timeout=app.config['OPENAI_QUEUE_TIMEOUT']
+    )
+
+def _embed_message(text):
+    # Through the guarded client (shared concurrency limit); the cache stops waiting after the same timeout
+    response = get_openai_client().embeddings.create(
+        model=app.config['AI_CACHE_EMBEDDING_MODEL'], input=text, timeout=app.config['AI_CACHE_EMBEDDING_TIMEOUT']
+    )
+    return response.data[0].embedding
+
+chat_cache = ResponseCache(
+    max_entries=app.config['AI_CACHE_MAX_ENTRIES'],
+    ttl=app.config['AI_CACHE_TTL'],
+    embed=_embed_message if app.config['AI_CACHE_SEMANTIC'] else None,
+    similarity_threshold=app.config['AI_CACHE_SIMILARITY'],
+    embed_timeout=app.config['AI_CACHE_EMBEDDING_TIMEOUT']
+)
+
+# --- AI Scheduler ---
+# Chat, transcription and TTS run on their own workers with per-user fair queues;
+# identical in-flight prompts and sentences share one upstream call
+ai_scheduler = AIScheduler(
+    {CHAT: app.config['AI_CHAT_WORKERS'], TRANSCRIPTION: app.config['AI_TRANSCRIPTION_WORKERS'],
+     TTS: app.config['TTS_PIPELINE_WORKERS']},
+    max_queue=app.config['AI_MAX_QUEUE'],
+    # A pipelined voice reply queues one TTS job per sentence
+    max_queue_per_user={CHAT: app.config['AI_MAX_QUEUE_PER_USER'],
+                        TRANSCRIPTION: app.config['AI_MAX_QUEUE_PER_USER'],
+                        TTS: app.config['AI_MAX_QUEUE_PER_USER'] * 4},
+    deadline=app.config['AI_DEADLINE']
+)
+
+def ai_rejection(error):
+    """Answer for AIRejected, or a 503 when openai_pool found no free upstream slot (UpstreamBusy)"""
+    response = jsonify({"error": str(error)})
+    response.headers['Retry-After'] = str(getattr(error, 'retry_after', 1))
+    return response, getattr(error, 'status', 503)
+
+def complete_chat(context, user_message, user_id):
+    """Dr. HausPet's answer as (text, condition_detected, cached), served from chat_cache when possible"""
+    lookup = chat_cache.lookup(context, user_message)
+    if lookup.value is not None:
+        return lookup.value['response'], lookup.value['condition_detected'], True
+
+    def complete():
+        completion = get_openai_client().chat.completions.create(
+            model=CHAT_MODEL,
+            messages=build_messages(context, user_message)
+        )
+        response_message, condition_detected = parse_condition(completion.choices[0].message.content)
+        lookup.store({"response": response_message, "condition_detected": condition_detected})
+        return response_message, condition_detected
+
+    response_message, condition_detected = ai_scheduler.run(CHAT, user_id, complete, key=lookup.key)
+    return response_message, condition_detected, False
+
+def transcribe(user_id, audio):
+    client = get_openai_client()
+    return ai_scheduler.run(TRANSCRIPTION, user_id, lambda: client.audio.transcriptions.create(
+        model="whisper-1",
+        file=audio
+    ))
+
+tts_cache = AudioCache(
+    app.config['TTS_CACHE_DIR'],
+    max_memory_bytes=app.config['TTS_CACHE_MEMORY_BYTES'],
+    max_disk_bytes=app.config['TTS_CACHE_DISK_BYTES']
+)
+
+def synthesize_speech(text):
+    """MP3 bytes for `text`, served from tts_cache when it has been synthesised before"""
+    key = audio_key(TTS_MODEL, TTS_VOICE, text)
+    audio = tts_cache.get(key)
+    if audio is None:
+        audio = synthesize(get_openai_client(), text)
+        tts_cache.put(key, audio)
+    return audio
+
+def submit_speech(user_id, text):
+    """Future of synthesize_speech(text): already done for cached audio, otherwise on the scheduler's
+    TTS workers. A reply's sentences wait for room in the user's queue rather than being refused."""
+    key = audio_key(TTS_MODEL, TTS_VOICE, text)
+    audio = tts_cache.get(key)
+    if audio is not None:
+        future = Future()
+        future.set_result(audio)
+        return future
+    return ai_scheduler.submit(TTS, user_id, lambda: synthesize_speech(text), key=key, wait=True)
+
+def speak(user_id, text):
+    key = audio_key(TTS_MODEL, TTS_VOICE, text)
+    audio = tts_cache.get(key)
+    if audio is not None:
+        return audio
+    return ai_scheduler.run(TTS, user_id, lambda: synthesize_speech(text), key=key)
+
+def stream_chat(user_id, context, user_message):
+    """Chunks of a streamed chat completion, produced on the scheduler's chat workers"""
+    return ai_scheduler.stream(CHAT, user_id, lambda: get_openai_client().chat.completions.create(
+        model=CHAT_MODEL,
+        messages=build_messages(context, user_message),
+        stream=True
+    ))
 
 # --- JWT Token Decorator ---
+principal_cache = PrincipalCache(ttl=app.config['AUTH_CACHE_TTL'])
+
+@db.event.listens_for(User, 'after_update')
+@db.event.listens_for(User, 'after_delete')
+def _invalidate_principal(mapper, connection, target):
+    principal_cache.invalidate(target.id)
+
+# --- Conditional GET ---
+response_cache = VersionedResponseCache(max_entries=app.config['ETAG_CACHE_MAX_ENTRIES'])
+
+@db.event.listens_for(User, 'before_update')
+def _bump_user_version(mapper, connection, target):
+    target.data_version = User.data_version + 1
+
+@db.event.listens_for(Pet, 'after_insert')
+@db.event.listens_for(Pet, 'after_update')
+@db.event.listens_for(Pet, 'after_delete')
+def _bump_owner_version(mapper, connection, target):
+    users = User.__table__
+    connection.execute(users.update().where(users.c.id == target.user_id).values(data_version=users.c.data_version + 1))
+
+def conditional_response(resource, user_id, build):
+    """Serve a per-user read with a strong ETag: 304 when If-None-Match matches, otherwise the cached
+    body for the user's current data version, building it with build() only on a miss.
+    Either way the only query is the primary-key read of the version."""
+    version = db.session.query(User.data_version).filter_by(id=user_id).scalar()
+    if version is None:
+        return jsonify({'message': 'User not found!'}), 401
+    etag = resource_etag(resource, user_id, version)
+    # If-None-Match compares weakly, so a proxy that weakened the tag (e.g. by compressing) still gets 304s
+    if request.if_none_match.contains_weak(etag):
+        response_cache.not_modified += 1
+        response = Response(status=304)
+    else:
+        body = response_cache.get(resource, user_id, version)
+        if body is None:
+            body = build().get_data()
+            response_cache.put(resource, user_id, version, body)
+        response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Clients may keep the body but must revalidate before using it
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def load_principal(claims):
+    """Resolve token claims to a Principal according to AUTH_MODE, or None if the user is gone"""
+    mode = app.config['AUTH_MODE']
+    if mode == 'claims' and 'role' in claims:
+        return Principal(id=claims['id'], role=claims['role'])
+    if mode != 'db':
+        principal = principal_cache.get(claims['id'])
+        if principal:
+            return principal
+    user = db.session.get(User, claims['id'])
+    if not user:
+        return None
+    principal = principal_from_user(user)
+    if mode != 'db':
+        principal_cache.put(principal)
+    return principal
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -92,7 +924,7 @@ def token_required(f):
             return jsonify({'message': 'Token is missing!'}), 401
         try:
             data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user = User.query.get(data['id'])
+            current_user = load_principal(data)
             if not current_user:
                 return jsonify({'message': 'User not found!'}), 401
         except Exception as e:
@@ -105,15 +937,309 @@ def token_required(f):
 def health_check():
     return jsonify({"status": "healthy"})
 
+@app.route('/api/collar/data', methods=['POST'])
+def ingest_collar_data():
+    body = request.get_data(cache=False)
+    now = datetime.datetime.utcnow()
+    window = reading_window(now, app.config['COLLAR_MAX_READING_AGE_HOURS'], app.config['COLLAR_CLOCK_SKEW_SECONDS'])
+    try:
+        if mimetype_of(request.content_type) in BINARY_CONTENT_TYPES:
+            rows, rejected = decode_binary(body, app.config['COLLAR_MAX_BATCH'], resolve_collar, window)
+        else:
+            rows, rejected = normalize_batch(
+                parse_body(body, request.content_type, app.config['COLLAR_MAX_BATCH']), now, window
+            )
+    except IngestError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if app.config['COLLAR_WRITE_BEHIND']:
+        # Scoring and geofences run in the flusher; alerts and crossings arrive on /api/v1/realtime
+        if not sensor_buffer.enqueue(rows):
+            response = jsonify({"error": "Ingestion queue is full, retry later"})
+            response.headers['Retry-After'] = str(sensor_buffer.retry_after())
+            return response, 503
+        return jsonify({"queued": len(rows), "rejected": rejected}), 202
+    try:
+        stored = store_sensor_readings(rows)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Failed to store readings: {str(e)}"}), 500
+    result = {"accepted": stored, "rejected": rejected + len(rows) - stored}
+
+    # A single reading gets its analysis back; batches only report the readings that raised alerts
+    analyses = analyze_readings(rows)
+    check_geofences(rows)
+    if len(rows) + rejected == 1:
+        if analyses:
+            result["analysis"] = _public_analysis(analyses[0])
+    else:
+        result["alerts"] = [_public_analysis(analysis) for analysis in analyses if analysis['alert']]
+    return jsonify(result), 200
+
+def collar_registrant():
+    """'provisioning' for a valid X-Provisioning-Key, else the Principal of a valid bearer token, else None"""
+    key = app.config['COLLAR_PROVISIONING_KEY']
+    presented = request.headers.get('X-Provisioning-Key', '')
+    if key and presented and hmac.compare_digest(presented.encode(), key.encode()):
+        return 'provisioning'
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme != 'Bearer' or not token:
+        return None
+    try:
+        return load_principal(jwt.decode(token, app.config['SECRET_KEY'], algorithms=["HS256"]))
+    except jwt.InvalidTokenError:
+        return None
+
+@app.route('/api/collar/register', methods=['POST'])
+def register_collar():
+    registrant = collar_registrant()
+    if registrant is None:
+        return jsonify({"error": "A provisioning key or the pet owner's token is required"}), 401
+    data = request.get_json(silent=True) or {}
+    if not data.get('collar_id') or data.get('pet_id') is None:
+        return jsonify({"error": "collar_id and pet_id are required"}), 400
+    try:
+        details = {
+            'collar_id': str(data['collar_id']),
+            'pet_id': int(data['pet_id']),
+            'pet_species': data.get('pet_species'),
+            'pet_age': int(data['pet_age']) if data.get('pet_age') is not None else None,
+            'pet_weight': float(data['pet_weight']) if data.get('pet_weight') is not None else None
+        }
+    except (TypeError, ValueError):
+        return jsonify({"error": "pet_id, pet_age and pet_weight must be numbers"}), 400
+    pet = db.session.get(Pet, details['pet_id'])
+    # Owners may only bind their own pets; someone else's pet looks the same as a missing one
+    if not pet or (registrant != 'provisioning' and pet.user_id != registrant.id):
+        return jsonify({"error": "Pet not found"}), 404
+
+    collar = Collar.query.filter_by(**details).order_by(Collar.id.desc()).first()
+    status = 200
+    if collar is None:
+        collar = Collar(**details)
+        db.session.add(collar)
+        db.session.commit()
+        status = 201
+    return jsonify({
+        "collar": collar.id,
+        "content_type": BINARY_CONTENT_TYPES[0]
+    }), status
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    return jsonify({
+        "sensor_write_behind": sensor_buffer.stats(),
+        "openai": openai_pool.metrics.stats(),
+        "ai_scheduler": ai_scheduler.stats(),
+        "chat_cache": chat_cache.stats(),
+        "tts_cache": tts_cache.stats(),
+        "auth_principals": principal_cache.stats(),
+        "conditional_get": response_cache.stats(),
+        "realtime": realtime_hub.stats(),
+        "health_detector": health_detector.stats(),
+        "geofences": geofence_engine.stats()
+    })
+
+@app.route('/api/v1/realtime', methods=['GET'])
+@token_required
+def realtime_stream(current_user):
+    owned = {pet_id for (pet_id,) in db.session.query(Pet.id).filter_by(user_id=current_user.id)}
+    requested = request.args.get('pets')
+    try:
+        pet_ids = {int(p) for p in requested.split(',') if p} & owned if requested else owned
+    except ValueError:
+        return jsonify({"error": "'pets' must be a comma-separated list of pet ids"}), 400
+    if not pet_ids:
+        return jsonify({"error": "No pets to subscribe to"}), 404
+
+    try:
+        subscription = realtime_hub.subscribe(pet_topic(pet_id) for pet_id in pet_ids)
+    except HubFull as e:
+        response = jsonify({"error": str(e)})
+        response.headers['Retry-After'] = str(int(app.config['REALTIME_HEARTBEAT']))
+        return response, 503
+    heartbeat = app.config['REALTIME_HEARTBEAT']
+
+    def generate():
+        try:
+            yield sse_event("subscribed", {"pets": sorted(pet_ids)})
+            while True:
+                item = subscription.get(timeout=heartbeat)
+                if item is not None:
+                    yield sse_event(item[1].get("type", "message"), item[1])
+                elif subscription.closed:
+                    yield sse_event("close", {"reason": subscription.close_reason})
+                    return
+                else:
+                    yield ": ping\n\n"
+        finally:
+            realtime_hub.unsubscribe(subscription)
+
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Frees the slot even if the client leaves before the stream starts
+    response.call_on_close(lambda: realtime_hub.unsubscribe(subscription))
+    return response
+
 @app.route('/notifications', methods=['GET'])
-def get_notifications_placeholder():
-    return jsonify([]), 200
+@token_required
+def get_notifications(current_user):
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        limit = min(100, max(1, int(request.args.get('limit', 50))))
+    except ValueError:
+        return jsonify({"error": "page and limit must be integers"}), 400
+    notifications = Notification.query.filter_by(user_id=current_user.id).order_by(
+        Notification.created_at.desc(), Notification.id.desc()
+    ).offset((page - 1) * limit).limit(limit)
+    return jsonify([serialize_notification(n) for n in notifications]), 200
+
+@app.route('/notifications/<int:notification_id>/read', methods=['POST'])
+@token_required
+def mark_notification_read(current_user, notification_id):
+    updated = Notification.query.filter_by(id=notification_id, user_id=current_user.id).update({'is_read': True})
+    db.session.commit()
+    if not updated:
+        return jsonify({"error": "Notification not found"}), 404
+    return jsonify({"id": str(notification_id), "isRead": True})
+
+def serialize_geofence(geofence):
+    return {
+        "id": geofence.id,
+        "pet_id": geofence.pet_id,
+        "name": geofence.name,
+        "type": geofence.kind,
+        "center": {"lat": geofence.center_lat, "lng": geofence.center_lng},
+        "radius_m": geofence.radius_m,
+        "points": json.loads(geofence.polygon) if geofence.polygon else None,
+        "created_at": geofence.created_at.isoformat()
+    }
+
+@app.route('/api/v1/pets/<int:pet_id>/geofences', methods=['POST'])
+@token_required
+def create_geofence(current_user, pet_id):
+    if not Pet.query.filter_by(id=pet_id, user_id=current_user.id).first():
+        return jsonify({"error": "Pet not found"}), 404
+    try:
+        fields = parse_fence(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({"error": f"Invalid geofence: {e}"}), 400
+    geofence = Geofence(pet_id=pet_id, **dict(fields, polygon=json.dumps(fields['polygon']) if fields['polygon'] else None))
+    db.session.add(geofence)
+    db.session.commit()
+    geofence_engine.upsert(fence_from_model(geofence))
+    return jsonify(serialize_geofence(geofence)), 201
+
+@app.route('/api/v1/pets/<int:pet_id>/geofences', methods=['GET'])
+@token_required
+def get_geofences(current_user, pet_id):
+    if not Pet.query.filter_by(id=pet_id, user_id=current_user.id).first():
+        return jsonify({"error": "Pet not found"}), 404
+    geofences = Geofence.query.filter_by(pet_id=pet_id, active=True).order_by(Geofence.id)
+    return jsonify([serialize_geofence(g) for g in geofences])
+
+@app.route('/api/v1/pets/<int:pet_id>/geofences/<int:geofence_id>', methods=['DELETE'])
+@token_required
+def delete_geofence(current_user, pet_id, geofence_id):
+    if not Pet.query.filter_by(id=pet_id, user_id=current_user.id).first():
+        return jsonify({"error": "Pet not found"}), 404
+    geofence = Geofence.query.filter_by(id=geofence_id, pet_id=pet_id, active=True).first()
+    if not geofence:
+        return jsonify({"error": "Geofence not found"}), 404
+    geofence.active = False
+    geofence.updated_at = datetime.datetime.utcnow()
+    PetFenceState.query.filter_by(fence_id=geofence_id).delete(synchronize_session=False)
+    db.session.commit()
+    geofence_engine.remove(geofence_id)
+    return jsonify({"message": "Geofence deleted"})
 
 @app.route('/pets/<int:pet_id>/location/current', methods=['GET'])
 @token_required
-def get_pet_location_placeholder(current_user, pet_id):
-    return jsonify({"message": "Location data not yet available for this pet."}), 404
+def get_pet_location(current_user, pet_id):
+    if not Pet.query.filter_by(id=pet_id, user_id=current_user.id).first():
+        return jsonify({"error": "Pet not found"}), 404
+    location = db.session.get(PetLocation, pet_id)
+    if not location:
+        return jsonify({"message": "Location data not yet available for this pet."}), 404
+    return jsonify({
+        "pet_id": pet_id,
+        "lat": location.lat,
+        "lng": location.lng,
+        "geohash": location.geohash,
+        "battery_level": location.battery_level,
+        "timestamp": location.recorded_at.isoformat()
+    })
 
+@app.route('/api/v1/pets/<int:pet_id>/location/track', methods=['GET'])
+@token_required
+def get_pet_track(current_user, pet_id):
+    try:
+        params = parse_range_args(request.args)
+        bbox = parse_bbox(request.args.get('bbox'))
+        tolerance = float(request.args.get('tolerance', app.config['LOCATION_SIMPLIFY_METERS']))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query parameters: {str(e)}"}), 400
+
+    if not Pet.query.filter_by(id=pet_id, user_id=current_user.id).first():
+        return jsonify({"error": "Pet not found"}), 404
+
+    query = db.session.query(LocationPoint.timestamp, LocationPoint.lat, LocationPoint.lng).filter(
+        LocationPoint.pet_id == pet_id
+    )
+    if params['from']:
+        query = query.filter(LocationPoint.timestamp >= params['from'])
+    if params['to']:
+        query = query.filter(LocationPoint.timestamp < params['to'])
+    if bbox:
+        # Geohash prefix ranges narrow the index scan; the exact box trims the cell edges
+        query = query.filter(db.or_(*[
+            db.and_(LocationPoint.geohash >= prefix, LocationPoint.geohash < prefix + '{')
+            for prefix in covering_prefixes(bbox)
+        ])).filter(
+            LocationPoint.lat.between(bbox[0], bbox[2]),
+            LocationPoint.lng.between(bbox[1], bbox[3])
+        )
+    max_points = app.config['LOCATION_TRACK_MAX_POINTS']
+    points = query.order_by(LocationPoint.timestamp, LocationPoint.id).limit(max_points + 1).all()
+    truncated = len(points) > max_points
+    points = points[:max_points]
+
+    kept = simplify([(p.lat, p.lng) for p in points], tolerance)
+    return jsonify({
+        "pet_id": pet_id,
+        "points": [
+            {"timestamp": points[i].timestamp.isoformat(), "lat": points[i].lat, "lng": points[i].lng}
+            for i in kept
+        ],
+        "raw_points": len(points),
+        "tolerance_m": tolerance,
+        "truncated": truncated  # more fixes follow; ask again from the last timestamp
+    })
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+def _issue_token(user):
+    return jwt.encode({
+        'id': user.id,
+        'role': user.role,
+        'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
+    }, app.config['SECRET_KEY'], algorithm="HS256")
+
+def _auth_response(message, user, status):
+    return jsonify({
+        "message": message, 
+        "token": _issue_token(user), 
+        "user": {
+            "id": user.id, 
+            "email": user.email, 
+            "firstName": user.firstName, 
+            "lastName": user.lastName
+        }
+    }), status
 
 @app.route('/api/v1/auth/register', methods=['POST'])
 def register_user():
@@ -121,36 +1247,28 @@ def register_user():
         data = request.get_json()
         if not data or not data.get('email') or not data.get('password'):
             return jsonify({"error": "Email and password are required"}), 400
-        
-        if User.query.filter_by(email=data['email']).first():
-            return jsonify({"error": "Email already exists"}), 409
 
-        new_user = User(
-            email=data['email'],
+        # A single INSERT ... ON CONFLICT DO NOTHING: the unique email indexes settle
+        # concurrent sign-ups, and no RETURNING row means the email is taken
+        stmt = dialect_insert(User.__table__).values(
+            email=normalize_email(data['email']),
+            password_hash=password_hasher.hash(data['password']),
             firstName=data.get('firstName'),
             lastName=data.get('lastName')
+        ).on_conflict_do_nothing().returning(
+            User.id, User.email, User.role, User.firstName, User.lastName
         )
-        new_user.set_password(data['password'])
-        
-        db.session.add(new_user)
+        new_user = db.session.execute(stmt).first()
+        if new_user is None:
+            db.session.rollback()
+            return jsonify({"error": "Email already exists"}), 409
         db.session.commit()
 
-        token = jwt.encode({
-            'id': new_user.id,
-            'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
-        }, app.config['SECRET_KEY'], algorithm="HS256")
-        
-        return jsonify({
-            "message": "Registered successfully", 
-            "token": token, 
-            "user": {
-                "id": new_user.id, 
-                "email": new_user.email, 
-                "firstName": new_user.firstName, 
-                "lastName": new_user.lastName
-            }
-        }), 201
+        return _auth_response("Registered successfully", new_user, 201)
         
+    except HasherBusy as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"Server error during registration: {str(e)}"}), 500
@@ -163,43 +1281,46 @@ def login_user():
         if not data or not data.get('email') or not data.get('password'):
             return jsonify({"error": "Email and password are required"}), 400
 
-        user = User.query.filter_by(email=data['email']).first()
+        user = User.query.filter(db.func.lower(User.email) == normalize_email(data['email'])).first()
 
         if not user:
             return jsonify({"error": "User not found. Please register."}), 404
 
         if user.check_password(data['password']):
-            token = jwt.encode({
-                'id': user.id,
-                'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
-            }, app.config['SECRET_KEY'], algorithm="HS256")
-
-            return jsonify({
-                "message": "Login successful", 
-                "token": token, 
-                "user": {
-                    "id": user.id, 
-                    "email": user.email, 
-                    "firstName": user.firstName, 
-                    "lastName": user.lastName
-                }
-            }), 200
+            # Transparently upgrade hashes made with an older cost setting
+            if password_hasher.needs_rehash(user.password_hash):
+                user.set_password(data['password'])
+                db.session.commit()
+
+            return _auth_response("Login successful", user, 200)
         else:
             return jsonify({"error": "Incorrect password."}), 401
         
+    except HasherBusy as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
+        db.session.rollback()
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
 @app.route('/api/v1/user/profile', methods=['GET'])
 @token_required
 def get_profile(current_user):
-    return jsonify({
-        "id": current_user.id,
-        "email": current_user.email,
-        "firstName": current_user.firstName,
-        "lastName": current_user.lastName,
-        "role": current_user.role
-    }), 200
+    def build():
+        # Read fresh: a cached principal may predate the version being served
+        user = db.session.get(User, current_user.id)
+        return jsonify({
+            "id": user.id,
+            "email": user.email,
+            "firstName": user.firstName,
+            "lastName": user.lastName,
+            "role": user.role
+        })
+    return conditional_response('profile', current_user.id, build)
+
+def _find_user_pet(current_user, pet_id):
+    if not pet_id:
+        return None
+    return Pet.query.filter_by(id=pet_id, user_id=current_user.id).first()
 
 @app.route('/api/v1/ai/chat', methods=['POST'])
 @token_required
@@ -208,96 +1329,92 @@ def ai_chat(current_user):
         data = request.json
         user_message = data.get('message', '')
         pet_id = data.get('pet_id')
-        
-        context = """You are Dr. HausPet, a friendly and empathetic virtual veterinarian. Provide clear, concise, and helpful advice. Keep your responses to 1-3 sentences for a natural voice conversation."""
-            
-        if pet_id:
-            pet = Pet.query.filter_by(id=pet_id, user_id=current_user.id).first()
-            if pet:
-                context += f" You are speaking about {pet.name}, a {pet.age}-year-old {pet.breed}."
-
-        context += """ When you identify a potential health condition, end your response with a special marker like this:
-        [CONDITION_DETECTED: "Canine Dermatitis"]
-        Only include this marker if you are reasonably confident in the diagnosis based on the user's description.
-        """
-
-        client = OpenAI(api_key=app.config['OPENAI_API_KEY'])
-        completion = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": context},
-                {"role": "user", "content": user_message}
-            ]
-        )
-        response_message = completion.choices[0].message.content
-
-        condition_detected = None
-        if "[CONDITION_DETECTED:" in response_message:
-            parts = response_message.split("[CONDITION_DETECTED:")
-            response_message = parts[0].strip()
-            condition_str = parts[1].split("]")[0].strip()
-            condition_detected = condition_str.replace('"', '')
-        
+        context = build_context(_find_user_pet(current_user, pet_id))
+        response_message, condition_detected, cached = complete_chat(context, user_message, current_user.id)
+
         return jsonify({
             "response": response_message, 
             "context_used": bool(pet_id),
-            "condition_detected": condition_detected
+            "condition_detected": condition_detected,
+            "cached": cached
         })
+    except (AIRejected, openai_pool.UpstreamBusy) as e:
+        return ai_rejection(e)
     except Exception as e:
         return jsonify({"error": f"Error calling OpenAI: {str(e)}"}), 500
 
+@app.route('/api/v1/ai/chat/stream', methods=['POST'])
+@token_required
+def ai_chat_stream(current_user):
+    data = request.get_json(silent=True) or {}
+    user_message = data.get('message', '')
+    pet_id = data.get('pet_id')
+    context = build_context(_find_user_pet(current_user, pet_id))
+    lookup = chat_cache.lookup(context, user_message)
+    stream = None
+    if lookup.value is None:
+        # Admitted (or refused) before the event stream starts, so a refusal is a plain 429/503
+        try:
+            stream = stream_chat(current_user.id, context, user_message)
+        except AIRejected as e:
+            return ai_rejection(e)
+
+    def generate():
+        if lookup.value is not None:
+            yield sse_event("delta", {"text": lookup.value['response']})
+            yield sse_event("done", {**lookup.value, "context_used": bool(pet_id), "cached": True})
+            return
+
+        marker_filter = ConditionMarkerFilter()
+        try:
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                visible = marker_filter.feed(delta) if delta else ""
+                if visible:
+                    yield sse_event("delta", {"text": visible})
+            tail = marker_filter.finish()
+            if tail:
+                yield sse_event("delta", {"text": tail})
+            lookup.store({"response": marker_filter.text, "condition_detected": marker_filter.condition})
+            yield sse_event("done", {
+                "response": marker_filter.text,
+                "context_used": bool(pet_id),
+                "condition_detected": marker_filter.condition,
+                "cached": False
+            })
+        except Exception as e:
+            yield sse_event("error", {"error": f"Error calling OpenAI: {str(e)}"})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def voice_upload():
+    """The request's recording as a (filename, file) pair for Whisper; raises UploadRejected.
+
+    Oversized requests are refused from Content-Length before the body is read.
+    Werkzeug spools larger uploads to a temporary file and the SDK streams that
+    file to OpenAI, so a recording is never held whole in worker memory.
+    """
+    check_content_length(request.content_length, app.config['VOICE_MAX_UPLOAD_BYTES'])
+    if 'audio' not in request.files:
+        raise UploadRejected("No audio file provided", 400)
+    audio_file = request.files['audio']
+    check_upload(audio_file.stream, app.config['VOICE_MAX_UPLOAD_BYTES'], app.config['VOICE_MAX_SECONDS'])
+    return audio_file.filename or "audio.m4a", audio_file.stream
+
 @app.route('/api/v1/ai/voice-chat', methods=['POST'])
 @token_required
 def voice_chat(current_user):
     try:
-        if 'audio' not in request.files:
-            return jsonify({"error": "No audio file provided"}), 400
-        
-        audio_file = request.files['audio']
-        audio_bytes = audio_file.read()
-        
-        client = OpenAI(api_key=app.config['OPENAI_API_KEY'])
-        transcription = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=("audio.m4a", audio_bytes)
-        )
-        user_message = transcription.text
+        user_message = transcribe(current_user.id, voice_upload()).text
         
         pet_id = request.form.get('pet_id')
-        context = """You are Dr. HausPet, a friendly and empathetic virtual veterinarian. Provide clear, concise, and helpful advice. Keep your responses to 1-3 sentences for a natural voice conversation."""
-        if pet_id:
-            pet = Pet.query.filter_by(id=pet_id, user_id=current_user.id).first()
-            if pet:
-                context += f" You are speaking about {pet.name}, a {pet.age}-year-old {pet.breed}."
-
-        context += """ When you identify a potential health condition, end your response with a special marker like this:
-[CONDITION_DETECTED: "Canine Dermatitis"]
-Only include this marker if you are reasonably confident in the diagnosis based on the user's description.
-"""
+        context = build_context(_find_user_pet(current_user, pet_id))
+        response_message, condition_detected, _ = complete_chat(context, user_message, current_user.id)
 
-        completion = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": context},
-                {"role": "user", "content": user_message}
-            ]
-        )
-        response_message = completion.choices[0].message.content
-        
-        condition_detected = None
-        if "[CONDITION_DETECTED:" in response_message:
-            parts = response_message.split("[CONDITION_DETECTED:")
-            response_message = parts[0].strip()
-            condition_str = parts[1].split("]")[0].strip()
-            condition_detected = condition_str.replace('"', '')
-
-        speech_response = client.audio.speech.create(
-            model="tts-1",
-            voice="nova",
-            input=response_message
-        )
-        
-        audio_base64 = base64.b64encode(speech_response.content).decode('utf-8')
+        audio_base64 = base64.b64encode(speak(current_user.id, response_message)).decode('utf-8')
         
         return jsonify({
             "transcribed_text": user_message,
@@ -306,9 +1423,51 @@ Only include this marker if you are reasonably confident in the diagnosis based
             "condition_detected": condition_detected
         })
         
+    except UploadRejected as e:
+        return jsonify({"error": str(e)}), e.status
+    except (AIRejected, openai_pool.UpstreamBusy) as e:
+        return ai_rejection(e)
     except Exception as e:
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
+@app.route('/api/v1/ai/voice-chat/stream', methods=['POST'])
+@token_required
+def voice_chat_stream(current_user):
+    try:
+        transcription = transcribe(current_user.id, voice_upload())
+    except UploadRejected as e:
+        return jsonify({"error": str(e)}), e.status
+    except (AIRejected, openai_pool.UpstreamBusy) as e:
+        return ai_rejection(e)
+    except Exception as e:
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+    context = build_context(_find_user_pet(current_user, request.form.get('pet_id')))
+    writer = MultipartWriter()
+    user_id = current_user.id
+    lookup = chat_cache.lookup(context, transcription.text)
+    stream = None
+    if lookup.value is None:
+        try:
+            stream = stream_chat(user_id, context, transcription.text)
+        except AIRejected as e:
+            return ai_rejection(e)
+
+    def generate():
+        try:
+            yield from pipelined_reply(
+                stream, lambda sentence: submit_speech(user_id, sentence), writer, transcription.text,
+                cached=lookup.value, on_complete=lookup.store
+            )
+        except Exception as e:
+            yield writer.json_part({"error": f"Server error: {str(e)}"})
+            yield writer.close()
+
+    return Response(stream_with_context(generate()), content_type=writer.content_type, headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/api/v1/pets', methods=['POST'])
 @token_required
 def add_pet(current_user):
@@ -347,19 +1506,139 @@ def add_pet(current_user):
 @app.route('/api/v1/pets', methods=['GET'])
 @token_required
 def get_pets(current_user):
-    try:
+    def build():
         pets = Pet.query.filter_by(user_id=current_user.id).all()
-        pets_data = [{
+        return jsonify([{
             "id": pet.id,
             "name": pet.name,
             "species": pet.species,
             "breed": pet.breed,
             "age": pet.age,
             "weight": pet.weight
-        } for pet in pets]
-        return jsonify(pets_data), 200
+        } for pet in pets])
+    try:
+        return conditional_response('pets', current_user.id, build)
     except Exception as db_error:
+        db.session.rollback()
         return jsonify([]), 200
 
+def pets_with_latest_reading(user_id):
+    """One query for the owner's pets, each with its latest reading and GPS fix (None when absent).
+
+    Postgres reads the latest reading per pet through a LATERAL join down
+    ix_sensor_data_pet_id_timestamp; SQLite, which has no LATERAL, joins on the
+    latest id picked by a correlated subquery over the same index.
+    """
+    model = sensor_readings()
+    columns = [model.id, model.timestamp] + [getattr(model, column) for column in VITAL_COLUMNS]
+    latest = db.select(*columns).where(model.pet_id == Pet.id).order_by(model.timestamp.desc(), model.id.desc()).limit(1)
+    if db.session.get_bind().dialect.name == 'postgresql':
+        reading = latest.lateral('latest_reading')
+        reading_columns, on = [reading], db.true()
+    else:
+        reading = db.aliased(model)
+        reading_columns = [reading.id, reading.timestamp] + [getattr(reading, column) for column in VITAL_COLUMNS]
+        on = reading.id == latest.with_only_columns(model.id).correlate(Pet).scalar_subquery()
+    return db.session.query(Pet, PetLocation, *reading_columns).select_from(Pet).outerjoin(
+        PetLocation, PetLocation.pet_id == Pet.id
+    ).outerjoin(reading, on).filter(Pet.user_id == user_id).order_by(Pet.id).all()
+
+@app.route('/api/v1/dashboard', methods=['GET'])
+@token_required
+def get_dashboard(current_user):
+    """Home screen: every pet with its latest vitals, position and open alert counts, in two queries"""
+    rows = pets_with_latest_reading(current_user.id)
+    alert_counts = {
+        pet_id: (unresolved, critical) for pet_id, unresolved, critical in db.session.query(
+            HealthAlert.pet_id,
+            db.func.count(),
+            db.func.coalesce(db.func.sum(db.case((HealthAlert.severity == 'critical', 1), else_=0)), 0)
+        ).join(Pet, Pet.id == HealthAlert.pet_id).filter(
+            Pet.user_id == current_user.id, HealthAlert.resolved.is_(False)
+        ).group_by(HealthAlert.pet_id)
+    }
+
+    pets = []
+    for row in rows:
+        pet, location = row.Pet, row.PetLocation
+        unresolved, critical = alert_counts.get(pet.id, (0, 0))
+        pets.append({
+            "id": pet.id,
+            "name": pet.name,
+            "species": pet.species,
+            "breed": pet.breed,
+            "age": pet.age,
+            "weight": pet.weight,
+            "latest_vitals": serialize_reading(row) if row.timestamp else None,
+            "location": {
+                "lat": location.lat,
+                "lng": location.lng,
+                "battery_level": location.battery_level,
+                "timestamp": location.recorded_at.isoformat()
+            } if location else None,
+            "alerts": {"unresolved": unresolved, "critical": critical}
+        })
+    return jsonify({"pets": pets})
+
+@app.route('/api/v1/pets/<int:pet_id>/vitals', methods=['GET'])
+@token_required
+def get_pet_vitals(current_user, pet_id):
+    try:
+        params = parse_range_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query parameters: {str(e)}"}), 400
+
+    if not Pet.query.filter_by(id=pet_id, user_id=current_user.id).first():
+        return jsonify({"error": "Pet not found"}), 404
+
+    resolution = params['resolution']
+    if resolution == 'auto':
+        resolution = choose_resolution(params['from'], params['to'], params['points'] or DEFAULT_MIN_POINTS)
+
+    if resolution == 'raw':
+        model = sensor_readings(params['from'], params['to'])
+        query = db.session.query(
+            model.id, model.timestamp, model.heart_rate,
+            model.temperature, model.spo2, model.activity_level
+        ).filter(model.pet_id == pet_id)
+        timestamp_column, serialize = model.timestamp, serialize_reading
+    else:
+        rollup_columns = [c for c in SensorRollup.__table__.c if c.name not in ('pet_id', 'resolution', 'bucket_start')]
+        query = db.session.query(SensorRollup.bucket_start.label('timestamp'), *rollup_columns).filter(
+            SensorRollup.pet_id == pet_id, SensorRollup.resolution == resolution
+        )
+        model, timestamp_column, serialize = SensorRollup, SensorRollup.bucket_start, serialize_rollup
+
+    if params['from']:
+        query = query.filter(timestamp_column >= params['from'])
+    if params['to']:
+        query = query.filter(timestamp_column < params['to'])
+    if params['cursor']:
+        query = query.filter(db.tuple_(timestamp_column, model.id) > params['cursor'])
+    rows = query.order_by(timestamp_column, model.id).limit(params['limit'] + 1).yield_per(500)
+
+    page = stream_page(pet_id, rows, params['limit'], resolution, serialize)
+    return Response(stream_with_context(page), mimetype='application/json')
+
+@app.route('/api/v1/pets/<int:pet_id>/health/report', methods=['GET'])
+@token_required
+def get_pet_health_report(current_user, pet_id):
+    try:
+        params = parse_range_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query parameters: {str(e)}"}), 400
+
+    if not Pet.query.filter_by(id=pet_id, user_id=current_user.id).first():
+        return jsonify({"error": "Pet not found"}), 404
+
+    try:
+        columns, scores = score_sensor_history([pet_id], params['from'], params['to'])
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 501
+    return jsonify({"pet_id": pet_id, "days": daily_summary(columns, scores)})
+
 if __name__ == '__main__':
+    # Local development server: create any missing tables (deployments run migrate.py)
+    with app.app_context():
+        db.create_all()
     app.run(host='0.0.0.0', port=os.getenv('PORT', 5000))
@@ -0,0 +1,102 @@
+"""
+HausPet AI Server - Dr. HausPet Assistant
+System prompt construction and parsing of the [CONDITION_DETECTED: ...]
+marker, for both complete and streamed chat completions.
+"""
+
+import json
+from typing import Optional, Tuple
+
+CHAT_MODEL = "gpt-3.5-turbo"
+CONDITION_MARKER = "[CONDITION_DETECTED:"
+
+BASE_CONTEXT = """You are Dr. HausPet, a friendly and empathetic virtual veterinarian. Provide clear, concise, and helpful advice. Keep your responses to 1-3 sentences for a natural voice conversation."""
+
+MARKER_INSTRUCTIONS = """ When you identify a potential health condition, end your response with a special marker like this:
+[CONDITION_DETECTED: "Canine Dermatitis"]
+Only include this marker if you are reasonably confident in the diagnosis based on the user's description.
+"""
+
+
+def build_context(pet=None) -> str:
+    """System prompt for Dr. HausPet, optionally about a specific pet"""
+    context = BASE_CONTEXT
+    if pet:
+        context += f" You are speaking about {pet.name}, a {pet.age}-year-old {pet.breed}."
+    return context + MARKER_INSTRUCTIONS
+
+
+def build_messages(context: str, user_message: str):
+    return [
+        {"role": "system", "content": context},
+        {"role": "user", "content": user_message}
+    ]
+
+
+class ConditionMarkerFilter:
+    """Strips the condition marker from streamed text, even when split across chunks.
+
+    Text that could still turn out to be the start of the marker is held back
+    until the next chunk decides it either way.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._marker = None
+        self._visible = []
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk and return the part of it that is safe to show"""
+        if self._marker is not None:
+            self._marker += chunk
+            return ""
+        buffer = self._pending + chunk
+        index = buffer.find(CONDITION_MARKER)
+        if index >= 0:
+            self._marker = buffer[index + len(CONDITION_MARKER):]
+            self._pending = ""
+            return self._emit(buffer[:index])
+        keep = _partial_marker_length(buffer)
+        self._pending = buffer[len(buffer) - keep:] if keep else ""
+        return self._emit(buffer[:len(buffer) - keep])
+
+    def finish(self) -> str:
+        """Flush held-back text once the stream has ended"""
+        pending, self._pending = self._pending, ""
+        return self._emit(pending)
+
+    def _emit(self, text: str) -> str:
+        if text:
+            self._visible.append(text)
+        return text
+
+    @property
+    def text(self) -> str:
+        return "".join(self._visible).strip()
+
+    @property
+    def condition(self) -> Optional[str]:
+        if self._marker is None:
+            return None
+        return self._marker.split("]")[0].strip().replace('"', '')
+
+
+def _partial_marker_length(buffer: str) -> int:
+    """Length of the longest suffix of `buffer` that is a proper prefix of the marker"""
+    for length in range(min(len(buffer), len(CONDITION_MARKER) - 1), 0, -1):
+        if buffer.endswith(CONDITION_MARKER[:length]):
+            return length
+    return 0
+
+
+def parse_condition(response_message: str) -> Tuple[str, Optional[str]]:
+    """Split a complete response into (visible_text, condition_detected)"""
+    marker_filter = ConditionMarkerFilter()
+    marker_filter.feed(response_message)
+    marker_filter.finish()
+    return marker_filter.text, marker_filter.condition
+
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,57 @@
+"""
+HausPet AI Server - Auth Principal Cache
+Small per-process TTL cache of the user records token_required needs, so
+authenticated requests don't pay a database round trip on every call.
+"""
+
+import time
+import threading
+import collections
+from typing import Optional
+
+Principal = collections.namedtuple(
+    "Principal", ["id", "email", "role", "firstName", "lastName"], defaults=(None, None, None, None)
+)
+
+
+def principal_from_user(user) -> Principal:
+    return Principal(user.id, user.email, user.role, user.firstName, user.lastName)
+
+
+class PrincipalCache:
+    """LRU of user id -> Principal with a TTL; other workers rely on the TTL after invalidation"""
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def put(self, principal: Principal):
+        with self._lock:
+            self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
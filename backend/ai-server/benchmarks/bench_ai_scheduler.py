@@ -0,0 +1,207 @@
+"""
+HausPet AI Server - AI Scheduler Load Test
+Saturates POST /api/v1/ai/chat (stubbed OpenAI with a fixed completion
+latency) from a few heavy users while a light user chats occasionally and
+GET /api/v1/pets is timed throughout. The server has a fixed pool of
+request threads, as under `gunicorn -k gthread --threads N`. Runs twice:
+
+- unbounded: AI calls effectively run on request threads, as before the scheduler
+- scheduled: --workers chat workers and a --queue deep queue, which leaves
+  request threads to spare (workers + queue < threads)
+
+It reports pet list latency, the light user's chat latency and statuses,
+and upstream calls. Finally, identical concurrent prompts from different
+users must share one upstream call.
+
+Usage:
+    python benchmarks/bench_ai_scheduler.py --threads 16 --workers 4 --queue 8 --duration 10
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import collections
+import http.client
+from socketserver import ThreadingMixIn
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collar_load import percentiles
+
+
+class StubOpenAI:
+    """Chat completions that take `latency` seconds, counting upstream calls"""
+
+    latency = 1.0
+    calls = 0
+    _lock = threading.Lock()
+
+    def __init__(self, **kwargs):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=type(self)._complete))
+
+    @classmethod
+    def _complete(cls, model, messages, stream=False):
+        with cls._lock:
+            cls.calls += 1
+        time.sleep(cls.latency)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Offer water and rest."))])
+
+
+def serve_app(threads: int):
+    os.environ['POSTGRES_URL'] = f"sqlite:///{tempfile.mkdtemp()}/bench_ai_scheduler.db"
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark-key')
+    os.environ['AI_CACHE_MAX_ENTRIES'] = '0'  # every prompt goes upstream unless coalesced
+    os.environ['AUTH_MODE'] = 'claims'
+    from werkzeug.serving import BaseWSGIServer
+    import app as m
+    m._connect_openai = StubOpenAI
+    with m.app.app_context():
+        m.db.create_all()
+
+    class PooledWSGIServer(ThreadingMixIn, BaseWSGIServer):
+        """A fixed pool of request threads, like gunicorn -k gthread --threads N"""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.pool = ThreadPoolExecutor(threads)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self.process_request_thread, request, client_address)
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = PooledWSGIServer("127.0.0.1", 0, m.app)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return m, server
+
+
+def register(m, name: str) -> dict:
+    token = m.app.test_client().post('/api/v1/auth/register', json={
+        'email': f'{name}-{time.time()}@hauspet.net', 'password': 'benchmark'
+    }).get_json()['token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+def request(port: int, method: str, path: str, headers: dict, body=None):
+    """(status, seconds); a connection failure counts as status 0"""
+    start = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    try:
+        data = json.dumps(body).encode() if body is not None else None
+        conn.request(method, path, body=data, headers={**headers, 'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        response.read()
+        return response.status, time.perf_counter() - start
+    except OSError:
+        return 0, time.perf_counter() - start
+    finally:
+        conn.close()
+
+
+def time_pets(port: int, headers: dict, until: float, interval: float = 0.05):
+    latencies = []
+    while time.perf_counter() < until:
+        status, seconds = request(port, "GET", "/api/v1/pets", headers)
+        assert status == 200, status
+        latencies.append(seconds)
+        time.sleep(interval)
+    return latencies
+
+
+def run_phase(m, port: int, args, heavy: list, light: dict, pets_headers: dict) -> dict:
+    StubOpenAI.calls = 0
+    until = time.perf_counter() + args.duration
+    heavy_statuses = collections.Counter()
+    light_statuses = collections.Counter()
+    light_latencies = []
+    counter = iter(range(10 ** 9))
+
+    def heavy_client(headers):
+        while time.perf_counter() < until:
+            status, _ = request(port, "POST", "/api/v1/ai/chat", headers, {"message": f"question {next(counter)}"})
+            heavy_statuses[status] += 1
+            if status != 200:
+                time.sleep(0.1)  # brief back-off, keeping the pressure on
+
+    def light_client():
+        time.sleep(1.0)  # let the heavy users fill the queues first
+        while time.perf_counter() < until:
+            status, seconds = request(port, "POST", "/api/v1/ai/chat", light, {"message": f"light {next(counter)}"})
+            light_statuses[status] += 1
+            if status == 200:
+                light_latencies.append(seconds)
+            time.sleep(1.0)
+
+    clients = [threading.Thread(target=heavy_client, args=(headers,)) for headers in heavy for _ in range(args.per_user)]
+    clients.append(threading.Thread(target=light_client))
+    for client in clients:
+        client.start()
+    time.sleep(1.0)
+    pets = time_pets(port, pets_headers, until)
+    for client in clients:
+        client.join()
+    return {
+        "pets_latency_ms": percentiles(pets),
+        "light_user_chat_ms": percentiles(light_latencies),
+        "light_user_statuses": dict(light_statuses),
+        "heavy_statuses": dict(heavy_statuses),
+        "upstream_calls": StubOpenAI.calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16, help='request threads in the server')
+    parser.add_argument('--workers', type=int, default=4, help='scheduled chat workers (AI_CHAT_WORKERS)')
+    parser.add_argument('--queue', type=int, default=8, help='scheduled chat queue (AI_MAX_QUEUE)')
+    parser.add_argument('--heavy-users', type=int, default=4)
+    parser.add_argument('--per-user', type=int, default=12, help='concurrent chat requests per heavy user')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--latency', type=float, default=1.0, help='stubbed completion latency in seconds')
+    args = parser.parse_args()
+
+    StubOpenAI.latency = args.latency
+    m, server = serve_app(args.threads)
+    port = server.server_port
+    from ai_scheduler import CHAT, AIScheduler
+    scheduled = AIScheduler({CHAT: args.workers}, max_queue=args.queue,
+                            max_queue_per_user=m.app.config['AI_MAX_QUEUE_PER_USER'])
+
+    heavy = [register(m, f"heavy-{i}") for i in range(args.heavy_users)]
+    light = register(m, "light")
+    pets_headers = register(m, "pets")
+    idle = time_pets(port, pets_headers, time.perf_counter() + 2.0)
+    print(f"idle pet list latency: {json.dumps(percentiles(idle))}")
+
+    results = {}
+    unbounded = AIScheduler({CHAT: args.threads * 4}, max_queue=10 ** 6, max_queue_per_user=10 ** 6)
+    for name, scheduler in (("unbounded", unbounded), ("scheduled", scheduled)):
+        m.ai_scheduler = scheduler
+        results[name] = run_phase(m, port, args, heavy, light, pets_headers)
+        print(f"{name}: {json.dumps(results[name])}")
+
+    # Single-flight: the same prompt in flight for several users costs one upstream call
+    StubOpenAI.calls = 0
+    users = heavy + [light]
+    with ThreadPoolExecutor(len(users)) as pool:
+        statuses = list(pool.map(lambda h: request(port, "POST", "/api/v1/ai/chat", h,
+                                                   {"message": "Is chocolate bad for dogs?"})[0], users))
+    print(f"{len(users)} identical prompts: statuses {statuses}, upstream calls {StubOpenAI.calls}")
+    print(f"scheduler: {json.dumps(m.ai_scheduler.stats()[CHAT])}")
+    server.shutdown()
+
+    assert statuses == [200] * len(users) and StubOpenAI.calls == 1, "identical prompts weren't coalesced"
+    light_ok = results["scheduled"]["light_user_statuses"]
+    assert light_ok and set(light_ok) == {200}, f"light user was refused under load: {light_ok}"
+    assert results["scheduled"]["pets_latency_ms"]["p99"] < results["unbounded"]["pets_latency_ms"]["p99"], \
+        "the scheduler didn't protect non-AI latency"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+HausPet AI Server - Auth Fast Path Benchmark
+Requests per second of an authenticated no-op endpoint under each AUTH_MODE:
+db (user lookup per request), cache (per-process principal cache) and
+claims (trust id/role in the token).
+
+Usage:
+    python benchmarks/bench_auth.py --requests 5000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def setup_app(database_url: str):
+    os.environ['POSTGRES_URL'] = database_url
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark-key')
+    from app import app, db, token_required
+    with app.app_context():
+        db.create_all()
+
+    @app.route('/benchmarks/noop', methods=['GET'])
+    @token_required
+    def noop(current_user):
+        return '', 204
+
+    client = app.test_client()
+    token = client.post('/api/v1/auth/register', json={
+        'email': f'auth-bench-{time.time()}@hauspet.net', 'password': 'benchmark'
+    }).get_json()['token']
+    return app, client, {'Authorization': f'Bearer {token}'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--database-url', default=None, help='defaults to a temporary SQLite file')
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench_auth.db"
+    app, client, headers = setup_app(database_url)
+
+    print(f"{'mode':>8} {'req/s':>10} {'us/req':>8}")
+    for mode in ('db', 'cache', 'claims'):
+        app.config['AUTH_MODE'] = mode
+        client.get('/benchmarks/noop', headers=headers)  # warm the cache
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            response = client.get('/benchmarks/noop', headers=headers)
+            assert response.status_code == 204, response.get_data(as_text=True)
+        elapsed = time.perf_counter() - start
+        print(f"{mode:>8} {args.requests / elapsed:>10,.0f} {elapsed / args.requests * 1e6:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+HausPet AI Server - Bulk Health Scoring Benchmark
+Scores synthetic collar history (the simulator's normal / excited / sleeping /
+sick scenarios in 40-reading episodes) with the vectorised NumPy path and
+with a pure-Python loop over the streaming detector, reports rows per second
+for both and checks that they agree row for row.
+
+Usage:
+    python benchmarks/bench_bulk_scoring.py --pets 1000 --rows 10000000
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from anomaly import VITALS, HealthDetector, PetState
+from bulk_scoring import score_history, daily_summary
+
+EPISODE_LENGTH = 40
+SCENARIOS = ("normal", "excited", "sleeping", "sick")
+SCENARIO_WEIGHTS = (0.7, 0.1, 0.15, 0.05)
+BASELINES = {"dog": (80, 101.5, 98, 6.0), "cat": (160, 101.0, 97, 4.0)}
+
+
+def generate(pets: int, rows: int, seed: int):
+    """Columns sorted by pet and time, with readings shaped like ESP32Simulator.generate_sensor_data"""
+    rng = np.random.default_rng(seed)
+    per_pet = rows // pets
+    n = per_pet * pets
+    pet_id = np.repeat(np.arange(1, pets + 1), per_pet)
+    species = {int(p): ("dog", "cat")[p % 2] for p in range(1, pets + 1)}
+    base = np.array([BASELINES[species[p]] for p in range(1, pets + 1)])[pet_id - 1]
+    episodes = rng.choice(len(SCENARIOS), size=-(-n // EPISODE_LENGTH), p=SCENARIO_WEIGHTS)
+    scenario = np.repeat(episodes, EPISODE_LENGTH)[:n]
+
+    def pick(*choices):
+        return np.choose(scenario, choices)
+
+    heart_rate = base[:, 0] + pick(rng.integers(-10, 11, n), rng.integers(20, 51, n),
+                                   -rng.integers(10, 21, n), rng.integers(15, 31, n))
+    temperature = base[:, 1] + pick(rng.uniform(-0.3, 0.3, n), rng.uniform(0.5, 1.0, n),
+                                    -rng.uniform(0.2, 0.5, n), rng.uniform(2.0, 4.0, n))
+    spo2 = base[:, 2] + pick(rng.integers(-2, 3, n), np.zeros(n), np.zeros(n), -rng.integers(3, 9, n))
+    activity = pick(base[:, 3] + rng.uniform(-1.0, 1.0, n), base[:, 3] + rng.uniform(2.0, 4.0, n),
+                    rng.uniform(0.0, 0.5, n), base[:, 3] - rng.uniform(2.0, 4.0, n))
+
+    columns = {
+        "pet_id": pet_id,
+        "timestamp": np.datetime64("2025-01-01T00:00:00", "us")
+        + (np.arange(n) % per_pet) * np.timedelta64(30, "s"),
+        "heart_rate": np.clip(heart_rate, 30, 250).astype(np.float64),
+        "temperature": np.round(np.clip(temperature, 95.0, 106.0), 1),
+        "spo2": np.clip(spo2, 80, 100).astype(np.float64),
+        "activity_level": np.round(np.clip(activity, 0.0, 10.0), 1),
+    }
+    # A few readings arrive without every sensor
+    for vital in VITALS:
+        columns[vital][rng.random(n) < 0.001] = np.nan
+    return columns, species
+
+
+def score_loop(columns, species, limit: int):
+    """The streaming detector, one reading dict at a time"""
+    detector = HealthDetector()
+    states = {pet: PetState(kind) for pet, kind in species.items()}
+    out = np.zeros((limit, 4), dtype=np.int64)
+    chunk = 100000
+    start = time.perf_counter()
+    for offset in range(0, limit, chunk):
+        end = min(limit, offset + chunk)
+        fields = [columns["pet_id"][offset:end].tolist()] + [
+            [None if v != v else v for v in columns[vital][offset:end].tolist()] for vital in VITALS
+        ]
+        for i, (pet_id, *vitals) in enumerate(zip(*fields), offset):
+            reading = dict(zip(VITALS, vitals), pet_id=pet_id)
+            analysis = detector.score(reading, states[pet_id], now=0.0)
+            out[i] = (analysis["health_score"], ("normal", "warning", "critical").index(analysis["severity"]),
+                      analysis["confirmed"], len(analysis["anomalies"]))
+    return out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pets', type=int, default=1000)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--loop-rows', type=int, default=None,
+                        help='score only the first N rows with the Python loop (defaults to all rows)')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    columns, species = generate(args.pets, args.rows, args.seed)
+    n = len(columns["pet_id"])
+
+    start = time.perf_counter()
+    scores = score_history(columns, species, HealthDetector())
+    vectorised = time.perf_counter() - start
+    start = time.perf_counter()
+    report = daily_summary(columns, scores)
+    summarised = time.perf_counter() - start
+
+    limit = min(n, args.loop_rows or n)
+    loop, looped = score_loop(columns, species, limit)
+
+    print(f"{n:,} rows for {args.pets:,} pets")
+    print(f"  numpy   : {n / vectorised:>12,.0f} rows/s ({vectorised:.2f}s, daily summary of "
+          f"{len(report):,} pet-days in {summarised:.2f}s)")
+    print(f"  python  : {limit / looped:>12,.0f} rows/s ({looped:.2f}s for {limit:,} rows)")
+    print(f"  speed-up: {(n / vectorised) / (limit / looped):.0f}x")
+
+    anomaly_counts = np.zeros(n, dtype=np.int64)
+    for bit in range(3 * len(VITALS)):
+        anomaly_counts += (scores["flags"] >> bit) & 1
+    bulk = np.stack([scores["health_score"], scores["severity"], scores["confirmed"], anomaly_counts], axis=1)[:limit]
+    mismatched = np.flatnonzero((bulk != loop).any(axis=1))
+    print(f"  rows where numpy and the streaming detector disagree: {len(mismatched)} of {limit:,}")
+    assert not len(mismatched), f"first mismatch at row {mismatched[0]}: {bulk[mismatched[0]]} vs {loop[mismatched[0]]}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+HausPet AI Server - Collar Load Benchmark
+The standard ingestion benchmark: the simulator's multi-collar load mode
+(collar_load.py) against POST /api/collar/data, reporting achieved readings/s,
+latency percentiles and error rate. By default it serves the app from a
+threaded Werkzeug server in this process (which closes every connection) on
+a temporary SQLite database and checks that every accepted reading was
+stored; pass --url to load an already running deployment (e.g. gunicorn
+behind a keep-alive proxy) instead, where the server doesn't share the load
+generator's CPU.
+
+Usage:
+    python benchmarks/bench_collar_load.py --collars 2000 --interval 10 --duration 60
+    python benchmarks/bench_collar_load.py --url http://localhost:5000 --pet-ids 1,2 --wire-format binary
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from collar_load import DEFAULT_SCENARIO_MIX, parse_scenario_mix
+from esp32_simulator import ESP32Simulator
+
+
+def serve_app(database_url: str):
+    """Serve the app on a free local port; returns (url, app, db, SensorData, sensor_buffer, pet ids, server)"""
+    os.environ['POSTGRES_URL'] = database_url
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark-key')
+    from werkzeug.serving import make_server
+    from app import app, db, User, Pet, SensorData, sensor_buffer
+
+    with app.app_context():
+        db.create_all()
+        user = User(email=f"bench-{time.time()}@hauspet.net")
+        user.set_password("benchmark")
+        db.session.add(user)
+        db.session.flush()
+        pets = [Pet(name="Oscar", species="dog", age=3, weight=65, user_id=user.id),
+                Pet(name="Luna", species="cat", age=2, weight=12, user_id=user.id)]
+        db.session.add_all(pets)
+        db.session.commit()
+        pet_ids = [pet.id for pet in pets]
+
+    # One access log line per request would dominate the run
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", app, db, SensorData, sensor_buffer, pet_ids, server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None, help='load a running server instead of an in-process one')
+    parser.add_argument('--collars', type=int, default=2000)
+    parser.add_argument('--interval', type=float, default=10.0, help='seconds between uploads per collar')
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--ramp-up', type=float, default=5.0)
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--scenarios', type=parse_scenario_mix,
+                        default=",".join(f"{name}={weight}" for name, weight in DEFAULT_SCENARIO_MIX.items()))
+    parser.add_argument('--wire-format', choices=['json', 'binary'], default='json')
+    parser.add_argument('--pet-ids', type=lambda v: [int(p) for p in v.split(',')], default=None)
+    parser.add_argument('--pool-size', type=int, default=50)
+    parser.add_argument('--report-interval', type=float, default=5.0)
+    parser.add_argument('--database-url', default=None, help='in-process server only; defaults to a temporary SQLite file')
+    args = parser.parse_args()
+
+    url, pet_ids = args.url, args.pet_ids
+    if url is None:
+        database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench_collar_load.db"
+        url, app, db, SensorData, sensor_buffer, pet_ids, server = serve_app(database_url)
+
+    offered = args.collars * args.batch_size / args.interval
+    print(f"{args.collars} collars x {args.batch_size} readings every {args.interval:g}s "
+          f"= {offered:,.0f} readings/s offered ({args.wire_format}) against {url}")
+    summary = ESP32Simulator(url, args.wire_format).run_load(
+        collars=args.collars, interval=args.interval, batch_size=args.batch_size, ramp_up=args.ramp_up,
+        duration=args.duration, scenario_mix=args.scenarios, pet_ids=pet_ids, pool_size=args.pool_size,
+        report_interval=args.report_interval, report=lambda stats: print(json.dumps(stats))
+    )
+    print(json.dumps(summary, indent=2))
+
+    if args.url is None:
+        sensor_buffer.wait_idle()
+        with app.app_context():
+            stored = db.session.query(SensorData).count()
+        server.shutdown()
+        print(f"stored {stored} readings")
+        assert stored == summary["readings"], f"{summary['readings']} readings accepted but {stored} stored"
+
+
+if __name__ == "__main__":
+    main()
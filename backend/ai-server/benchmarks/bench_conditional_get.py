@@ -0,0 +1,78 @@
+"""
+HausPet AI Server - Conditional GET Benchmark
+Requests per second, response bytes and SQL statements per request of
+GET /api/v1/pets for an owner with many pets: a cold build, a body served
+from the per-process response cache, and an If-None-Match revalidation that
+ends in 304. Fails if a 304 reads anything but the user's data version.
+
+Usage:
+    python benchmarks/bench_conditional_get.py --pets 50 --requests 2000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def setup_app(database_url: str, pets: int):
+    os.environ['POSTGRES_URL'] = database_url
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark-key')
+    os.environ['AUTH_MODE'] = 'claims'  # keep auth out of the statement count
+    import app as m
+    with m.app.app_context():
+        m.db.create_all()
+        user = m.User(email=f"etag-bench-{time.time()}@hauspet.net")
+        user.set_password("benchmark")
+        m.db.session.add(user)
+        m.db.session.flush()
+        m.db.session.add_all([m.Pet(name=f"Pet {i}", species="dog", breed="Labrador", age=3, weight=30,
+                                    user_id=user.id) for i in range(pets)])
+        m.db.session.commit()
+        headers = {'Authorization': f'Bearer {m._issue_token(user)}'}
+    return m, headers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pets', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--database-url', default=None, help='defaults to a temporary SQLite file')
+    args = parser.parse_args()
+
+    m, headers = setup_app(args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench_conditional_get.db", args.pets)
+    from sqlalchemy import event
+
+    statements = []
+    with m.app.app_context():
+        event.listen(m.db.engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+    client = m.app.test_client()
+    etag = client.get('/api/v1/pets', headers=headers).headers['ETag']
+
+    print(f"{'mode':>13} {'req/s':>8} {'bytes':>7} {'queries':>8}")
+    for mode in ('rebuild', 'cached body', 'not modified'):
+        # With no room in the body cache every request rebuilds the list from the pets table
+        m.response_cache.max_entries = 0 if mode == 'rebuild' else 10000
+        m.response_cache.clear()
+        request_headers = {**headers, 'If-None-Match': etag} if mode == 'not modified' else headers
+        expected = 304 if mode == 'not modified' else 200
+        client.get('/api/v1/pets', headers=request_headers)  # warm
+        statements.clear()
+        response = client.get('/api/v1/pets', headers=request_headers)
+        queries, size = len(statements), len(response.get_data())
+        assert response.status_code == expected, response.status_code
+        if mode == 'not modified':
+            assert queries == 1 and 'data_version' in statements[0], f"304 path ran {statements}"
+
+        start = time.perf_counter()
+        for _ in range(args.requests):
+            client.get('/api/v1/pets', headers=request_headers)
+        elapsed = time.perf_counter() - start
+        print(f"{mode:>13} {args.requests / elapsed:>8,.0f} {size:>7,} {queries:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+HausPet AI Server - Owner Dashboard Benchmark
+Latency and SQL statement count of GET /api/v1/dashboard for owners with a
+growing number of pets, each with a reading history, a GPS fix and open
+alerts. tests/test_dashboard.py checks that the statement count stays
+constant and that the payload matches the seeded data.
+
+Usage:
+    python benchmarks/bench_dashboard.py --pets 1,10,100 --readings 200
+"""
+
+import os
+import sys
+import time
+import argparse
+import datetime
+import statistics
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def setup_app(database_url: str):
+    os.environ['POSTGRES_URL'] = database_url
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark-key')
+    os.environ['AUTH_MODE'] = 'claims'  # keep auth out of the statement count
+    import app as app_module
+    with app_module.app.app_context():
+        app_module.db.create_all()
+    return app_module
+
+
+def seed_owner(m, pets: int, readings: int):
+    """An owner with `pets` pets and their history; returns auth headers"""
+    db = m.db
+    user = m.User(email=f"dashboard-{pets}-{time.time()}@hauspet.net")
+    user.set_password("benchmark")
+    db.session.add(user)
+    db.session.flush()
+    owned = [m.Pet(name=f"Pet {i}", species="dog", age=3, weight=30, user_id=user.id) for i in range(pets)]
+    db.session.add_all(owned)
+    db.session.flush()
+
+    start = datetime.datetime.utcnow() - datetime.timedelta(hours=1)
+    for i, pet in enumerate(owned):
+        rows = [m.SensorData(pet_id=pet.id, timestamp=start + datetime.timedelta(seconds=10 * r),
+                             heart_rate=80 + r % 20, temperature=38.5, spo2=97, activity_level=0.5)
+                for r in range(readings)]
+        db.session.add_all(rows)
+        db.session.add(m.PetLocation(pet_id=pet.id, lat=52.52, lng=13.40, geohash="u33dc0cpn",
+                                     battery_level=90, recorded_at=start))
+        alerts = [m.HealthAlert(pet_id=pet.id, severity=("critical", "warning")[a % 2], health_score=40,
+                                resolved=a >= i % 4) for a in range(4)]
+        db.session.add_all(alerts)
+    db.session.commit()
+    return {'Authorization': f'Bearer {m._issue_token(user)}'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pets', type=lambda v: [int(n) for n in v.split(',')], default=[1, 10, 100])
+    parser.add_argument('--readings', type=int, default=200, help='readings per pet')
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--database-url', default=None, help='defaults to a temporary SQLite file')
+    args = parser.parse_args()
+
+    m = setup_app(args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench_dashboard.db")
+    from sqlalchemy import event
+
+    statements = []
+    with m.app.app_context():
+        event.listen(m.db.engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+    client = m.app.test_client()
+
+    print(f"{'pets':>6} {'queries':>8} {'p50 ms':>8} {'max ms':>8}")
+    for pets in args.pets:
+        with m.app.app_context():
+            headers = seed_owner(m, pets, args.readings)
+
+        statements.clear()
+        client.get('/api/v1/dashboard', headers=headers)
+        queries = len(statements)
+
+        timings = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            client.get('/api/v1/dashboard', headers=headers)
+            timings.append(time.perf_counter() - start)
+        print(f"{pets:>6} {queries:>8} {statistics.median(timings) * 1000:>8.1f} {max(timings) * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+HausPet AI Server - Geofence Evaluation Benchmark
+Cost per GPS fix of the geofence engine as the number of active fences
+grows to 100k (home circles, park polygons and a few large circles per pet,
+spread over a metro area), against a linear scan of every fence. Pets
+random-walk in and out of their fences; a sample of fixes is checked
+against a brute-force containment test.
+
+Usage:
+    python benchmarks/bench_geofence.py --fences 1000,10000,100000 --readings 200000
+"""
+
+import os
+import sys
+import math
+import time
+import random
+import collections
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from geofence import CIRCLE, POLYGON, Fence, GeofenceEngine, PetFences
+
+CENTER_LAT, CENTER_LNG = 40.7128, -74.0060
+METRO_DEGREES = 0.4  # ~40 km across
+FENCES_PER_PET = 5
+
+
+def make_fences(count: int, rng: random.Random):
+    """FENCES_PER_PET fences per pet: home, a park polygon, two nearby places, and every tenth pet a 10 km zone"""
+    fences, homes = [], {}
+    pets = max(1, count // FENCES_PER_PET)
+    for pet_id in range(pets):
+        lat = CENTER_LAT + rng.uniform(-METRO_DEGREES, METRO_DEGREES) / 2
+        lng = CENTER_LNG + rng.uniform(-METRO_DEGREES, METRO_DEGREES) / 2
+        homes[pet_id] = (lat, lng)
+        for n in range(FENCES_PER_PET):
+            fence_id = pet_id * FENCES_PER_PET + n
+            if n == 0:
+                fences.append(Fence(fence_id, pet_id, "Home", CIRCLE, lat, lng, radius_m=rng.uniform(50, 300)))
+            elif n == 1:
+                plat, plng = lat + rng.uniform(-0.01, 0.01), lng + rng.uniform(-0.01, 0.01)
+                sides = rng.randint(4, 8)
+                points = [(plat + 0.003 * math.sin(2 * math.pi * k / sides) * rng.uniform(0.6, 1.0),
+                           plng + 0.004 * math.cos(2 * math.pi * k / sides) * rng.uniform(0.6, 1.0)) for k in range(sides)]
+                fences.append(Fence(fence_id, pet_id, "Park", POLYGON, plat, plng, points=points))
+            elif n == 4 and pet_id % 10 == 0:
+                fences.append(Fence(fence_id, pet_id, "Neighbourhood", CIRCLE, lat, lng, radius_m=10000))
+            else:
+                fences.append(Fence(fence_id, pet_id, "Place", CIRCLE, lat + rng.uniform(-0.02, 0.02),
+                                    lng + rng.uniform(-0.02, 0.02), radius_m=rng.uniform(30, 200)))
+    return fences[:count], homes
+
+
+def make_readings(homes, count: int, rng: random.Random):
+    """Random walks that wander up to ~2 km from home"""
+    positions = dict(homes)
+    pet_ids = list(homes)
+    readings = []
+    for _ in range(count):
+        pet_id = rng.choice(pet_ids)
+        lat, lng = positions[pet_id]
+        home_lat, home_lng = homes[pet_id]
+        lat += rng.gauss(0, 0.0005) + (home_lat - lat) * 0.05
+        lng += rng.gauss(0, 0.0005) + (home_lng - lng) * 0.05
+        positions[pet_id] = (lat, lng)
+        readings.append((pet_id, lat, lng))
+    return readings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fences', default='1000,10000,100000')
+    parser.add_argument('--readings', type=int, default=200000)
+    parser.add_argument('--check', type=int, default=200, help='fixes timed with a linear scan and checked against it')
+    args = parser.parse_args()
+
+    print(f"{'fences':>8} {'build s':>8} {'index us/fix':>13} {'fences tested':>14} {'linear scan us/fix':>19} {'transitions':>12}")
+    for count in (int(c) for c in args.fences.split(',')):
+        rng = random.Random(count)
+        fences, homes = make_fences(count, rng)
+        readings = make_readings(homes, args.readings, rng)
+
+        start = time.perf_counter()
+        engine = GeofenceEngine()
+        for fence in fences:
+            engine.upsert(fence)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        states = collections.defaultdict(PetFences)
+        transitions = sum(len(engine.check(pet_id, lat, lng, states[pet_id])) for pet_id, lat, lng in readings)
+        indexed = (time.perf_counter() - start) / len(readings)
+        tested = engine.stats()["fences_tested"] / len(readings)
+
+        # Without an index every fix walks every fence
+        sample = readings[:args.check]
+        start = time.perf_counter()
+        scanned = [{f.id for f in fences if f.pet_id == pet_id and f.signed_distance(lat, lng) <= 0}
+                   for pet_id, lat, lng in sample]
+        scan = (time.perf_counter() - start) / len(sample)
+        for (pet_id, lat, lng), inside in zip(sample, scanned):
+            assert inside <= set(engine.candidates(pet_id, lat, lng)), "grid index missed a containing fence"
+
+        print(f"{count:>8} {build:>8.2f} {indexed * 1e6:>13.2f} {tested:>14.2f} {scan * 1e6:>19.0f} {transitions:>12}")
+
+
+if __name__ == "__main__":
+    main()
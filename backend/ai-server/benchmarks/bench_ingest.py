@@ -0,0 +1,100 @@
+"""
+HausPet AI Server - Ingestion Benchmark
+Measures collar readings ingested per second through POST /api/collar/data
+across batch sizes, for both JSON array and NDJSON bodies, with the
+write-behind buffer enabled (time includes draining it) and disabled, and
+the mean time a client waits for each request. With write-behind the
+flusher also scores readings and checks geofences, so that cost shows up in
+readings/s but not in the request time.
+
+Usage:
+    python benchmarks/bench_ingest.py --total 20000 --batch-sizes 1,10,100,1000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def setup_app(database_url: str):
+    """Import the app against the benchmark database and create one pet"""
+    os.environ['POSTGRES_URL'] = database_url
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark-key')
+    from app import app, db, User, Pet, sensor_buffer
+
+    with app.app_context():
+        db.create_all()
+        user = User(email=f"bench-{time.time()}@hauspet.net")
+        user.set_password("benchmark")
+        db.session.add(user)
+        db.session.flush()
+        pet = Pet(name="Oscar", species="dog", age=3, weight=65, user_id=user.id)
+        db.session.add(pet)
+        db.session.commit()
+        return app, sensor_buffer, pet.id
+
+
+def make_reading(pet_id: int) -> dict:
+    return {
+        "collar_id": "COLLAR_001",
+        "pet_id": pet_id,
+        "heart_rate": random.randint(70, 90),
+        "temperature": round(random.uniform(101.0, 102.0), 1),
+        "spo2": random.randint(96, 99),
+        "activity_level": round(random.uniform(4.0, 8.0), 1),
+    }
+
+
+def run(client, buffer, pet_id: int, total: int, batch_size: int, ndjson: bool):
+    """Post `total` readings in batches, returning readings per second and mean ms per request"""
+    batches = []
+    for _ in range(max(1, total // batch_size)):
+        readings = [make_reading(pet_id) for _ in range(batch_size)]
+        if ndjson:
+            batches.append(("\n".join(json.dumps(r) for r in readings), "application/x-ndjson"))
+        else:
+            batches.append((json.dumps(readings), "application/json"))
+
+    start = time.perf_counter()
+    ingested = 0
+    for body, content_type in batches:
+        response = client.post('/api/collar/data', data=body, content_type=content_type)
+        assert response.status_code in (200, 202), response.get_data(as_text=True)
+        result = response.get_json()
+        ingested += result.get('accepted', result.get('queued', 0))
+    requests_done = time.perf_counter()
+    buffer.wait_idle()
+    elapsed = time.perf_counter() - start
+    return ingested / elapsed, (requests_done - start) / len(batches) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--total', type=int, default=20000, help='readings per run')
+    parser.add_argument('--batch-sizes', default='1,10,100,1000')
+    parser.add_argument('--database-url', default=None, help='defaults to a temporary SQLite file')
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench_ingest.db"
+    app, buffer, pet_id = setup_app(database_url)
+    client = app.test_client()
+
+    print(f"{'mode':>13} {'batch':>8} {'format':>8} {'readings/s':>12} {'ms/request':>11}")
+    for write_behind in (False, True):
+        app.config['COLLAR_WRITE_BEHIND'] = write_behind
+        mode = 'write-behind' if write_behind else 'sync'
+        for batch_size in (int(b) for b in args.batch_sizes.split(',')):
+            for ndjson in (False, True):
+                rate, request_ms = run(client, buffer, pet_id, args.total, batch_size, ndjson)
+                print(f"{mode:>13} {batch_size:>8} {'ndjson' if ndjson else 'json':>8} {rate:>12,.0f} {request_ms:>11.2f}")
+    print(buffer.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+HausPet AI Server - Login Throughput Benchmark
+Logins per second (and per hashing core) through POST /api/v1/auth/login at
+several PBKDF2 iteration counts, with concurrent clients so the hashing
+process pool is kept busy.
+
+Usage:
+    python benchmarks/bench_passwords.py --costs 100000,260000,600000 --logins 200
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def setup_app(database_url: str):
+    os.environ['POSTGRES_URL'] = database_url
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark-key')
+    from app import app, db, password_hasher
+    with app.app_context():
+        db.create_all()
+    return app, password_hasher
+
+
+def run(app, email: str, logins: int, concurrency: int) -> float:
+    """Fire `logins` logins from `concurrency` threads, returning logins per second"""
+    per_thread = logins // concurrency
+    errors = []
+
+    def worker():
+        client = app.test_client()
+        for _ in range(per_thread):
+            response = client.post('/api/v1/auth/login', json={'email': email, 'password': 'benchmark'})
+            if response.status_code != 200:
+                errors.append(response.get_data(as_text=True))
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    assert not errors, errors[:3]
+    return per_thread * concurrency / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--costs', default='100000,260000,600000', help='PBKDF2 iteration counts')
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--database-url', default=None, help='defaults to a temporary SQLite file')
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench_passwords.db"
+    app, hasher = setup_app(database_url)
+    client = app.test_client()
+    cores = hasher.workers or 1
+
+    print(f"hashing workers: {hasher.workers}")
+    print(f"{'iterations':>10} {'logins/s':>10} {'logins/s/core':>14}")
+    for iterations in (int(c) for c in args.costs.split(',')):
+        hasher.iterations = iterations
+        email = f"pw-bench-{iterations}-{time.time()}@hauspet.net"
+        client.post('/api/v1/auth/register', json={'email': email, 'password': 'benchmark'})
+        rate = run(app, email, args.logins, args.concurrency)
+        print(f"{iterations:>10} {rate:>10,.1f} {rate / cores:>14,.1f}")
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+HausPet AI Server - Realtime Fan-out Benchmark
+Events delivered per second from the pub/sub hub to many subscribers, with
+the local backend and with RedisBackend over an in-memory Redis stand-in
+shared by several hubs (one per simulated gunicorn worker).
+
+Usage:
+    python benchmarks/bench_realtime.py --subscribers 2000 --pets 500 --events 20000
+"""
+
+import os
+import sys
+import time
+import queue
+import random
+import argparse
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pubsub import Hub, RedisBackend
+
+
+class StandInRedis:
+    """Just enough of redis.Redis for RedisBackend: publish() and pubsub().listen()"""
+
+    def __init__(self):
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def publish(self, channel, data):
+        with self._lock:
+            listeners = list(self._listeners)
+        for pattern, inbox in listeners:
+            if channel.startswith(pattern.rstrip("*")):
+                inbox.put({"type": "pmessage", "channel": channel.encode(), "data": data})
+        return len(listeners)
+
+    def pubsub(self):
+        redis = self
+
+        class PubSub:
+            def __init__(self):
+                self.inbox = queue.Queue()
+
+            def psubscribe(self, pattern):
+                with redis._lock:
+                    redis._listeners.append((pattern, self.inbox))
+
+            def listen(self):
+                while True:
+                    yield self.inbox.get()
+
+        return PubSub()
+
+
+def run(hubs, subscribers: int, pets: int, events: int) -> float:
+    pairs = [(hub, hub.subscribe([f"pet:{random.randrange(pets)}"]))
+             for hub in (hubs[i % len(hubs)] for i in range(subscribers))]
+    subscriptions = [subscription for _, subscription in pairs]
+    delivered = 0
+    stop = threading.Event()
+
+    def drain():
+        nonlocal delivered
+        while not stop.is_set():
+            for subscription in subscriptions:
+                while subscription.get(timeout=0) is not None:
+                    delivered += 1
+
+    drainer = threading.Thread(target=drain, daemon=True)
+    drainer.start()
+    start = time.perf_counter()
+    for i in range(events):
+        hubs[i % len(hubs)].publish(f"pet:{i % pets}", {"type": "reading", "pet_id": i % pets, "heart_rate": 80})
+    # Let relayed messages land before measuring
+    time.sleep(0.2)
+    stop.set()
+    drainer.join()
+    elapsed = time.perf_counter() - start
+    for hub, subscription in pairs:
+        hub.unsubscribe(subscription)
+    return delivered / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subscribers', type=int, default=2000)
+    parser.add_argument('--pets', type=int, default=500)
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=4, help='hubs sharing the Redis stand-in')
+    args = parser.parse_args()
+
+    print(f"{'backend':>16} {'deliveries/s':>14}")
+    local = Hub(max_queue=1000)
+    print(f"{'local':>16} {run([local], args.subscribers, args.pets, args.events):>14,.0f}")
+
+    redis = StandInRedis()
+    hubs = [Hub(max_queue=1000, backend=RedisBackend(redis)) for _ in range(args.workers)]
+    rate = run(hubs, args.subscribers, args.pets, args.events)
+    print(f"{'redis stand-in':>16} {rate:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+HausPet AI Server - Registration Benchmark
+Sign-ups per second for distinct emails through POST /api/v1/auth/register.
+That parallel sign-ups for one email create exactly one account is checked
+by tests/test_registration.py.
+
+Usage:
+    python benchmarks/bench_registration.py --signups 500
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def setup_app(database_url: str):
+    os.environ['POSTGRES_URL'] = database_url
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark-key')
+    # Keep hashing cheap and inline so the database is what's measured
+    os.environ.setdefault('PASSWORD_HASH_ITERATIONS', '1000')
+    os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+    from app import app, db
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--signups', type=int, default=500)
+    parser.add_argument('--database-url', default=None, help='defaults to a temporary SQLite file')
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench_registration.db"
+    app = setup_app(database_url)
+
+    client = app.test_client()
+    created = 0
+    start = time.perf_counter()
+    for i in range(args.signups):
+        response = client.post('/api/v1/auth/register', json={
+            'email': f"signup-{i}-{time.time()}@hauspet.net", 'password': 'benchmark'
+        })
+        created += response.status_code == 201
+    elapsed = time.perf_counter() - start
+    print(f"sign-ups/s: {args.signups / elapsed:,.0f} ({created} of {args.signups} created)")
+
+
+if __name__ == "__main__":
+    main()
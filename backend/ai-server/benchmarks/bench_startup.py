@@ -0,0 +1,112 @@
+"""
+HausPet AI Server - Cold Start Benchmark
+What a serverless cold start pays before it can answer: fresh interpreters
+import the Vercel entry point (api/index.py) and serve one request, timing
+process wall time, import time and time to first response. Also prints the
+heaviest imports from a `python -X importtime` run, and checks that
+importing the app neither loads the OpenAI SDK or numpy nor touches the
+database.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 10 --path /api/health --top 15
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter; prints one JSON line of timings
+COLD_START = """
+import sys, time, json
+started = time.perf_counter()
+sys.path.insert(0, {server_dir!r})
+sys.path.insert(0, {api_dir!r})
+import sqlalchemy.event, sqlalchemy.engine
+connects = []
+sqlalchemy.event.listen(sqlalchemy.engine.Engine, "connect", lambda *args: connects.append(1))
+imported_at = time.perf_counter()
+from index import app
+imported = time.perf_counter()
+heavy = sorted(name for name in ("openai", "numpy") if name in sys.modules)
+connected_on_import = len(connects)
+response = app.test_client().get({path!r})
+responded = time.perf_counter()
+print(json.dumps({{
+    "import_s": imported - imported_at,
+    "first_response_s": responded - imported,
+    "total_s": responded - started,
+    "status": response.status_code,
+    "heavy_modules": heavy,
+    "db_connects_on_import": connected_on_import,
+}}))
+"""
+
+
+def environment(database_url: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("POSTGRES_URL", database_url)
+    env.setdefault("OPENAI_API_KEY", "benchmark-key")
+    return env
+
+
+def cold_start(path: str, env: dict) -> dict:
+    code = COLD_START.format(server_dir=SERVER_DIR, api_dir=os.path.join(SERVER_DIR, "api"), path=path)
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", code], env=env, cwd=SERVER_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_s"] = time.perf_counter() - start
+    return result
+
+
+def heaviest_imports(env: dict, top: int):
+    """Top-level imports of api/index.py by cumulative time, from -X importtime"""
+    code = f"import sys; sys.path.insert(0, {SERVER_DIR!r}); sys.path.insert(0, {os.path.join(SERVER_DIR, 'api')!r}); import index"
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env, cwd=SERVER_DIR,
+                            capture_output=True, text=True, check=True).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line[12:]:
+            continue
+        _, cumulative, name = line[12:].split("|")
+        if cumulative.strip().isdigit() and len(name) - len(name.lstrip()) <= 3:
+            modules.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(modules, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--path', default='/api/health', help='first request to time')
+    parser.add_argument('--top', type=int, default=15, help='heaviest imports to list')
+    parser.add_argument('--database-url', default=None, help='defaults to a temporary SQLite file (never created)')
+    args = parser.parse_args()
+
+    env = environment(args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench_startup.db")
+
+    print(f"{'cumulative s':>12}  module")
+    for seconds, name in heaviest_imports(env, args.top):
+        print(f"{seconds:>12.3f}  {name}")
+
+    runs = [cold_start(args.path, env) for _ in range(args.runs)]
+    print()
+    for key in ("process_s", "total_s", "import_s", "first_response_s"):
+        values = sorted(run[key] for run in runs)
+        print(f"{key:>17}: median {statistics.median(values) * 1000:7.1f} ms   max {values[-1] * 1000:7.1f} ms")
+    print(f"{'status':>17}: {sorted({run['status'] for run in runs})}")
+
+    heavy = sorted({name for run in runs for name in run["heavy_modules"]})
+    connects = max(run["db_connects_on_import"] for run in runs)
+    assert not heavy, f"importing the app loaded {heavy}"
+    assert not connects, "importing the app connected to the database"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+HausPet AI Server - Voice Pipeline Benchmark
+Compares latency to first audible audio for POST /api/v1/ai/voice-chat
+(transcribe -> full completion -> full TTS -> base64 JSON) against the
+pipelined /api/v1/ai/voice-chat/stream, using a stubbed OpenAI client with
+configurable upstream latencies.
+
+Usage:
+    python benchmarks/bench_voice_pipeline.py --runs 5 --token-delay 0.02
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REPLY = ("Vomiting once after eating grass is usually harmless in dogs. "
+         "Offer small amounts of water and skip the next meal. "
+         "If the vomiting continues or Oscar seems lethargic, please see your vet today. "
+         "[CONDITION_DETECTED: \"Gastritis\"]")
+
+
+class StubOpenAI:
+    """Mimics the parts of the OpenAI client used by voice chat, with sleeps for latency"""
+
+    transcribe_latency = 0.3
+    token_delay = 0.02
+    first_token_latency = 0.4
+    tts_base_latency = 0.25
+    tts_per_char = 0.003
+
+    def __init__(self, **kwargs):
+        stub = type(self)
+        self.audio = SimpleNamespace(
+            transcriptions=SimpleNamespace(create=stub._transcribe),
+            speech=SimpleNamespace(create=stub._speech),
+        )
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=stub._complete))
+
+    @classmethod
+    def _transcribe(cls, **kwargs):
+        time.sleep(cls.transcribe_latency)
+        return SimpleNamespace(text="My dog vomited after eating grass, what should I do?")
+
+    @classmethod
+    def _tokens(cls):
+        time.sleep(cls.first_token_latency)
+        words = REPLY.split(" ")
+        for i, word in enumerate(words):
+            time.sleep(cls.token_delay)
+            yield word + (" " if i < len(words) - 1 else "")
+
+    @classmethod
+    def _complete(cls, model, messages, stream=False):
+        if stream:
+            return (SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=t))]) for t in cls._tokens())
+        text = "".join(cls._tokens())
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+    @classmethod
+    def _speech(cls, model, voice, input):
+        time.sleep(cls.tts_base_latency + cls.tts_per_char * len(input))
+        # ~16 kB/s of MP3 for ~15 characters/s of speech
+        return SimpleNamespace(content=b"\xff\xfb" * (len(input) * 500))
+
+
+def setup_app():
+    os.environ['POSTGRES_URL'] = f"sqlite:///{tempfile.mkdtemp()}/bench_voice.db"
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark-key')
+    # Every run should pay the full upstream pipeline, not hit the response or audio caches
+    os.environ['AI_CACHE_MAX_ENTRIES'] = '0'
+    os.environ['TTS_CACHE_MEMORY_BYTES'] = '0'
+    os.environ['TTS_CACHE_DISK_BYTES'] = '0'
+    import app as app_module
+    app_module._connect_openai = StubOpenAI
+    with app_module.app.app_context():
+        app_module.db.create_all()
+    client = app_module.app.test_client()
+    token = client.post('/api/v1/auth/register', json={
+        'email': 'voice-bench@hauspet.net', 'password': 'benchmark'
+    }).get_json()['token']
+    return client, {'Authorization': f'Bearer {token}'}
+
+
+def measure(client, headers, path: str):
+    """Return (seconds to first audio byte, total seconds, response bytes)"""
+    start = time.perf_counter()
+    response = client.post(path, headers=headers, buffered=False,
+                           data={'audio': (io.BytesIO(b'\x00' * 32000), 'audio.m4a')})
+    first_audio = None
+    size = 0
+    for chunk in response.response:
+        size += len(chunk)
+        if first_audio is None and (b"audio/mpeg" in chunk or b'"response_audio"' in chunk):
+            first_audio = time.perf_counter() - start
+    total = time.perf_counter() - start
+    response.close()
+    return first_audio or total, total, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--token-delay', type=float, default=StubOpenAI.token_delay)
+    parser.add_argument('--tts-per-char', type=float, default=StubOpenAI.tts_per_char)
+    args = parser.parse_args()
+    StubOpenAI.token_delay = args.token_delay
+    StubOpenAI.tts_per_char = args.tts_per_char
+
+    client, headers = setup_app()
+    print(f"{'endpoint':>28} {'first audio p50':>16} {'total p50':>10} {'bytes':>9}")
+    for path in ('/api/v1/ai/voice-chat', '/api/v1/ai/voice-chat/stream'):
+        results = [measure(client, headers, path) for _ in range(args.runs)]
+        first = statistics.median(r[0] for r in results)
+        total = statistics.median(r[1] for r in results)
+        print(f"{path:>28} {first * 1000:>14.0f}ms {total * 1000:>8.0f}ms {results[0][2]:>9,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+HausPet AI Server - Voice Upload Memory Benchmark
+Peak Python heap per concurrent POST /api/v1/ai/voice-chat request. It
+compares the old path, which read the whole recording into memory, with
+the current one, which streams the spooled upload to a stubbed Whisper that
+reads it in chunks as the SDK's HTTP client does. Requests go over real
+sockets from a client that streams the body from disk, so only the
+server's memory is measured. It also checks that oversized, over-long and
+length-less uploads are refused.
+
+Usage:
+    python benchmarks/bench_voice_upload.py --concurrency 8 --seconds 60
+"""
+
+import io
+import os
+import sys
+import time
+import wave
+import logging
+import argparse
+import tempfile
+import threading
+import tracemalloc
+import http.client
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BOUNDARY = "hauspet-bench-boundary"
+
+
+class StubOpenAI:
+    """Whisper / chat / TTS stand-ins; transcription consumes the file the way httpx streams it"""
+
+    transcribe_latency = 0.5
+
+    def __init__(self, **kwargs):
+        stub = type(self)
+        self.audio = SimpleNamespace(
+            transcriptions=SimpleNamespace(create=stub._transcribe),
+            speech=SimpleNamespace(create=lambda **kw: SimpleNamespace(content=b"\xff\xfb" * 512)),
+        )
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=lambda **kw: SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Keep an eye on her and offer water."))]
+        )))
+
+    @classmethod
+    def _transcribe(cls, model, file):
+        name, content = file
+        if not isinstance(content, bytes):
+            while content.read(64 * 1024):
+                pass
+        time.sleep(cls.transcribe_latency)
+        return SimpleNamespace(text="My cat is sneezing, should I worry?")
+
+
+def wav_recording(seconds: float, rate: int = 44100) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as recording:
+        recording.setnchannels(1)
+        recording.setsampwidth(2)
+        recording.setframerate(rate)
+        recording.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buffer.getvalue()
+
+
+def multipart_file(audio: bytes) -> str:
+    """Write the multipart request body to disk so the client never holds it in memory"""
+    path = os.path.join(tempfile.mkdtemp(), "voice-upload.body")
+    with open(path, "wb") as body:
+        body.write(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="audio"; filename="audio.wav"\r\n'
+                   f'Content-Type: audio/wav\r\n\r\n'.encode())
+        body.write(audio)
+        body.write(f"\r\n--{BOUNDARY}--\r\n".encode())
+    return path
+
+
+def setup_app():
+    os.environ['POSTGRES_URL'] = f"sqlite:///{tempfile.mkdtemp()}/bench_voice_upload.db"
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark-key')
+    os.environ['AI_CACHE_MAX_ENTRIES'] = '0'
+    os.environ['TTS_CACHE_MEMORY_BYTES'] = '0'
+    os.environ['TTS_CACHE_DISK_BYTES'] = '0'
+    from werkzeug.serving import make_server
+    import app as m
+    m._connect_openai = StubOpenAI
+    with m.app.app_context():
+        m.db.create_all()
+    token = m.app.test_client().post('/api/v1/auth/register', json={
+        'email': f'voice-upload-{time.time()}@hauspet.net', 'password': 'benchmark'
+    }).get_json()['token']
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, m.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return m, server, {'Authorization': f'Bearer {token}'}
+
+
+def post(port: int, headers: dict, body=None, length=None, chunked=False) -> int:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    request_headers = {**headers, 'Content-Type': f'multipart/form-data; boundary={BOUNDARY}'}
+    if length is not None:
+        request_headers['Content-Length'] = str(length)
+    try:
+        conn.request("POST", "/api/v1/ai/voice-chat", body=body, headers=request_headers, encode_chunked=chunked)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def concurrent_peak(port: int, headers: dict, body_path: str, concurrency: int) -> int:
+    """Peak traced bytes above the idle baseline while `concurrency` uploads are in flight"""
+    statuses = []
+
+    def upload():
+        with open(body_path, "rb") as body:
+            statuses.append(post(port, headers, body, os.path.getsize(body_path)))
+
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    threads = [threading.Thread(target=upload) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert statuses == [200] * concurrency, statuses
+    return tracemalloc.get_traced_memory()[1] - baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=60, help='recording length (44.1 kHz mono WAV, ~5 MB per minute)')
+    args = parser.parse_args()
+
+    m, server, headers = setup_app()
+    port = server.server_port
+    audio = wav_recording(args.seconds)
+    body_path = multipart_file(audio)
+    print(f"{args.concurrency} concurrent uploads of {len(audio) / 1e6:.1f} MB ({args.seconds:g}s)")
+
+    from flask import request
+    streamed = m.voice_upload
+
+    def buffered():
+        # The previous implementation: the whole recording as bytes in worker memory
+        return "audio.m4a", request.files['audio'].read()
+
+    tracemalloc.start()
+    print(f"{'path':>9} {'peak MB':>9} {'MB/request':>11}")
+    for name, handler in (("buffered", buffered), ("streamed", streamed)):
+        m.voice_upload = handler
+        post(port, headers, open(body_path, "rb"), os.path.getsize(body_path))  # warm
+        peak = concurrent_peak(port, headers, body_path, args.concurrency)
+        print(f"{name:>9} {peak / 1e6:>9.1f} {peak / args.concurrency / 1e6:>11.2f}")
+    tracemalloc.stop()
+
+    limit = m.app.config['VOICE_MAX_UPLOAD_BYTES']
+    start = time.perf_counter()
+    status = post(port, headers, b"", length=limit * 4)
+    print(f"Content-Length {limit * 4:,}: {status} in {(time.perf_counter() - start) * 1000:.1f} ms, body never sent")
+    assert status == 413, status
+
+    too_long = multipart_file(wav_recording(m.app.config['VOICE_MAX_SECONDS'] + 1, rate=8000))
+    with open(too_long, "rb") as body:
+        status = post(port, headers, body, os.path.getsize(too_long))
+    print(f"{m.app.config['VOICE_MAX_SECONDS'] + 1:g}s recording: {status}")
+    assert status == 413, status
+
+    status = post(port, headers, iter([open(body_path, "rb").read(1024)]), chunked=True)
+    print(f"chunked upload without Content-Length: {status}")
+    assert status == 411, status
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
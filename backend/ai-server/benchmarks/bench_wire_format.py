@@ -0,0 +1,83 @@
+"""
+HausPet AI Server - Collar Wire Format Benchmark
+Bytes per reading on the wire and server-side decode throughput (body to
+sensor_data rows) for JSON, NDJSON and the binary collar format, using
+readings from the ESP32 simulator. Also checks that every format decodes to
+the same vitals.
+
+Usage:
+    python benchmarks/bench_wire_format.py --readings 100000 --batch-size 100
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import collar_wire
+from esp32_simulator import ESP32Simulator
+from ingest import decode_binary, normalize_batch, parse_body
+from vitals import VITAL_COLUMNS
+
+COLLAR_HANDLE = 1
+PET_ID = 1
+
+
+def generate(count: int):
+    simulator = ESP32Simulator()
+    scenarios = ["normal", "excited", "sick", "sleeping"]
+    readings = []
+    for i in range(count):
+        simulator.scenario = scenarios[(i // 50) % len(scenarios)]
+        readings.append(simulator.generate_sensor_data())
+    return readings
+
+
+def encodings(readings, batch_size: int):
+    """(name, content type, bodies) for each format, one body per batch"""
+    batches = [readings[i:i + batch_size] for i in range(0, len(readings), batch_size)]
+    return [
+        ("json (1/request)", "application/json", [json.dumps(r).encode() for r in readings]),
+        ("json array", "application/json", [json.dumps(b).encode() for b in batches]),
+        ("ndjson", "application/x-ndjson", ["\n".join(json.dumps(r) for r in b).encode() for b in batches]),
+        ("binary (1/request)", collar_wire.CONTENT_TYPE,
+         [collar_wire.encode(COLLAR_HANDLE, [r], gps=True) for r in readings]),
+        ("binary", collar_wire.CONTENT_TYPE, [collar_wire.encode(COLLAR_HANDLE, b) for b in batches]),
+        ("binary + gps", collar_wire.CONTENT_TYPE, [collar_wire.encode(COLLAR_HANDLE, b, gps=True) for b in batches]),
+    ]
+
+
+def decode(body: bytes, content_type: str, max_batch: int):
+    if content_type == collar_wire.CONTENT_TYPE:
+        rows, _ = decode_binary(body, max_batch, lambda handle: PET_ID if handle == COLLAR_HANDLE else None)
+        return rows
+    rows, _ = normalize_batch(parse_body(body, content_type, max_batch))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readings', type=int, default=100000)
+    parser.add_argument('--batch-size', type=int, default=100)
+    args = parser.parse_args()
+
+    readings = generate(args.readings)
+    expected = [tuple(r[c] for c in VITAL_COLUMNS) for r in readings]
+
+    print(f"{'format':>20} {'bytes/reading':>14} {'decoded rows/s':>15}")
+    for name, content_type, bodies in encodings(readings, args.batch_size):
+        size = sum(len(body) for body in bodies) / len(readings)
+        start = time.perf_counter()
+        rows = [row for body in bodies for row in decode(body, content_type, args.batch_size)]
+        elapsed = time.perf_counter() - start
+        print(f"{name:>20} {size:>14.1f} {len(rows) / elapsed:>15,.0f}")
+
+        decoded = [tuple(row[c] for c in VITAL_COLUMNS) for row in rows]
+        assert decoded == expected, f"{name} decoded different vitals"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+HausPet AI Server - Bulk Health Scoring
+Scores months of stored readings for many pets at once with NumPy, for
+backfills and daily reports. Works on columns (one array per field, rows
+sorted by pet and time) and reproduces the streaming detector's scores,
+severities and anomaly flags without a Python-level loop per reading.
+"""
+
+import math
+from typing import Dict, Iterable, List
+
+from anomaly import VITALS, SPECIES_PROFILES, DEFAULT_SPECIES, SCORE_WEIGHTS, SCORE_TOLERANCE
+
+# Imported by require_numpy() on first use, so importing the app doesn't load numpy
+np = None
+
+COLUMNS = ("pet_id", "timestamp") + VITALS
+SEVERITIES = ("normal", "warning", "critical")
+
+# Per-vital anomaly bits in `flags`: out of range, sudden spike/drop (z-score), sustained drift (CUSUM)
+FLAG_RANGE, FLAG_SPIKE, FLAG_DRIFT = 1, 2, 4
+
+CUSUM_WINDOW = 64
+
+
+def require_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError("Bulk health scoring requires numpy (pip install numpy)")
+        np = numpy
+
+
+def vital_flag(vital: str, flag: int) -> int:
+    return flag << (3 * VITALS.index(vital))
+
+
+def columns_from_chunks(chunks: Iterable[List[tuple]]) -> Dict:
+    """Build column arrays from chunks of (pet_id, timestamp, *VITALS) rows; NULL vitals become NaN"""
+    require_numpy()
+    parts = {name: [] for name in COLUMNS}
+    for chunk in chunks:
+        if not chunk:
+            continue
+        fields = list(zip(*chunk))
+        parts["pet_id"].append(np.array(fields[0], dtype=np.int64))
+        parts["timestamp"].append(np.array(fields[1], dtype="datetime64[us]"))
+        for vital, values in zip(VITALS, fields[2:]):
+            parts[vital].append(np.array(values, dtype=np.float64))
+    empty = {"pet_id": np.int64, "timestamp": "datetime64[us]"}
+    return {
+        name: np.concatenate(arrays) if arrays else np.array([], dtype=empty.get(name, np.float64))
+        for name, arrays in parts.items()
+    }
+
+
+def _group_starts(pet_ids):
+    starts = np.ones(len(pet_ids), dtype=bool)
+    starts[1:] = pet_ids[1:] != pet_ids[:-1]
+    return starts
+
+
+def _previous(values, starts, initial):
+    """Each row's value from the row before it in the same group, `initial` at group starts"""
+    out = np.empty_like(values)
+    out[1:] = values[:-1]
+    out[starts] = initial[starts]
+    return out
+
+
+def _linear_scan(b, a: float, starts):
+    """y[t] = a * y[t-1] + b[t], restarting from 0 at group starts.
+
+    Rows are cut into blocks short enough that a**-L stays small, each block is
+    solved with a scaled cumulative sum, and block-end values are carried
+    forward through the few preceding blocks whose weight a**L, a**2L, ... is
+    still above double precision.
+    """
+    n = len(b)
+    if n == 0:
+        return b.copy()
+    size = max(1, min(n, int(math.log(1e3) / -math.log(a))))
+    blocks = -(-n // size)
+    pad = blocks * size - n
+    b2 = np.concatenate([b, np.zeros(pad)]).reshape(blocks, size)
+    s2 = np.concatenate([starts, np.zeros(pad, dtype=bool)]).reshape(blocks, size)
+
+    k = np.arange(size)
+    powers = a ** k
+    scaled = np.cumsum(b2 / powers, axis=1)
+    before = np.zeros_like(scaled)
+    before[:, 1:] = scaled[:, :-1]
+    last_start = np.maximum.accumulate(np.where(s2, k, -1), axis=1)
+    base = np.where(last_start >= 0, np.take_along_axis(before, np.maximum(last_start, 0), axis=1), 0.0)
+    local = powers * (scaled - base)
+
+    # Value at the end of each block including what flows in from earlier blocks
+    ends = local[:, -1]
+    open_block = last_start[:, -1] < 0
+    carry = ends.copy()
+    block_weight = a ** size
+    chained = np.ones(blocks, dtype=bool)
+    m = 1
+    while m < blocks and block_weight ** m > 1e-18:
+        chained[m - 1:] &= open_block[:blocks - m + 1]
+        chained[:m - 1] = False
+        carry[m:] += block_weight ** m * ends[:-m] * chained[m:]
+        m += 1
+
+    incoming = np.zeros(blocks)
+    incoming[1:] = carry[:-1]
+    y = local + np.where(last_start < 0, (a * powers) * incoming[:, None], 0.0)
+    return y.reshape(-1)[:n]
+
+
+def _cusum_alarms(z, first, end, k: float, h: float):
+    """Rows where the two-sided CUSUM of z fires, for each group running over rows [first, end).
+
+    Both sums reset to zero after an alarm. All groups advance together, one
+    window (or one alarm) per round.
+    """
+    alarms = np.zeros(len(z), dtype=bool)
+    live = first < end
+    row, stop = first[live], end[live]
+    pos0 = np.zeros(len(row))
+    neg0 = np.zeros(len(row))
+    offsets = np.arange(CUSUM_WINDOW)
+    while len(row):
+        idx = row[:, None] + offsets
+        inside = idx < stop[:, None]
+        window = np.where(inside, z[np.minimum(idx, len(z) - 1)], 0.0)
+        # Lindley form of max(0, s + u): s[t] = S[t] - min(-s0, min(S[..t]))
+        rise = np.cumsum(window - k, axis=1)
+        fall = np.cumsum(-window - k, axis=1)
+        pos = rise - np.minimum(-pos0[:, None], np.minimum.accumulate(rise, axis=1))
+        neg = fall - np.minimum(-neg0[:, None], np.minimum.accumulate(fall, axis=1))
+        fired = inside & ((pos > h) | (neg > h))
+        hit = fired.any(axis=1)
+        at = np.argmax(fired, axis=1)
+        alarms[row[hit] + at[hit]] = True
+
+        steps = np.minimum(CUSUM_WINDOW, stop - row)
+        tail = np.arange(len(row)), steps - 1
+        pos0 = np.where(hit, 0.0, pos[tail])
+        neg0 = np.where(hit, 0.0, neg[tail])
+        row = np.where(hit, row + at + 1, row + steps)
+        keep = row < stop
+        row, stop, pos0, neg0 = row[keep], stop[keep], pos0[keep], neg0[keep]
+    return alarms
+
+
+def score_history(columns: Dict, species_by_pet: Dict[int, str], detector) -> Dict:
+    """Score every row as `detector` would if it had streamed them from each pet's first reading.
+
+    `columns` must be sorted by pet and time. Returns health_score, severity
+    (index into SEVERITIES), flags, confirmed and, per vital, the running
+    mean and z-score.
+    """
+    require_numpy()
+    pet_ids = columns["pet_id"]
+    n = len(pet_ids)
+    starts = _group_starts(pet_ids)
+    row = np.arange(n)
+    position = row - np.maximum.accumulate(np.where(starts, row, 0))
+    group = np.cumsum(starts) - 1
+
+    pets = pet_ids[starts]
+    profiles = [SPECIES_PROFILES.get((species_by_pet.get(int(p)) or DEFAULT_SPECIES).lower(),
+                                     SPECIES_PROFILES[DEFAULT_SPECIES]) for p in pets]
+
+    alpha = detector.alpha
+    decay = 1 - alpha
+    score = np.full(n, 100.0)
+    flags = np.zeros(n, dtype=np.uint16)
+    result = {}
+    for vital in VITALS:
+        values = columns[vital]
+        low, high, baseline = (np.array([p[vital][i] for p in profiles], dtype=np.float64) for i in range(3))
+        low, high = low[group], high[group]
+
+        outside = np.where(values < low, low - values, np.where(values > high, values - high, 0.0))
+        penalty = SCORE_WEIGHTS[vital] * np.minimum(1.0, outside / SCORE_TOLERANCE[vital])
+        score -= penalty
+        flags |= np.where(penalty > 0, vital_flag(vital, FLAG_RANGE), 0).astype(np.uint16)
+
+        # Running statistics only advance on rows that have this vital
+        present = np.flatnonzero(~np.isnan(values))
+        x = values[present]
+        g = group[present]
+        vstarts = _group_starts(g)
+        mean0 = baseline[g]
+        var0 = (((high - low) / 4) ** 2)[present]
+
+        mean_in = alpha * x
+        mean_in[vstarts] += decay * mean0[vstarts]
+        mean_after = _linear_scan(mean_in, decay, vstarts)
+        mean = _previous(mean_after, vstarts, mean0)
+        diff = x - mean
+        var_in = decay * alpha * diff * diff
+        var_in[vstarts] += decay * var0[vstarts]
+        var = _previous(_linear_scan(var_in, decay, vstarts), vstarts, var0)
+        std = np.sqrt(var)
+        std[std == 0] = 1e-9
+        z = diff / std
+
+        warm = position[present] >= detector.warmup
+        spike = warm & (np.abs(z) >= detector.z_threshold)
+        # Warm rows are a suffix of each pet's rows, so each group's CUSUM runs over [first warm, end)
+        first_warm = np.searchsorted(g * 2 + warm, np.arange(len(pets)) * 2 + 1)
+        vital_end = np.searchsorted(g, np.arange(len(pets)), side="right")
+        drift = _cusum_alarms(z, first_warm, vital_end, detector.cusum_k, detector.cusum_h)
+
+        flags[present] |= (np.where(spike, vital_flag(vital, FLAG_SPIKE), 0)
+                           | np.where(drift, vital_flag(vital, FLAG_DRIFT), 0)).astype(np.uint16)
+        result[f"{vital}_mean"] = np.full(n, np.nan)
+        result[f"{vital}_mean"][present] = mean_after
+        result[f"{vital}_z"] = np.full(n, np.nan)
+        result[f"{vital}_z"][present] = z
+
+    health_score = np.maximum(0, np.rint(score)).astype(np.int64)
+    severity = np.where(health_score < 50, 2, np.where((health_score < 80) | (flags > 0), 1, 0))
+
+    abnormal = severity > 0
+    last_break = np.maximum.accumulate(np.maximum(np.where(abnormal, -1, row), np.where(starts, row - 1, -1)))
+    consecutive = np.where(abnormal, row - last_break, 0)
+    confirmed = (severity == 2) | (consecutive >= detector.confirm_after)
+
+    result.update(health_score=health_score, severity=severity, flags=flags, confirmed=confirmed)
+    return result
+
+
+def daily_summary(columns: Dict, scores: Dict) -> List[Dict]:
+    """Per pet and UTC day: readings, mean/min health score and abnormal reading counts"""
+    require_numpy()
+    n = len(columns["pet_id"])
+    if not n:
+        return []
+    pet_ids = columns["pet_id"]
+    days = columns["timestamp"].astype("datetime64[D]")
+    boundary = np.ones(n, dtype=bool)
+    boundary[1:] = (pet_ids[1:] != pet_ids[:-1]) | (days[1:] != days[:-1])
+    first = np.flatnonzero(boundary)
+    counts = np.diff(np.append(first, n))
+    score = scores["health_score"]
+    severity = scores["severity"]
+    return [
+        {
+            "pet_id": int(pet_id),
+            "date": str(day),
+            "readings": int(count),
+            "avg_health_score": round(float(total) / count, 1),
+            "min_health_score": int(lowest),
+            "warning": int(warnings),
+            "critical": int(criticals),
+            "confirmed": int(confirmed),
+        }
+        for pet_id, day, count, total, lowest, warnings, criticals, confirmed in zip(
+            pet_ids[first], days[first], counts,
+            np.add.reduceat(score, first), np.minimum.reduceat(score, first),
+            np.add.reduceat((severity == 1).astype(np.int64), first),
+            np.add.reduceat((severity == 2).astype(np.int64), first),
+            np.add.reduceat(scores["confirmed"].astype(np.int64), first)
+        )
+    ]
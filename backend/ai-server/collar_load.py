@@ -0,0 +1,329 @@
+"""
+HausPet Collar Load Generator
+Headless load mode for the ESP32 simulator: thousands of simulated collars
+posting to /api/collar/data concurrently from one asyncio loop over a shared
+pool of keep-alive HTTP connections, with throughput, latency percentiles
+and error rate reported as it runs.
+Created by Maryan - Full Stack Developer
+"""
+
+import ssl
+import json
+import time
+import random
+import asyncio
+import datetime
+import collections
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import collar_wire
+
+DEFAULT_SCENARIO_MIX = {"normal": 70, "excited": 10, "sick": 10, "sleeping": 10}
+
+# Latencies kept for the run's percentiles; beyond this a uniform reservoir sample is kept
+LATENCY_SAMPLE_SIZE = 100000
+
+
+def parse_scenario_mix(value: str) -> Dict[str, float]:
+    """'normal=70,sick=30' -> {'normal': 70.0, 'sick': 30.0}"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def percentiles(values: List[float]) -> Dict:
+    if not values:
+        return {}
+    values = sorted(values)
+    pick = lambda q: round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 1)
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": round(values[-1] * 1000, 1)}
+
+
+class HttpPool:
+    """HTTP/1.1 keep-alive connections to one server, shared by every simulated collar.
+
+    At most `size` requests are in flight; a connection the server closes is
+    reopened on next use. `url` may be http or https, and request paths are
+    appended to its path (e.g. https://example.com/staging).
+    """
+
+    def __init__(self, url: str, size: int = 100, timeout: float = 10.0):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Expected an http:// or https:// URL, got {url!r}")
+        self.host = parts.hostname
+        default_port = 443 if parts.scheme == "https" else 80
+        self.port = parts.port or default_port
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.host_header = self.host if self.port == default_port else f"{self.host}:{self.port}"
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.opened = 0
+        self._idle = asyncio.Queue()
+        for _ in range(size):
+            self._idle.put_nowait(None)
+
+    async def request(self, method: str, path: str, body: bytes = b"", content_type: str = "application/json",
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, bytes]:
+        conn = await self._idle.get()
+        try:
+            if conn is None:
+                conn = await asyncio.wait_for(asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout)
+                self.opened += 1
+            status, payload, keep_alive = await asyncio.wait_for(
+                self._exchange(conn, method, path, body, content_type, headers or {}), self.timeout
+            )
+            if not keep_alive:
+                conn[1].close()
+                conn = None
+            return status, payload
+        except BaseException:
+            if conn is not None:
+                conn[1].close()
+                conn = None
+            raise
+        finally:
+            self._idle.put_nowait(conn)
+
+    async def _exchange(self, conn, method, path, body, content_type, extra_headers):
+        reader, writer = conn
+        extra = "".join(f"{name}: {value}\r\n" for name, value in extra_headers.items())
+        writer.write(
+            f"{method} {self.base_path}{path} HTTP/1.1\r\nHost: {self.host_header}\r\n"
+            f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n{extra}\r\n".encode() + body
+        )
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("Server closed the connection")
+        version, status = status_line.split()[:2]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            payload = bytearray()
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if not size:
+                    await reader.readline()
+                    break
+                payload += await reader.readexactly(size)
+                await reader.readline()
+            payload = bytes(payload)
+        elif "content-length" in headers:
+            payload = await reader.readexactly(int(headers["content-length"]))
+        else:
+            payload = await reader.read()
+            headers["connection"] = "close"
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if version == b"HTTP/1.0" else connection != "close"
+        return int(status), payload, keep_alive
+
+    async def close(self):
+        while not self._idle.empty():
+            conn = self._idle.get_nowait()
+            if conn is not None:
+                conn[1].close()
+
+
+class LoadStats:
+    """Counters and latencies for the whole run and for the current reporting interval.
+
+    Run latencies are a reservoir sample of at most LATENCY_SAMPLE_SIZE, so long
+    runs stay in bounded memory; the maximum is tracked exactly.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statuses = collections.Counter()
+        self.latencies = []
+        self.recorded = 0
+        self.max_latency = 0.0
+        self._sampler = random.Random(0)
+        self.readings = 0
+        self.late = 0
+        self._reset_interval(self.started)
+
+    def _reset_interval(self, now: float):
+        self.interval_started = now
+        self.interval_counts = collections.Counter()
+        self.interval_latencies = []
+
+    def record(self, status: str, seconds: float, readings: int):
+        ok = status in ("200", "202")
+        self.statuses[status] += 1
+        self.recorded += 1
+        if len(self.latencies) < LATENCY_SAMPLE_SIZE:
+            self.latencies.append(seconds)
+        else:
+            slot = self._sampler.randrange(self.recorded)
+            if slot < LATENCY_SAMPLE_SIZE:
+                self.latencies[slot] = seconds
+        self.max_latency = max(self.max_latency, seconds)
+        self.interval_latencies.append(seconds)
+        self.interval_counts["requests"] += 1
+        if ok:
+            self.readings += readings
+            self.interval_counts["readings"] += readings
+        else:
+            self.interval_counts["errors"] += 1
+
+    def interval(self, active: int) -> Dict:
+        now = time.perf_counter()
+        elapsed, counts = now - self.interval_started, self.interval_counts
+        report = {
+            "elapsed_s": round(now - self.started, 1),
+            "collars": active,
+            "readings_per_s": round(counts["readings"] / elapsed, 1),
+            "requests_per_s": round(counts["requests"] / elapsed, 1),
+            "error_rate": round(counts["errors"] / counts["requests"], 4) if counts["requests"] else 0.0,
+            "latency_ms": percentiles(self.interval_latencies),
+        }
+        self._reset_interval(now)
+        return report
+
+    def summary(self) -> Dict:
+        elapsed = time.perf_counter() - self.started
+        requests = sum(self.statuses.values())
+        errors = requests - self.statuses["200"] - self.statuses["202"]
+        return {
+            "elapsed_s": round(elapsed, 1),
+            "requests": requests,
+            "readings": self.readings,
+            "readings_per_s": round(self.readings / elapsed, 1),
+            "requests_per_s": round(requests / elapsed, 1),
+            "error_rate": round(errors / requests, 4) if requests else 0.0,
+            "late_sends": self.late,
+            "statuses": dict(self.statuses),
+            "latency_ms": dict(percentiles(self.latencies), max=round(self.max_latency * 1000, 1)) if self.latencies else {},
+        }
+
+
+class CollarLoad:
+    """Drive `collars` simulated collars against one server.
+
+    Each collar posts `batch_size` readings every `interval` seconds (its
+    samples since the last upload), so the offered load is
+    collars * batch_size / interval readings/s once every collar has started.
+    Collars start evenly over `ramp_up` seconds and keep a fixed scenario
+    drawn from `scenario_mix`. Sends are scheduled, not paced by responses: a
+    collar that falls behind sends immediately and counts as late. Binary
+    collars register first, presenting `provisioning_key` (the server's
+    COLLAR_PROVISIONING_KEY).
+    """
+
+    def __init__(self, simulator, collars: int = 1000, interval: float = 30.0, batch_size: int = 1,
+                 ramp_up: float = 10.0, duration: float = 60.0, scenario_mix: Optional[Dict[str, float]] = None,
+                 wire_format: str = "json", pet_ids: Optional[List[int]] = None, pool_size: int = 100,
+                 timeout: float = 10.0, report_interval: float = 5.0, report=print,
+                 provisioning_key: Optional[str] = None):
+        self.simulator = simulator
+        self.collars = collars
+        self.interval = interval
+        self.batch_size = batch_size
+        self.ramp_up = ramp_up
+        self.duration = duration
+        self.scenario_mix = scenario_mix or DEFAULT_SCENARIO_MIX
+        self.wire_format = wire_format
+        self.pet_ids = pet_ids
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.report_interval = report_interval
+        self.report = report
+        self.provisioning_key = provisioning_key
+        self.stats = LoadStats()
+        self.active = 0
+
+    def readings_for(self, collar: int, pet: str, scenario: str, count: int) -> List[Dict]:
+        """`count` readings spread over the last interval, from the shared simulator"""
+        simulator = self.simulator
+        simulator.current_pet, simulator.scenario = pet, scenario
+        now = datetime.datetime.now(datetime.timezone.utc)
+        step = datetime.timedelta(seconds=self.interval / count)
+        readings = []
+        for i in range(count):
+            reading = simulator.generate_sensor_data()
+            reading["collar_id"] = f"LOAD_{collar:05d}"
+            if self.pet_ids:
+                reading["pet_id"] = self.pet_ids[collar % len(self.pet_ids)]
+            reading["timestamp"] = (now - step * (count - 1 - i)).isoformat()
+            readings.append(reading)
+        return readings
+
+    async def register(self, pool: HttpPool, reading: Dict) -> int:
+        body = json.dumps({key: reading[key] for key in ("collar_id", "pet_id", "pet_species", "pet_age", "pet_weight")})
+        headers = {"X-Provisioning-Key": self.provisioning_key} if self.provisioning_key else None
+        status, payload = await pool.request("POST", "/api/collar/register", body.encode(), headers=headers)
+        if status not in (200, 201):
+            raise RuntimeError(f"Collar registration failed with {status}: {payload[:200]!r}")
+        return json.loads(payload)["collar"]
+
+    async def run_collar(self, pool: HttpPool, collar: int, deadline: float):
+        pets = list(self.simulator.pet_profiles)
+        pet = pets[collar % len(pets)]
+        scenario = random.choices(list(self.scenario_mix), weights=list(self.scenario_mix.values()))[0]
+        await asyncio.sleep(self.ramp_up * collar / self.collars + random.uniform(0, min(self.interval, 1.0)))
+
+        handle = None
+        next_send = time.perf_counter()
+        self.active += 1
+        try:
+            while next_send < deadline:
+                readings = self.readings_for(collar, pet, scenario, self.batch_size)
+                start = time.perf_counter()
+                try:
+                    if self.wire_format == "binary":
+                        if handle is None:
+                            handle = await self.register(pool, readings[0])
+                        body, content_type = collar_wire.encode(handle, readings), collar_wire.CONTENT_TYPE
+                    elif self.batch_size == 1:
+                        body, content_type = json.dumps(readings[0]).encode(), "application/json"
+                    else:
+                        body, content_type = json.dumps(readings).encode(), "application/json"
+                    code, _ = await pool.request("POST", "/api/collar/data", body, content_type)
+                    status = str(code)
+                except (OSError, EOFError, asyncio.TimeoutError, RuntimeError, ValueError) as e:
+                    status = type(e).__name__
+                self.stats.record(status, time.perf_counter() - start, len(readings))
+
+                next_send += self.interval
+                now = time.perf_counter()
+                if next_send < now:
+                    self.stats.late += 1
+                    next_send = now
+                await asyncio.sleep(next_send - now)
+        finally:
+            self.active -= 1
+
+    async def reporter(self, done: asyncio.Event):
+        while not done.is_set():
+            try:
+                await asyncio.wait_for(done.wait(), self.report_interval)
+            except asyncio.TimeoutError:
+                self.report(self.stats.interval(self.active))
+
+    async def run(self, url: str) -> Dict:
+        pool = HttpPool(url, self.pool_size, self.timeout)
+        self.stats = LoadStats()
+        deadline = time.perf_counter() + self.duration
+        done = asyncio.Event()
+        reporter = asyncio.create_task(self.reporter(done))
+        try:
+            await asyncio.gather(*[self.run_collar(pool, collar, deadline) for collar in range(self.collars)])
+        finally:
+            done.set()
+            await reporter
+            await pool.close()
+        summary = self.stats.summary()
+        summary["connections_opened"] = pool.opened
+        return summary
@@ -0,0 +1,94 @@
+"""
+HausPet Collar Wire Format
+Compact binary batches for collars on cellular links: a 14-byte header
+(collar handle from /api/collar/register, base time, record count) followed
+by fixed-width 8-byte records, or 16 bytes with a GPS fix. Static pet details
+are registered once per collar instead of riding on every reading.
+Shared by the server and the ESP32 simulator.
+"""
+
+import time
+import struct
+import datetime
+from typing import Dict, Iterator, List, Tuple
+
+CONTENT_TYPE = "application/vnd.hauspet.collar"
+
+MAGIC = b"HP"
+VERSION = 1
+FLAG_GPS = 0x01
+
+# magic, version, flags, collar handle, base time (unix seconds), record count
+HEADER = struct.Struct("<2sBBIIH")
+# seconds after base time, heart rate (bpm), temperature (0.1 °F), spo2 (%), activity (0.1), battery (%)
+RECORD = struct.Struct("<HBHBBB")
+# ... followed by latitude and longitude in 1e-7 degrees
+GPS_RECORD = struct.Struct("<HBHBBBii")
+
+MISSING_U8 = 0xFF
+MISSING_U16 = 0xFFFF
+MAX_OFFSET = 0xFFFF
+
+
+def _epoch_seconds(value) -> float:
+    if value is None:
+        return time.time()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    # Naive timestamps are UTC, as ingest.parse_timestamp reads them
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
+
+
+def _u8(value, scale=1) -> int:
+    return MISSING_U8 if value is None else max(0, min(MISSING_U8 - 1, round(value * scale)))
+
+
+def _u16(value, scale=1) -> int:
+    return MISSING_U16 if value is None else max(0, min(MISSING_U16 - 1, round(value * scale)))
+
+
+def encode(collar: int, readings: List[Dict], gps: bool = False) -> bytes:
+    """Pack readings (simulator-style dicts) for one registered collar into a batch"""
+    if not readings:
+        raise ValueError("No readings to encode")
+    times = [int(_epoch_seconds(r.get("timestamp"))) for r in readings]
+    base_time = min(times)
+    if max(times) - base_time > MAX_OFFSET:
+        raise ValueError("A batch can span at most 18 hours")
+    record = GPS_RECORD if gps else RECORD
+    out = bytearray(HEADER.size + record.size * len(readings))
+    HEADER.pack_into(out, 0, MAGIC, VERSION, FLAG_GPS if gps else 0, collar, base_time, len(readings))
+    offset = HEADER.size
+    for ts, r in zip(times, readings):
+        fields = [ts - base_time, _u8(r.get("heart_rate")), _u16(r.get("temperature"), 10),
+                  _u8(r.get("spo2")), _u8(r.get("activity_level"), 10), _u8(r.get("battery_level"))]
+        if gps:
+            # A reading without a fix goes out as 0,0, the collar convention for "no fix"
+            lat, lng = r.get("gps_lat"), r.get("gps_lng")
+            fields += [0, 0] if lat is None or lng is None else [round(lat * 1e7), round(lng * 1e7)]
+        record.pack_into(out, offset, *fields)
+        offset += record.size
+    return bytes(out)
+
+
+def decode(body) -> Tuple[int, int, int, int, Iterator[tuple]]:
+    """Split a batch into (collar, base_time, flags, count, records) without copying the payload.
+
+    Records are raw struct tuples; see RECORD / GPS_RECORD for the fields and
+    MISSING_U8 / MISSING_U16 for absent values.
+    """
+    view = memoryview(body)
+    if len(view) < HEADER.size:
+        raise ValueError("Truncated header")
+    magic, version, flags, collar, base_time, count = HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a version {VERSION} collar batch")
+    record = GPS_RECORD if flags & FLAG_GPS else RECORD
+    payload = view[HEADER.size:]
+    if len(payload) != count * record.size:
+        raise ValueError(f"Expected {count} records of {record.size} bytes, got {len(payload)} bytes")
+    return collar, base_time, flags, count, record.iter_unpack(payload)
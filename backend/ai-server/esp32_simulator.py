@@ -4,22 +4,33 @@ Simulates real collar sensor data for testing the AI server
 Created by Maryan - Full Stack Developer
 """
 
+import os
 import requests
 import json
 import time
 import random
+import asyncio
+import argparse
 import datetime
 from typing import Dict
 
+import collar_wire
+from collar_load import DEFAULT_SCENARIO_MIX, CollarLoad, parse_scenario_mix
+
 class ESP32Simulator:
     """Simulates ESP32 collar sending sensor data"""
     
-    def __init__(self, server_url: str = "http://localhost:5000"):
+    def __init__(self, server_url: str = "http://localhost:5000", wire_format: str = "json",
+                 provisioning_key: str = None):
         self.server_url = server_url
+        self.wire_format = wire_format  # json, or binary (collar_wire batches after a one-off registration)
+        # Registration needs the server's COLLAR_PROVISIONING_KEY
+        self.provisioning_key = provisioning_key or os.getenv("COLLAR_PROVISIONING_KEY")
+        self.collar_handles = {}
         self.collar_id = "COLLAR_001"
         self.pet_profiles = {
             "oscar": {
-                "pet_id": "oscar_001",
+                "pet_id": 1,
                 "species": "dog",
                 "age": 3,
                 "weight": 65,
@@ -31,7 +42,7 @@ class ESP32Simulator:
                 }
             },
             "luna": {
-                "pet_id": "luna_001", 
+                "pet_id": 2,
                 "species": "cat",
                 "age": 2,
                 "weight": 12,
@@ -94,7 +105,7 @@ class ESP32Simulator:
             "pet_species": pet["species"],
             "pet_age": pet["age"],
             "pet_weight": pet["weight"],
-            "timestamp": datetime.datetime.now().isoformat(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
             "heart_rate": int(heart_rate),
             "temperature": round(temperature, 1),
             "spo2": int(spo2),
@@ -104,22 +115,51 @@ class ESP32Simulator:
             "battery_level": random.randint(20, 100)
         }
     
+    def register_collar(self) -> int:
+        """Register the current pet's static details once and return the collar handle"""
+        if self.current_pet not in self.collar_handles:
+            pet = self.pet_profiles[self.current_pet]
+            response = requests.post(
+                f"{self.server_url}/api/collar/register",
+                json={
+                    "collar_id": self.collar_id,
+                    "pet_id": pet["pet_id"],
+                    "pet_species": pet["species"],
+                    "pet_age": pet["age"],
+                    "pet_weight": pet["weight"]
+                },
+                headers={"X-Provisioning-Key": self.provisioning_key} if self.provisioning_key else None,
+                timeout=10
+            )
+            response.raise_for_status()
+            self.collar_handles[self.current_pet] = response.json()["collar"]
+        return self.collar_handles[self.current_pet]
+
+    def encode_binary(self, readings) -> bytes:
+        """Readings as a binary collar batch; only the signal, no static pet details"""
+        return collar_wire.encode(self.register_collar(), readings, gps=True)
+
     def send_data_to_server(self, data: Dict) -> bool:
         """Send sensor data to AI server"""
         try:
+            if self.wire_format == "binary":
+                body, content_type = self.encode_binary([data]), collar_wire.CONTENT_TYPE
+            else:
+                body, content_type = json.dumps(data), "application/json"
             response = requests.post(
                 f"{self.server_url}/api/collar/data",
-                json=data,
-                headers={"Content-Type": "application/json"},
+                data=body,
+                headers={"Content-Type": content_type},
                 timeout=10
             )
             
-            if response.status_code == 200:
+            if response.status_code in (200, 202):
                 result = response.json()
                 print(f"✅ Data sent successfully for {data['pet_id']}")
-                print(f"🏥 Health Score: {result['analysis']['health_score']}/100")
-                print(f"⚠️  Severity: {result['analysis']['severity']}")
-                print(f"🤖 AI Analysis: {result['analysis']['ai_analysis']}")
+                if 'analysis' in result:
+                    print(f"🏥 Health Score: {result['analysis']['health_score']}/100")
+                    print(f"⚠️  Severity: {result['analysis']['severity']}")
+                    print(f"🤖 AI Analysis: {result['analysis']['ai_analysis']}")
                 print("-" * 60)
                 return True
             else:
@@ -174,6 +214,45 @@ class ESP32Simulator:
                 self.send_data_to_server(sensor_data)
                 time.sleep(5)
 
+    def run_load(self, **options) -> Dict:
+        """Headless load mode: many collars at once (see CollarLoad for the options)"""
+        options.setdefault("wire_format", self.wire_format)
+        options.setdefault("provisioning_key", self.provisioning_key)
+        return asyncio.run(CollarLoad(self, **options).run(self.server_url))
+
+def cli(argv=None):
+    """Interactive menu by default; --load runs the headless load generator, e.g. --load --collars 5000 --interval 10"""
+    parser = argparse.ArgumentParser(description="ESP32 collar simulator; --load runs many collars headless")
+    parser.add_argument('--load', action='store_true', help='run the multi-collar load generator instead of the menu')
+    parser.add_argument('--url', default="http://localhost:5000")
+    parser.add_argument('--collars', type=int, default=1000)
+    parser.add_argument('--interval', type=float, default=30.0, help='seconds between uploads per collar')
+    parser.add_argument('--batch-size', type=int, default=1, help='readings per upload')
+    parser.add_argument('--ramp-up', type=float, default=10.0, help='seconds over which collars come online')
+    parser.add_argument('--duration', type=float, default=60.0)
+    parser.add_argument('--scenarios', type=parse_scenario_mix,
+                        default=",".join(f"{name}={weight}" for name, weight in DEFAULT_SCENARIO_MIX.items()),
+                        help='scenario weights, e.g. normal=70,excited=10,sick=10,sleeping=10')
+    parser.add_argument('--wire-format', choices=['json', 'binary'], default='json')
+    parser.add_argument('--pet-ids', type=lambda v: [int(p) for p in v.split(',')], default=None,
+                        help='existing pet ids to spread collars over (default: the simulator profiles)')
+    parser.add_argument('--pool-size', type=int, default=100, help='concurrent HTTP connections')
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--report-interval', type=float, default=5.0)
+    args = parser.parse_args(argv)
+    if not args.load:
+        return main()
+
+    simulator = ESP32Simulator(args.url, args.wire_format)
+    summary = simulator.run_load(
+        collars=args.collars, interval=args.interval, batch_size=args.batch_size, ramp_up=args.ramp_up,
+        duration=args.duration, scenario_mix=args.scenarios, pet_ids=args.pet_ids, pool_size=args.pool_size,
+        timeout=args.timeout, report_interval=args.report_interval,
+        report=lambda stats: print(json.dumps(stats))
+    )
+    print(json.dumps(summary, indent=2))
+    return summary
+
 def main():
     """Main function to run ESP32 simulation"""
     print("🔌 ESP32 Smart Collar Simulator")
@@ -206,8 +285,9 @@ def main():
         print("3. Switch pet (Oscar/Luna)")
         print("4. Custom scenario")
         print("5. Exit")
+        print(f"6. Switch wire format (now: {simulator.wire_format})")
         
-        choice = input("\nEnter your choice (1-5): ").strip()
+        choice = input("\nEnter your choice (1-6): ").strip()
         
         if choice == "1":
             simulator.run_simulation(duration_minutes=5, interval_seconds=30)
@@ -241,8 +321,12 @@ def main():
             print("👋 Goodbye!")
             break
         
+        elif choice == "6":
+            simulator.wire_format = "binary" if simulator.wire_format == "json" else "json"
+            print(f"📦 Wire format: {simulator.wire_format}")
+        
         else:
             print("❌ Invalid choice")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    cli()
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""
+HausPet AI Server - Conditional GET Cache
+Strong ETags for per-user read endpoints, derived from the user's data
+version (bumped on every write to the user or their pets), plus a small
+per-process LRU of the serialized responses for the current version.
+"""
+
+import hashlib
+import threading
+import collections
+from typing import Optional
+
+
+def resource_etag(resource: str, user_id: int, version: int) -> str:
+    """The same on every worker for a given version, so any of them can answer 304"""
+    return hashlib.sha256(f"{resource}:{user_id}:{version}".encode()).hexdigest()[:20]
+
+
+class VersionedResponseCache:
+    """LRU of (resource, user id) -> (version, body); an entry is only served for the version it was built at"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, resource: str, user_id: int, version: int) -> Optional[bytes]:
+        key = (resource, user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, resource: str, user_id: int, version: int, body: bytes):
+        if self.max_entries <= 0:
+            return
+        key = (resource, user_id)
+        with self._lock:
+            self._entries[key] = (version, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "not_modified": self.not_modified}
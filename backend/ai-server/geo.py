@@ -0,0 +1,116 @@
+"""
+HausPet AI Server - Geo Helpers
+Geohash encoding and bounding-box cover for the location track index,
+bounding-box parsing, and Douglas-Peucker simplification of tracks.
+"""
+
+import math
+from typing import List, Optional, Sequence, Tuple
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9  # ~5 m cells
+EARTH_RADIUS_M = 6371008.8
+
+BBox = Tuple[float, float, float, float]  # min_lat, min_lng, max_lat, max_lng
+
+
+def valid_fix(lat: Optional[float], lng: Optional[float]) -> bool:
+    """A usable GPS fix; collars report 0,0 when they have none"""
+    return (lat is not None and lng is not None and -90 <= lat <= 90 and -180 <= lng <= 180
+            and (lat, lng) != (0, 0))
+
+
+def geohash(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, lng) if even else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= mid:
+            value |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def _cell_size(precision: int) -> Tuple[float, float]:
+    """(height, width) in degrees of a geohash cell"""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def covering_prefixes(bbox: BBox, max_cells: int = 16) -> List[str]:
+    """The finest set of at most `max_cells` geohash prefixes whose cells cover `bbox`"""
+    min_lat, min_lng, max_lat, max_lng = bbox
+    best = [""]
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        height, width = _cell_size(precision)
+        rows = range(int((min_lat + 90) // height), int(min(max_lat + 90, 179.999999) // height) + 1)
+        cols = range(int((min_lng + 180) // width), int(min(max_lng + 180, 359.999999) // width) + 1)
+        if len(rows) * len(cols) > max_cells:
+            break
+        best = [
+            geohash(-90 + (row + 0.5) * height, -180 + (col + 0.5) * width, precision)
+            for row in rows for col in cols
+        ]
+    return best
+
+
+def parse_bbox(value: Optional[str]) -> Optional[BBox]:
+    """'min_lat,min_lng,max_lat,max_lng' -> tuple; raises ValueError on bad input"""
+    if not value:
+        return None
+    parts = [float(part) for part in value.split(",")]
+    if len(parts) != 4:
+        raise ValueError("'bbox' must be min_lat,min_lng,max_lat,max_lng")
+    min_lat, min_lng, max_lat, max_lng = parts
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lng <= max_lng <= 180):
+        raise ValueError("'bbox' is out of range or inverted")
+    return min_lat, min_lng, max_lat, max_lng
+
+
+def simplify(points: Sequence[Tuple[float, float]], tolerance_m: float) -> List[int]:
+    """Indices of the points Douglas-Peucker keeps at `tolerance_m` metres.
+
+    Points are (lat, lng); distances use an equirectangular projection around
+    the track, which is accurate enough for the few kilometres a pet covers.
+    """
+    count = len(points)
+    if count < 3 or tolerance_m <= 0:
+        return list(range(count))
+    lat0 = math.radians(sum(lat for lat, _ in points) / count)
+    kx, ky = EARTH_RADIUS_M * math.cos(lat0) * math.pi / 180, EARTH_RADIUS_M * math.pi / 180
+    xs = [lng * kx for _, lng in points]
+    ys = [lat * ky for lat, _ in points]
+
+    keep = [False] * count
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    tolerance_sq = tolerance_m * tolerance_m
+    while stack:
+        first, last = stack.pop()
+        ax, ay = xs[first], ys[first]
+        dx, dy = xs[last] - ax, ys[last] - ay
+        length_sq = dx * dx + dy * dy
+        farthest, max_sq = None, tolerance_sq
+        for i in range(first + 1, last):
+            px, py = xs[i] - ax, ys[i] - ay
+            if length_sq:
+                t = max(0.0, min(1.0, (px * dx + py * dy) / length_sq))
+                px, py = px - t * dx, py - t * dy
+            distance_sq = px * px + py * py
+            if distance_sq > max_sq:
+                farthest, max_sq = i, distance_sq
+        if farthest is not None:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return [i for i in range(count) if keep[i]]
@@ -0,0 +1,265 @@
+"""
+HausPet AI Server - Geofence Engine
+Checks each GPS fix against its pet's circle and polygon geofences. A
+hierarchical grid index means a fix only tests the fences whose boxes cover
+it, whatever the total number of fences. Boundary crossings become enter/exit
+transitions, debounced by consecutive fixes and an exit margin so GPS jitter
+at the edge doesn't flap. The index is per process; each pet's fence state
+is passed in, so it can live in a table every worker shares.
+"""
+
+import math
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from geo import EARTH_RADIUS_M, valid_fix
+
+CIRCLE, POLYGON = "circle", "polygon"
+
+# Grid cell sizes in degrees, finest first. Each fence is indexed at the finest
+# level where its bounding box spans at most MAX_CELLS_PER_FENCE cells, so a
+# lookup is one dict probe per level.
+CELL_SIZES = (0.001, 0.01, 0.1, 1.0, 10.0, 180.0)
+MAX_CELLS_PER_FENCE = 16
+
+MAX_RADIUS_M = 100000
+MAX_POLYGON_POINTS = 500
+
+
+def parse_fence(data: Dict) -> Dict:
+    """Validate a geofence definition from a request body into model columns; raises ValueError"""
+    kind = data.get("type")
+    name = str(data.get("name") or "").strip()[:100] or "Geofence"
+    if kind == CIRCLE:
+        center = data.get("center") or {}
+        try:
+            lat, lng, radius = float(center["lat"]), float(center["lng"]), float(data["radius_m"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("a circle needs numeric 'center': {lat, lng} and 'radius_m'")
+        if not valid_fix(lat, lng):
+            raise ValueError("'center' must be a valid lat/lng")
+        if not 0 < radius <= MAX_RADIUS_M:
+            raise ValueError(f"'radius_m' must be between 0 and {MAX_RADIUS_M}")
+        return {"name": name, "kind": CIRCLE, "center_lat": lat, "center_lng": lng, "radius_m": radius, "polygon": None}
+    if kind == POLYGON:
+        try:
+            points = [(float(lat), float(lng)) for lat, lng in data.get("points") or []]
+        except (TypeError, ValueError):
+            raise ValueError("'points' must be a list of [lat, lng] pairs")
+        if not 3 <= len(points) <= MAX_POLYGON_POINTS:
+            raise ValueError(f"'points' must have between 3 and {MAX_POLYGON_POINTS} [lat, lng] pairs")
+        if not all(valid_fix(lat, lng) for lat, lng in points):
+            raise ValueError("'points' must be valid lat/lng pairs")
+        lat = sum(p[0] for p in points) / len(points)
+        lng = sum(p[1] for p in points) / len(points)
+        return {"name": name, "kind": POLYGON, "center_lat": lat, "center_lng": lng, "radius_m": None, "polygon": points}
+    raise ValueError("'type' must be 'circle' or 'polygon'")
+
+
+class Fence:
+    """A circle or polygon, projected to local metres around its centre for distance tests"""
+
+    __slots__ = ("id", "pet_id", "name", "kind", "lat", "lng", "radius_m", "points", "version", "bbox",
+                 "_kx", "_xs", "_ys")
+
+    def __init__(self, id: int, pet_id: int, name: str, kind: str, lat: float, lng: float,
+                 radius_m: Optional[float] = None, points: Optional[Sequence[Tuple[float, float]]] = None,
+                 version=None):
+        self.id = id
+        self.pet_id = pet_id
+        self.name = name
+        self.kind = kind
+        self.lat = lat
+        self.lng = lng
+        self.radius_m = radius_m
+        self.points = [tuple(p) for p in points] if points else None
+        self.version = version
+        self._kx = EARTH_RADIUS_M * math.pi / 180 * math.cos(math.radians(lat))
+        if kind == CIRCLE:
+            dlat = radius_m / (EARTH_RADIUS_M * math.pi / 180)
+            dlng = radius_m / max(self._kx, 1.0)
+            self.bbox = (lat - dlat, lng - dlng, lat + dlat, lng + dlng)
+            self._xs = self._ys = None
+        else:
+            self._xs = [(p_lng - lng) * self._kx for _, p_lng in self.points]
+            self._ys = [(p_lat - lat) * EARTH_RADIUS_M * math.pi / 180 for p_lat, _ in self.points]
+            lats = [p[0] for p in self.points]
+            lngs = [p[1] for p in self.points]
+            self.bbox = (min(lats), min(lngs), max(lats), max(lngs))
+
+    def signed_distance(self, lat: float, lng: float) -> float:
+        """Metres from the boundary: negative inside, positive outside"""
+        x = (lng - self.lng) * self._kx
+        y = (lat - self.lat) * EARTH_RADIUS_M * math.pi / 180
+        if self.kind == CIRCLE:
+            return math.hypot(x, y) - self.radius_m
+
+        xs, ys = self._xs, self._ys
+        inside = False
+        nearest_sq = float("inf")
+        j = len(xs) - 1
+        for i in range(len(xs)):
+            xi, yi, xj, yj = xs[i], ys[i], xs[j], ys[j]
+            if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+                inside = not inside
+            dx, dy = xj - xi, yj - yi
+            length_sq = dx * dx + dy * dy
+            t = max(0.0, min(1.0, ((x - xi) * dx + (y - yi) * dy) / length_sq)) if length_sq else 0.0
+            ex, ey = x - xi - t * dx, y - yi - t * dy
+            nearest_sq = min(nearest_sq, ex * ex + ey * ey)
+            j = i
+        distance = math.sqrt(nearest_sq)
+        return -distance if inside else distance
+
+
+class PetFences:
+    """Which of a pet's fences it is inside, crossings awaiting confirmation, and the fences it has
+    state for at all (a fence missing from `seen` is new to the pet)"""
+
+    __slots__ = ("inside", "pending", "seen")
+
+    def __init__(self, inside=(), pending=None, seen=()):
+        self.inside = set(inside)
+        self.pending: Dict[int, int] = dict(pending or {})
+        self.seen = set(seen) | self.inside
+
+
+class GeofenceEngine:
+    """Per-process fence index that folds fixes into a pet's PetFences.
+
+    A crossing is reported once it holds for `confirm_readings` consecutive
+    fixes. Leaving also needs the fix to be more than `exit_margin_m` outside.
+    The first fix after a fence is added sets the pet's state for it without
+    a transition.
+    """
+
+    def __init__(self, exit_margin_m: float = 15.0, confirm_readings: int = 2):
+        self.exit_margin_m = exit_margin_m
+        self.confirm_readings = max(1, confirm_readings)
+        self._fences: Dict[int, Fence] = {}
+        self._cells: Dict[Tuple, Dict[int, Fence]] = {}
+        self._keys: Dict[int, List[Tuple]] = {}
+        self._by_pet: Dict[int, set] = {}
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.tested = 0
+        self.transitions = 0
+
+    # --- Index ---
+    @staticmethod
+    def _cell_keys(fence: Fence) -> List[Tuple]:
+        min_lat, min_lng, max_lat, max_lng = fence.bbox
+        for level, size in enumerate(CELL_SIZES):
+            rows = range(math.floor(min_lat / size), math.floor(max_lat / size) + 1)
+            cols = range(math.floor(min_lng / size), math.floor(max_lng / size) + 1)
+            if len(rows) * len(cols) <= MAX_CELLS_PER_FENCE or level == len(CELL_SIZES) - 1:
+                return [(level, fence.pet_id, row, col) for row in rows for col in cols]
+
+    def has_fences(self, pet_id: int) -> bool:
+        return pet_id in self._by_pet
+
+    def version(self, fence_id: int):
+        fence = self._fences.get(fence_id)
+        return fence.version if fence else None
+
+    def upsert(self, fence: Fence):
+        with self._lock:
+            self._remove(fence.id)
+            self._fences[fence.id] = fence
+            self._by_pet.setdefault(fence.pet_id, set()).add(fence.id)
+            keys = self._keys[fence.id] = self._cell_keys(fence)
+            for key in keys:
+                self._cells.setdefault(key, {})[fence.id] = fence
+
+    def remove(self, fence_id: int):
+        with self._lock:
+            self._remove(fence_id)
+
+    def _remove(self, fence_id: int):
+        fence = self._fences.pop(fence_id, None)
+        if fence is None:
+            return
+        fences = self._by_pet[fence.pet_id]
+        fences.discard(fence_id)
+        if not fences:
+            del self._by_pet[fence.pet_id]
+        for key in self._keys.pop(fence_id):
+            cell = self._cells[key]
+            cell.pop(fence_id, None)
+            if not cell:
+                del self._cells[key]
+
+    def candidates(self, pet_id: int, lat: float, lng: float) -> Dict[int, Fence]:
+        """The pet's fences whose bounding boxes may contain the fix"""
+        found = {}
+        for level, size in enumerate(CELL_SIZES):
+            cell = self._cells.get((level, pet_id, math.floor(lat / size), math.floor(lng / size)))
+            if cell:
+                found.update(cell)
+        return found
+
+    # --- Evaluation ---
+    def check(self, pet_id: int, lat: float, lng: float, state: PetFences, timestamp=None) -> List[Dict]:
+        """Fold one fix into `state`, returning any confirmed enter/exit transitions"""
+        with self._lock:
+            return self._check(pet_id, lat, lng, state, timestamp)
+
+    def _check(self, pet_id, lat, lng, state, timestamp) -> List[Dict]:
+        active = self._by_pet.get(pet_id)
+        # Forget fences that have been removed since the state was stored
+        state.inside &= active or set()
+        state.seen &= active or set()
+        for fid in [fid for fid in state.pending if fid not in state.seen]:
+            del state.pending[fid]
+        if not active:
+            return []
+        self.checked += 1
+        fences = self.candidates(pet_id, lat, lng)
+        # Fences the pet is in (or crossing) may be left even if this fix is outside their boxes
+        for fid in state.inside | state.pending.keys():
+            if fid not in fences:
+                fences[fid] = self._fences[fid]
+        self.tested += len(fences)
+
+        transitions = []
+        for fid in active - state.seen:
+            state.seen.add(fid)
+            if fid in fences and fences.pop(fid).signed_distance(lat, lng) <= 0:
+                state.inside.add(fid)
+        for fid, fence in fences.items():
+            distance = fence.signed_distance(lat, lng)
+            inside = fid in state.inside
+            if (distance <= self.exit_margin_m) if inside else (distance > 0):
+                state.pending.pop(fid, None)
+                continue
+            count = state.pending.get(fid, 0) + 1
+            if count < self.confirm_readings:
+                state.pending[fid] = count
+                continue
+            state.pending.pop(fid, None)
+            if inside:
+                state.inside.discard(fid)
+            else:
+                state.inside.add(fid)
+            self.transitions += 1
+            transitions.append({
+                "event": "exit" if inside else "enter",
+                "pet_id": pet_id,
+                "fence_id": fid,
+                "fence_name": fence.name,
+                "lat": lat,
+                "lng": lng,
+                "distance_m": round(distance, 1),
+                "timestamp": timestamp,
+            })
+        return transitions
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "fences": len(self._fences),
+                "pets": len(self._by_pet),
+                "checked": self.checked,
+                "fences_tested": self.tested,
+                "transitions": self.transitions,
+            }
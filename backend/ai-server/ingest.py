@@ -0,0 +1,195 @@
+"""
+HausPet AI Server - Collar Ingestion
+Parses batches of collar readings (JSON object, JSON array, NDJSON or the
+binary collar wire format) into rows ready for a single bulk insert into
+sensor_data. Rows also carry the reading's GPS fix and battery level
+(None when absent) for the location tables.
+"""
+
+import json
+import math
+import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import collar_wire
+from geo import valid_fix
+
+JSON_CONTENT_TYPES = ("application/json",)
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+BINARY_CONTENT_TYPES = (collar_wire.CONTENT_TYPE,)
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def finite_float(value) -> float:
+    """float(value), refusing NaN and infinities (which Python's json accepts)"""
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value!r} is not a finite number")
+    return number
+
+
+# Columns copied from a reading into a sensor_data row
+READING_FIELDS = {
+    "heart_rate": int,
+    "temperature": finite_float,
+    "spo2": int,
+    "activity_level": finite_float,
+}
+
+
+class IngestError(ValueError):
+    """Raised when a request body cannot be parsed as collar readings"""
+
+
+Window = Tuple[datetime.datetime, datetime.datetime]
+
+
+def reading_window(now: datetime.datetime, max_age_hours: float, clock_skew_seconds: float) -> Window:
+    """Oldest and newest timestamps accepted from a collar; anything else is a bad clock"""
+    return now - datetime.timedelta(hours=max_age_hours), now + datetime.timedelta(seconds=clock_skew_seconds)
+
+
+def parse_timestamp(value) -> Optional[datetime.datetime]:
+    """Parse an ISO-8601 timestamp into a naive UTC datetime; timestamps without an offset are UTC"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.datetime.utcfromtimestamp(value)
+    ts = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def mimetype_of(content_type: str) -> str:
+    return (content_type or "").split(";")[0].strip().lower()
+
+
+def parse_body(body: bytes, content_type: str, max_batch: int) -> List[Dict]:
+    """Decode a request body into a list of raw reading dicts"""
+    mimetype = mimetype_of(content_type)
+    if mimetype and mimetype not in JSON_CONTENT_TYPES + NDJSON_CONTENT_TYPES:
+        raise IngestError(f"Unsupported Content-Type: {mimetype}")
+    try:
+        if mimetype in NDJSON_CONTENT_TYPES:
+            readings = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            payload = json.loads(body or b"null")
+            readings = payload if isinstance(payload, list) else [payload]
+    except (ValueError, UnicodeDecodeError) as e:
+        raise IngestError(f"Malformed body: {e}")
+
+    if not readings or readings == [None]:
+        raise IngestError("No readings in request body")
+    if len(readings) > max_batch:
+        raise IngestError(f"Batch too large: {len(readings)} readings (max {max_batch})")
+    return readings
+
+
+def normalize_reading(raw, now: datetime.datetime, window: Optional[Window] = None) -> Optional[Dict]:
+    """Turn one raw reading into a sensor_data row, or None if it is unusable or outside `window`"""
+    if not isinstance(raw, dict):
+        return None
+    try:
+        row = {
+            "pet_id": int(raw["pet_id"]),
+            "timestamp": parse_timestamp(raw.get("timestamp")) or now,
+        }
+        for field, cast in READING_FIELDS.items():
+            value = raw.get(field)
+            row[field] = cast(value) if value is not None else None
+    except (KeyError, TypeError, ValueError, OverflowError, OSError):
+        # OverflowError / OSError: out-of-range numbers such as 1e400 or a timestamp of 1e20
+        return None
+    if window and not window[0] <= row["timestamp"] <= window[1]:
+        return None
+    # A bad fix or battery level is dropped on its own, never the vitals
+    try:
+        lat, lng = raw.get("gps_lat"), raw.get("gps_lng")
+        fix = valid_fix(lat, lng) and (float(lat), float(lng))
+    except (TypeError, ValueError):
+        fix = None
+    row["gps_lat"], row["gps_lng"] = fix or (None, None)
+    try:
+        battery = raw.get("battery_level")
+        row["battery_level"] = int(battery) if battery is not None else None
+    except (TypeError, ValueError, OverflowError):
+        row["battery_level"] = None
+    return row
+
+
+def normalize_batch(readings: List, now: Optional[datetime.datetime] = None,
+                    window: Optional[Window] = None) -> Tuple[List[Dict], int]:
+    """Normalize a batch, returning (rows, rejected_count)"""
+    now = now or datetime.datetime.utcnow()
+    rows = []
+    for raw in readings:
+        row = normalize_reading(raw, now, window)
+        if row is not None:
+            rows.append(row)
+    return rows, len(readings) - len(rows)
+
+
+def decode_binary(body: bytes, max_batch: int, resolve_collar: Callable[[int], Optional[int]],
+                  window: Optional[Window] = None) -> Tuple[List[Dict], int]:
+    """Decode a binary collar batch straight into sensor_data rows, returning (rows, rejected_count).
+
+    `resolve_collar` maps the registered collar handle to its pet id (None if unknown).
+    Readings outside `window` are rejected.
+    """
+    rows = _decode_binary(body, max_batch, resolve_collar)
+    if window is None:
+        return rows, 0
+    kept = [row for row in rows if window[0] <= row["timestamp"] <= window[1]]
+    return kept, len(rows) - len(kept)
+
+
+def _decode_binary(body, max_batch, resolve_collar) -> List[Dict]:
+    try:
+        collar, base_time, flags, count, records = collar_wire.decode(body)
+    except (ValueError, TypeError) as e:
+        raise IngestError(f"Malformed body: {e}")
+    if not count:
+        raise IngestError("No readings in request body")
+    if count > max_batch:
+        raise IngestError(f"Batch too large: {count} readings (max {max_batch})")
+    pet_id = resolve_collar(collar)
+    if pet_id is None:
+        raise IngestError(f"Unknown collar {collar}; register it with /api/collar/register")
+
+    base = EPOCH + datetime.timedelta(seconds=base_time)
+    missing_u8, missing_u16 = collar_wire.MISSING_U8, collar_wire.MISSING_U16
+    if not flags & collar_wire.FLAG_GPS:
+        return [
+            {
+                "pet_id": pet_id,
+                "timestamp": base + datetime.timedelta(seconds=offset),
+                "heart_rate": None if heart_rate == missing_u8 else heart_rate,
+                "temperature": None if temperature == missing_u16 else temperature / 10,
+                "spo2": None if spo2 == missing_u8 else spo2,
+                "activity_level": None if activity == missing_u8 else activity / 10,
+                "gps_lat": None,
+                "gps_lng": None,
+                "battery_level": None if battery == missing_u8 else battery,
+            }
+            for offset, heart_rate, temperature, spo2, activity, battery in records
+        ]
+    rows = []
+    for offset, heart_rate, temperature, spo2, activity, battery, lat, lng in records:
+        # int32 / 1e7 reaches ±214°; out-of-range fixes and the collars' 0,0 "no fix" are dropped
+        # on their own, as on the JSON path
+        lat, lng = lat / 1e7, lng / 1e7
+        fix = valid_fix(lat, lng)
+        rows.append({
+            "pet_id": pet_id,
+            "timestamp": base + datetime.timedelta(seconds=offset),
+            "heart_rate": None if heart_rate == missing_u8 else heart_rate,
+            "temperature": None if temperature == missing_u16 else temperature / 10,
+            "spo2": None if spo2 == missing_u8 else spo2,
+            "activity_level": None if activity == missing_u8 else activity / 10,
+            "gps_lat": lat if fix else None,
+            "gps_lng": lng if fix else None,
+            "battery_level": None if battery == missing_u8 else battery,
+        })
+    return rows
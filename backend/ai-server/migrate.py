@@ -1,6 +1,111 @@
-from app import app, db
+import argparse
+import datetime
+from sqlalchemy import inspect, text
+from app import app, db, sensor_partitions, merge_sensor_rollups, SensorRollup
+from partitions import PARTITION_LOCK, add_months, is_postgres, months_between
+from rollups import aggregate_readings
+from vitals import VITAL_COLUMNS
 
-with app.app_context():
-    print("Creating all database tables...")
-    db.create_all()
-    print("Database tables created.")
+
+# Columns and indexes added to tables that already existed; create_all only makes missing tables
+UPGRADE_COLUMNS = [
+    ('users', 'firstName', 'VARCHAR(80)'),
+    ('users', 'lastName', 'VARCHAR(80)'),
+    ('users', 'data_version', 'INTEGER NOT NULL DEFAULT 0'),
+    ('pets', 'breed', 'VARCHAR(100)'),
+]
+UPGRADE_INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email_lower ON users (lower(email))",
+    "CREATE INDEX IF NOT EXISTS ix_pets_user_id ON pets (user_id)",
+]
+
+
+def upgrade_tables(conn):
+    """Add columns and indexes introduced since the tables were created; safe to run every deploy"""
+    inspector = inspect(conn)
+    for table, column, ddl in UPGRADE_COLUMNS:
+        if column not in {c['name'] for c in inspector.get_columns(table)}:
+            conn.execute(text(f'ALTER TABLE {table} ADD COLUMN "{column}" {ddl}'))
+            print(f"Added {table}.{column}")
+    for ddl in UPGRADE_INDEXES:
+        conn.execute(text(ddl))
+
+
+def create_tables():
+    with app.app_context():
+        print("Creating all database tables...")
+        db.create_all()
+        upgrade_tables(db.session.connection())
+        if sensor_partitions.convert(db.session.connection(), app.config['SENSOR_PARTITIONS_AHEAD']):
+            print("Converted sensor_data to monthly partitions.")
+        db.session.commit()
+        print("Database tables created.")
+
+
+def rebuild_rollups(month, name):
+    """Recompute a month's rollups from its raw partition"""
+    table = sensor_partitions.partition_table(name)
+    SensorRollup.query.filter(
+        SensorRollup.bucket_start >= month, SensorRollup.bucket_start < add_months(month, 1)
+    ).delete(synchronize_session=False)
+    result = db.session.execute(
+        db.select(table.c.pet_id, table.c.timestamp, *[table.c[c] for c in VITAL_COLUMNS]),
+        execution_options={'yield_per': 10000}
+    )
+    for chunk in result.partitions():
+        merge_sensor_rollups(aggregate_readings([row._asdict() for row in chunk]))
+
+
+def maintain(ahead, retention_months, rebuild):
+    """Create upcoming partitions, rotate closed months into shards (SQLite) and expire old ones"""
+    with app.app_context():
+        conn = db.session.connection()
+        now = datetime.datetime.utcnow()
+        if is_postgres(conn):
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": PARTITION_LOCK})
+            # From last month, for readings a collar buffered across the month boundary
+            for name in sensor_partitions.create(conn, months_between(add_months(now, -1), add_months(now, ahead))):
+                print(f"Created partition {name}")
+        moved = sensor_partitions.rotate(conn, now)
+        if moved:
+            print(f"Rotated {moved} readings into monthly shards")
+        db.session.commit()
+
+        dropped = []
+        if retention_months:
+            dropped, uncovered = sensor_partitions.expire(db.session.connection(), retention_months, now)
+            if uncovered and rebuild:
+                partitions = sensor_partitions.partitions(db.session.connection())
+                for month in uncovered:
+                    print(f"Rebuilding rollups for {month:%Y-%m}")
+                    rebuild_rollups(month, partitions[month])
+                more, uncovered = sensor_partitions.expire(db.session.connection(), retention_months, now)
+                dropped += more
+            for month in uncovered:
+                print(f"Keeping {month:%Y-%m}: its rollups don't cover every reading (run with --rebuild-rollups)")
+            for name in dropped:
+                print(f"Dropped partition {name}")
+            db.session.commit()
+
+        # SQLite doesn't give pages back on its own; Postgres partitions are dropped whole
+        if (moved or dropped) and not is_postgres(conn):
+            with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as autocommit:
+                autocommit.execute(text("VACUUM"))
+            print("Compacted the database file.")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Create the database schema, or maintain sensor_data partitions")
+    parser.add_argument('command', nargs='?', choices=['create', 'maintain'], default='create')
+    parser.add_argument('--ahead', type=int, default=app.config['SENSOR_PARTITIONS_AHEAD'],
+                        help='months of partitions to create ahead of now')
+    parser.add_argument('--retention-months', type=int, default=app.config['SENSOR_RETENTION_MONTHS'],
+                        help='months of raw readings to keep (0 keeps everything)')
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help='recompute rollups for expiring months whose rollups are incomplete, then drop them')
+    args = parser.parse_args()
+
+    if args.command == 'maintain':
+        maintain(args.ahead, args.retention_months, args.rebuild_rollups)
+    else:
+        create_tables()
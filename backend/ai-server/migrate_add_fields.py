@@ -1,5 +1,5 @@
 import os
-from app import app, db
+from app import app, db, sensor_partitions
 from sqlalchemy import text
 
 def migrate_database():
@@ -12,11 +12,38 @@ def migrate_database():
                 ADD COLUMN IF NOT EXISTS "lastName" VARCHAR(80)
             """))
             
+            # Per-user data version behind the profile / pet list ETags
+            db.session.execute(text("""
+                ALTER TABLE users
+                ADD COLUMN IF NOT EXISTS data_version INTEGER NOT NULL DEFAULT 0
+            """))
+
             # Add breed column to pets table if it doesn't exist
             db.session.execute(text("""
                 ALTER TABLE pets 
                 ADD COLUMN IF NOT EXISTS breed VARCHAR(100)
             """))
+
+            # Case-insensitive unique email index used by registration's ON CONFLICT and login lookups
+            db.session.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email_lower
+                ON users (lower(email))
+            """))
+
+            # Composite index backing the vitals time-range / keyset queries
+            db.session.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_sensor_data_pet_id_timestamp
+                ON sensor_data (pet_id, timestamp, id)
+            """))
+
+            # Owner lookups behind the pet list and dashboard
+            db.session.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_pets_user_id ON pets (user_id)
+            """))
+
+            # Range-partition sensor_data by month, keeping existing readings (no-op once converted)
+            if sensor_partitions.convert(db.session.connection(), app.config['SENSOR_PARTITIONS_AHEAD']):
+                print("Converted sensor_data to monthly partitions.")
             
             db.session.commit()
             print("Migration completed successfully!")
@@ -0,0 +1,201 @@
+"""
+HausPet AI Server - Shared OpenAI Client
+One keep-alive OpenAI client per worker process, with bounded concurrency,
+retries with jittered backoff on 429/5xx, and upstream latency metrics.
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+import collections
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 1024
+
+
+class UpstreamBusy(RuntimeError):
+    """Raised when no upstream slot frees up within the queue timeout"""
+
+
+class UpstreamMetrics:
+    """In-flight gauge, counters and a sliding window of latencies per operation"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self._counters = collections.Counter()
+        self._latencies = collections.defaultdict(lambda: collections.deque(maxlen=LATENCY_WINDOW))
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, operation: str, seconds: float, ok: bool):
+        with self._lock:
+            self.in_flight -= 1
+            self._counters[f"{operation}.calls"] += 1
+            if not ok:
+                self._counters[f"{operation}.errors"] += 1
+            self._latencies[operation].append(seconds)
+
+    def count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            latencies = {op: sorted(window) for op, window in self._latencies.items()}
+            counters = dict(self._counters)
+            in_flight = self.in_flight
+        return {
+            "in_flight": in_flight,
+            "counters": counters,
+            "latency_ms": {op: _percentiles(values) for op, values in latencies.items()},
+        }
+
+
+def _percentiles(values) -> Dict:
+    if not values:
+        return {}
+    pick = lambda q: round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 1)
+    return {"p50": pick(0.50), "p90": pick(0.90), "p99": pick(0.99), "samples": len(values)}
+
+
+def is_retryable(error: Exception) -> bool:
+    # Imported here so workers that never call OpenAI don't pay for the SDK at startup
+    import openai
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+class GuardedOpenAI:
+    """Wraps an OpenAI client so every `client.x.y.create(...)` call is guarded.
+
+    Call sites keep using the normal SDK attribute paths; the wrapper adds a
+    concurrency limit, retries and metrics around the final call.
+    """
+
+    def __init__(self, client, metrics: UpstreamMetrics, max_concurrency: int = 16,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_cap: float = 8.0,
+                 queue_timeout: float = 10.0):
+        self._client = client
+        self._metrics = metrics
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_cap = backoff_cap
+        self._queue_timeout = queue_timeout
+
+    def __getattr__(self, name):
+        return _Endpoint(self, getattr(self._client, name), name)
+
+    def call(self, operation: str, fn: Callable, *args, **kwargs):
+        if not self._slots.acquire(timeout=self._queue_timeout):
+            self._metrics.count("rejected")
+            raise UpstreamBusy("Too many concurrent OpenAI requests")
+        self._metrics.started()
+        start = time.perf_counter()
+        try:
+            result = self._call_with_retries(operation, fn, *args, **kwargs)
+        except Exception:
+            self._release(operation, start, ok=False)
+            raise
+        if kwargs.get("stream"):
+            # The slot stays taken until the stream has been consumed or closed
+            return _GuardedStream(result, lambda ok: self._release(operation, start, ok))
+        self._release(operation, start, ok=True)
+        return result
+
+    def _call_with_retries(self, operation: str, fn: Callable, *args, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self._max_retries or not is_retryable(e):
+                    raise
+                # Full jitter: sleep anywhere up to the exponential cap
+                delay = random.uniform(0, min(self._backoff_cap, self._backoff_base * 2 ** attempt))
+                logger.warning("OpenAI %s failed (%s), retrying in %.2fs", operation, e, delay)
+                self._metrics.count(f"{operation}.retries")
+                time.sleep(delay)
+                attempt += 1
+
+    def _release(self, operation: str, start: float, ok: bool):
+        self._metrics.finished(operation, time.perf_counter() - start, ok)
+        self._slots.release()
+
+
+class _Endpoint:
+    def __init__(self, guard: GuardedOpenAI, target, path: str):
+        self._guard = guard
+        self._target = target
+        self._path = path
+
+    def __getattr__(self, name):
+        return _Endpoint(self._guard, getattr(self._target, name), f"{self._path}.{name}")
+
+    def __call__(self, *args, **kwargs):
+        return self._guard.call(self._path, self._target, *args, **kwargs)
+
+
+class _GuardedStream:
+    """Iterates an SDK stream and releases its slot exactly once when done"""
+
+    def __init__(self, stream, on_done: Callable[[bool], None]):
+        self._stream = stream
+        self._iterator = iter(stream)
+        self._on_done = on_done
+        self._done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            self._finish(True)
+            raise
+        except Exception:
+            self._finish(False)
+            raise
+
+    def close(self):
+        close = getattr(self._stream, "close", None)
+        if close:
+            close()
+        self._finish(True)
+
+    def _finish(self, ok: bool):
+        if not self._done:
+            self._done = True
+            self._on_done(ok)
+
+    def __del__(self):
+        self._finish(True)
+
+
+metrics = UpstreamMetrics()
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client(factory: Callable[[], object], **options) -> GuardedOpenAI:
+    """Process-wide guarded client, rebuilt after a fork so workers never share sockets"""
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        return _client
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = GuardedOpenAI(factory(), metrics, **options)
+            _client_pid = os.getpid()
+    return _client
@@ -0,0 +1,255 @@
+"""
+HausPet AI Server - Sensor Data Partitions
+Monthly time partitions for sensor_data so indexes stay small and old
+months can be dropped whole. Postgres uses native range partitions
+(sensor_data_YYYY_MM attached to a partitioned sensor_data). SQLite, used in
+development, keeps writing to sensor_data and has closed months rotated
+into sensor_data_YYYY_MM shard tables that reads union back in.
+"""
+
+import re
+import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Column, MetaData, Table, func, select, text, union_all
+
+from rollups import RESOLUTIONS
+
+SHARD_NAME = re.compile(r"^sensor_data_(\d{4})_(\d{2})$")
+
+# Advisory lock taken around partition DDL, so workers and `migrate.py maintain` create one at a time
+PARTITION_LOCK = "hauspet:sensor_data_partitions"
+
+
+def month_start(value: datetime.datetime) -> datetime.datetime:
+    return datetime.datetime(value.year, value.month, 1)
+
+
+def add_months(month: datetime.datetime, count: int) -> datetime.datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.datetime(index // 12, index % 12 + 1, 1)
+
+
+def months_between(start: datetime.datetime, end: datetime.datetime) -> List[datetime.datetime]:
+    """Month starts from start's month through end's month, inclusive"""
+    months, month = [], month_start(start)
+    while month <= end:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def partition_name(month: datetime.datetime) -> str:
+    return f"sensor_data_{month:%Y_%m}"
+
+
+def is_postgres(conn) -> bool:
+    return conn.dialect.name == "postgresql"
+
+
+class SensorPartitions:
+    """Create, rotate, read across and expire the monthly partitions of the readings table"""
+
+    def __init__(self, table: Table, rollups: Table):
+        self.table = table
+        self.rollups = rollups
+        self._known = set()
+        self._partitioned = None
+        self._shards: Dict[str, Table] = {}
+
+    def partitions(self, conn) -> Dict[datetime.datetime, str]:
+        """Existing month partitions (Postgres) or shard tables (SQLite), by month"""
+        if is_postgres(conn):
+            names = conn.execute(text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(:parent)"
+            ), {"parent": self.table.name}).scalars()
+        else:
+            names = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'")).scalars()
+        months = {}
+        for name in names:
+            match = SHARD_NAME.match(name)
+            if match:
+                months[datetime.datetime(int(match.group(1)), int(match.group(2)), 1)] = name
+        return dict(sorted(months.items()))
+
+    def is_partitioned(self, conn) -> bool:
+        if not is_postgres(conn):
+            return True
+        kind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"),
+                            {"name": self.table.name}).scalar()
+        return kind == "p"
+
+    # --- Postgres ---
+    def convert(self, conn, ahead: int = 3) -> bool:
+        """Turn an existing plain sensor_data into a range-partitioned table, keeping its rows and ids"""
+        if not is_postgres(conn) or self.is_partitioned(conn):
+            return False
+        sequence = conn.execute(text("SELECT pg_get_serial_sequence('sensor_data', 'id')")).scalar()
+        bounds = conn.execute(text("SELECT min(timestamp), max(timestamp) FROM sensor_data")).one()
+        statements = [
+            "ALTER TABLE sensor_data RENAME TO sensor_data_unpartitioned",
+            "ALTER INDEX IF EXISTS sensor_data_pkey RENAME TO sensor_data_unpartitioned_pkey",
+            "ALTER INDEX IF EXISTS ix_sensor_data_pet_id_timestamp RENAME TO ix_sensor_data_unpartitioned_pet_id_timestamp",
+            f"ALTER SEQUENCE {sequence} OWNED BY NONE",
+            # The partition key has to be part of the primary key
+            f"""
+            CREATE TABLE sensor_data (
+                id INTEGER NOT NULL DEFAULT nextval('{sequence}'),
+                pet_id INTEGER NOT NULL REFERENCES pets (id),
+                timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                heart_rate INTEGER,
+                temperature DOUBLE PRECISION,
+                spo2 INTEGER,
+                activity_level DOUBLE PRECISION,
+                PRIMARY KEY (id, timestamp)
+            ) PARTITION BY RANGE (timestamp)
+            """,
+            "CREATE INDEX ix_sensor_data_pet_id_timestamp ON sensor_data (pet_id, timestamp, id)",
+            f"ALTER SEQUENCE {sequence} OWNED BY sensor_data.id",
+        ]
+        for statement in statements:
+            conn.execute(text(statement))
+
+        now = datetime.datetime.utcnow()
+        self.create(conn, months_between(min(bounds[0] or now, now), add_months(max(bounds[1] or now, now), ahead)))
+        conn.execute(text(
+            "INSERT INTO sensor_data (id, pet_id, timestamp, heart_rate, temperature, spo2, activity_level) "
+            "SELECT id, pet_id, COALESCE(timestamp, :now), heart_rate, temperature, spo2, activity_level "
+            "FROM sensor_data_unpartitioned"
+        ), {"now": now})
+        conn.execute(text("DROP TABLE sensor_data_unpartitioned"))
+        return True
+
+    def create(self, conn, months: Iterable[datetime.datetime]) -> List[str]:
+        """Create any missing partitions (Postgres) or shard tables (SQLite) for `months`"""
+        existing = self.partitions(conn)
+        created = []
+        for month in months:
+            month = month_start(month)
+            if month in existing:
+                continue
+            name = partition_name(month)
+            if is_postgres(conn):
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF sensor_data "
+                    f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+                ))
+            else:
+                conn.execute(text(f"""
+                    CREATE TABLE IF NOT EXISTS {name} (
+                        id INTEGER NOT NULL PRIMARY KEY,
+                        pet_id INTEGER NOT NULL REFERENCES pets (id),
+                        timestamp DATETIME,
+                        heart_rate INTEGER,
+                        temperature FLOAT,
+                        spo2 INTEGER,
+                        activity_level FLOAT
+                    )
+                """))
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{name}_pet_id_timestamp ON {name} (pet_id, timestamp, id)"))
+            created.append(name)
+        return created
+
+    def ensure_for(self, engine, timestamps: Iterable[datetime.datetime]):
+        """Make sure every timestamp has a partition to land in before inserting (Postgres only).
+
+        Partitions are normally created ahead by `python migrate.py maintain`, and
+        ingest rejects readings far from the server clock, so this only ever creates
+        the current or next month; other months are left to maintenance. The DDL runs on its own connection and transaction under an advisory lock,
+        so concurrent workers don't race on it and the caller's transaction never
+        holds the parent table's lock. Call it before the caller touches sensor_data.
+        """
+        if engine.dialect.name != "postgresql":
+            return
+        current = month_start(datetime.datetime.utcnow())
+        months = {month_start(ts) for ts in timestamps} & {current, add_months(current, 1)}
+        months -= self._known
+        if not months:
+            return
+        with engine.begin() as conn:
+            if self._partitioned is None:
+                self._partitioned = self.is_partitioned(conn)
+            if not self._partitioned:
+                return
+            self._known.update(self.partitions(conn))
+            missing = months - self._known
+            if not missing:
+                return
+            conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": PARTITION_LOCK})
+            self.create(conn, sorted(missing))
+        self._known.update(missing)
+
+    def partition_table(self, name: str) -> Table:
+        """Lightweight Table for querying one partition or shard by name"""
+        shard = self._shards.get(name)
+        if shard is None:
+            shard = self._shards[name] = Table(name, MetaData(), *[Column(c.name, c.type) for c in self.table.columns])
+        return shard
+
+    # --- SQLite ---
+    def rotate(self, conn, before: datetime.datetime) -> int:
+        """Move readings older than `before`'s month out of sensor_data into their month's shard (SQLite only)"""
+        if is_postgres(conn):
+            return 0
+        cutoff = month_start(before)
+        oldest = conn.execute(select(func.min(self.table.c.timestamp)).where(self.table.c.timestamp < cutoff)).scalar()
+        if oldest is None:
+            return 0
+        moved = 0
+        columns = [c.name for c in self.table.columns]
+        for month in months_between(oldest, add_months(cutoff, -1)):
+            window = (self.table.c.timestamp >= month) & (self.table.c.timestamp < add_months(month, 1))
+            if conn.execute(select(self.table.c.id).where(window).limit(1)).first() is None:
+                continue
+            self.create(conn, [month])
+            shard = self.partition_table(partition_name(month))
+            result = conn.execute(shard.insert().from_select(columns, select(*self.table.c).where(window)))
+            conn.execute(self.table.delete().where(window))
+            moved += result.rowcount
+        return moved
+
+    def source(self, conn, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None):
+        """What to read readings in [start, end) from: the table itself, or on SQLite a
+        UNION ALL of sensor_data and the shards overlapping the range"""
+        if is_postgres(conn):
+            return self.table
+        shards = [
+            self.partition_table(name) for month, name in self.partitions(conn).items()
+            if (end is None or month < end) and (start is None or add_months(month, 1) > start)
+        ]
+        if not shards:
+            return self.table
+        return union_all(select(*self.table.c), *[select(*shard.c) for shard in shards]).subquery("sensor_readings")
+
+    # --- Retention ---
+    def rollup_coverage(self, conn, month: datetime.datetime, name: str) -> Tuple[int, Dict[str, int]]:
+        """Raw reading count of a month partition and the readings each rollup resolution accounts for"""
+        raw = conn.execute(select(func.count()).select_from(self.partition_table(name))).scalar()
+        rolled = dict(conn.execute(
+            select(self.rollups.c.resolution, func.coalesce(func.sum(self.rollups.c.reading_count), 0))
+            .where(self.rollups.c.bucket_start >= month, self.rollups.c.bucket_start < add_months(month, 1))
+            .group_by(self.rollups.c.resolution)
+        ).all())
+        return raw, {resolution: rolled.get(resolution, 0) for resolution in RESOLUTIONS}
+
+    def expire(self, conn, keep_months: int, now: Optional[datetime.datetime] = None) -> Tuple[List[str], List[datetime.datetime]]:
+        """Drop partitions older than `keep_months` whose readings are fully covered by rollups.
+
+        Returns (dropped partition names, months kept back because their rollups don't add up).
+        """
+        cutoff = add_months(month_start(now or datetime.datetime.utcnow()), -keep_months)
+        dropped, uncovered = [], []
+        for month, name in self.partitions(conn).items():
+            if month >= cutoff:
+                break
+            raw, rolled = self.rollup_coverage(conn, month, name)
+            if any(count != raw for count in rolled.values()):
+                uncovered.append(month)
+                continue
+            conn.execute(text(f"DROP TABLE {name}"))
+            self._known.discard(month)
+            self._shards.pop(name, None)
+            dropped.append(name)
+        return dropped, uncovered
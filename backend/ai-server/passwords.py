@@ -0,0 +1,90 @@
+"""
+HausPet AI Server - Password Hashing
+Runs PBKDF2 hashing and verification on a bounded process pool so login
+storms don't pin request threads on CPU, with a tunable iteration count
+and detection of hashes made with outdated parameters.
+"""
+
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HasherBusy(RuntimeError):
+    """Raised when the hashing pool's backlog stays full past the timeout"""
+
+
+def hash_method(iterations: int) -> str:
+    return f"pbkdf2:sha256:{iterations}"
+
+
+def needs_rehash(pwhash: str, iterations: int) -> bool:
+    """True when a stored hash was made with different parameters than the current ones"""
+    return pwhash.split("$", 1)[0] != hash_method(iterations)
+
+
+def _hash(password: str, method: str) -> str:
+    return generate_password_hash(password, method=method)
+
+
+def _verify(pwhash: str, password: str) -> bool:
+    return check_password_hash(pwhash, password)
+
+
+def _start_context():
+    """forkserver where available: forking a multithreaded gunicorn worker can copy a lock some other
+    thread holds into the child. The server only preloads this module, not the app."""
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+class PasswordHasher:
+    """Hash/verify on a per-process pool; workers=0 hashes inline (e.g. on serverless)"""
+
+    def __init__(self, iterations: int = 260000, workers: int = 2, max_pending: int = 64,
+                 timeout: float = 10.0):
+        self.iterations = iterations
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # A pool inherited across a gunicorn fork is unusable, so build one per process
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_start_context())
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HasherBusy("Password hashing backlog is full")
+        try:
+            return self._executor().submit(fn, *args).result(timeout=self.timeout)
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password, hash_method(self.iterations))
+
+    def verify(self, pwhash: str, password: str) -> bool:
+        return self._run(_verify, pwhash, password)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        return needs_rehash(pwhash, self.iterations)
+
+    def shutdown(self):
+        if self._pool is not None and self._pool_pid == os.getpid():
+            self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,200 @@
+"""
+HausPet AI Server - Realtime Pub/Sub Hub
+In-process fan-out of readings and alerts to subscribed connections, each
+with a bounded queue, up to a cap on connections per worker. An optional
+Redis-compatible backend relays events between gunicorn workers.
+"""
+
+import os
+import json
+import logging
+import threading
+import collections
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One connection's bounded event queue.
+
+    When the queue is full, the oldest queued reading for the same topic is
+    dropped (a newer reading supersedes it). If there is none to drop, the
+    consumer is too slow and the subscription is closed.
+    """
+
+    def __init__(self, topics: Iterable[str], max_queue: int):
+        self.topics = frozenset(topics)
+        self.max_queue = max_queue
+        self.dropped = 0
+        self.closed = False
+        self.close_reason = None
+        self._events = collections.deque()
+        self._cond = threading.Condition()
+
+    def offer(self, topic: str, event: Dict) -> bool:
+        with self._cond:
+            if self.closed:
+                return False
+            if len(self._events) >= self.max_queue and not self._coalesce(topic):
+                self._close("slow_consumer")
+                return False
+            self._events.append((topic, event))
+            self._cond.notify()
+            return True
+
+    def _coalesce(self, topic: str) -> bool:
+        for i, (queued_topic, queued) in enumerate(self._events):
+            if queued_topic == topic and queued.get("type") == "reading":
+                del self._events[i]
+                self.dropped += 1
+                return True
+        return False
+
+    def get(self, timeout: float) -> Optional[Tuple[str, Dict]]:
+        """Next (topic, event), or None on timeout or once closed"""
+        with self._cond:
+            if not self._events and not self.closed:
+                self._cond.wait(timeout)
+            if self._events:
+                return self._events.popleft()
+            return None
+
+    def close(self):
+        with self._cond:
+            self._close("closed")
+
+    def _close(self, reason: str):
+        if not self.closed:
+            self.closed = True
+            self.close_reason = reason
+            self._cond.notify_all()
+
+
+class HubFull(RuntimeError):
+    """Raised by subscribe() when the worker already holds `max_subscribers` connections"""
+
+
+class Hub:
+    """Topic fan-out to subscriptions. Each streaming connection holds a server
+    thread, so at most `max_subscribers` are open at once (None for no cap)."""
+
+    def __init__(self, max_queue: int = 100, backend=None, max_subscribers: Optional[int] = None):
+        self.max_queue = max_queue
+        self.backend = backend
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._by_topic = collections.defaultdict(set)
+        self._active = set()
+        self._counters = collections.Counter()
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        if self.backend:
+            self.backend.ensure_listening(self)
+        subscription = Subscription(topics, self.max_queue)
+        with self._lock:
+            if self.max_subscribers is not None and len(self._active) >= self.max_subscribers:
+                self._counters["refused"] += 1
+                raise HubFull(f"Too many realtime connections ({self.max_subscribers}), try again shortly")
+            self._active.add(subscription)
+            for topic in subscription.topics:
+                self._by_topic[topic].add(subscription)
+            self._counters["subscribed"] += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Close and forget a subscription; safe to call more than once"""
+        subscription.close()
+        with self._lock:
+            self._active.discard(subscription)
+            for topic in subscription.topics:
+                subscribers = self._by_topic.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._by_topic[topic]
+
+    def publish(self, topic: str, event: Dict):
+        """Send an event to every subscriber of `topic` (in all workers when a backend is set)"""
+        with self._lock:
+            self._counters["published"] += 1
+        if self.backend:
+            self.backend.publish(topic, event)
+        else:
+            self.deliver(topic, event)
+
+    def deliver(self, topic: str, event: Dict):
+        with self._lock:
+            subscribers = list(self._by_topic.get(topic, ()))
+        delivered = 0
+        for subscription in subscribers:
+            if subscription.offer(topic, event):
+                delivered += 1
+            else:
+                with self._lock:
+                    self._counters["disconnected_slow"] += 1
+                self.unsubscribe(subscription)
+        with self._lock:
+            self._counters["delivered"] += delivered
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "topics": len(self._by_topic),
+                "connections": len(self._active),
+                "max_connections": self.max_subscribers,
+                "backend": type(self.backend).__name__ if self.backend else "local",
+                **self._counters,
+            }
+
+
+class RedisBackend:
+    """Relays hub events through Redis pub/sub so every worker's hub sees them.
+
+    `client` only needs `publish(channel, data)` and `pubsub()` with
+    `psubscribe()` / `listen()`, so any Redis-compatible client or a local
+    stand-in works.
+    """
+
+    def __init__(self, client, prefix: str = "hauspet:"):
+        self.client = client
+        self.prefix = prefix
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisBackend":
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("REALTIME_REDIS_URL is set but the 'redis' package is not installed")
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def publish(self, topic: str, event: Dict):
+        self.client.publish(self.prefix + topic, json.dumps(event))
+
+    def ensure_listening(self, hub: Hub):
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                pubsub = self.client.pubsub()
+                pubsub.psubscribe(self.prefix + "*")
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._listen, args=(pubsub, hub),
+                                                name="realtime-redis", daemon=True)
+                self._thread.start()
+
+    def _listen(self, pubsub, hub: Hub):
+        for message in pubsub.listen():
+            if message.get("type") != "pmessage":
+                continue
+            channel = message["channel"]
+            data = message["data"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            try:
+                hub.deliver(channel[len(self.prefix):], json.loads(data))
+            except Exception:
+                logger.exception("Dropping malformed realtime message on %s", channel)
@@ -0,0 +1,209 @@
+"""
+HausPet AI Server - Chat Response Cache
+Exact-match LRU/TTL cache of Dr. HausPet answers keyed on the normalised
+system context plus user message, with an optional embedding-similarity
+tier for near-identical questions about the same pet context.
+"""
+
+import re
+import time
+import hashlib
+import logging
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Imported when a cache with an embedding tier is built, so the exact-match cache doesn't need numpy
+np = None
+
+
+def _require_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError("The semantic chat cache requires numpy (pip install numpy)")
+        np = numpy
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", (text or "").lower())).strip()
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\x00".join(parts).encode()).hexdigest()
+
+
+def _unit(vector) -> "np.ndarray":
+    """float32 copy of `vector` scaled to length 1 (zero vectors stay zero), so dot products are cosines"""
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class _ContextVectors:
+    """Unit vectors of the answers cached for one system context, one matrix row each. Never changed
+    in place: stores and evictions swap in new arrays, so a lookup can score a snapshot unlocked."""
+
+    __slots__ = ("keys", "matrix", "expires")
+
+    def __init__(self, keys, matrix, expires):
+        self.keys = keys
+        self.matrix = matrix
+        self.expires = expires
+
+    def with_row(self, key: str, vector, expires: float) -> "_ContextVectors":
+        keep = [i for i, k in enumerate(self.keys) if k != key]
+        return _ContextVectors(
+            tuple(self.keys[i] for i in keep) + (key,),
+            np.vstack([self.matrix[keep], vector[None, :]]),
+            np.append(self.expires[keep], expires),
+        )
+
+    def without(self, key: str) -> Optional["_ContextVectors"]:
+        keep = [i for i, k in enumerate(self.keys) if k != key]
+        if not keep:
+            return None
+        return _ContextVectors(tuple(self.keys[i] for i in keep), self.matrix[keep], self.expires[keep])
+
+
+class CacheLookup:
+    """Result of ResponseCache.lookup; call store() with the fresh answer on a miss"""
+
+    def __init__(self, cache: "ResponseCache", context_key: str, key: str, message: str):
+        self._cache = cache
+        self.context_key = context_key
+        self.key = key
+        self.message = message
+        self.vector = None
+        self.value = None
+        self.tier = None
+
+    def store(self, value: Dict):
+        self._cache._store(self, value)
+
+
+class ResponseCache:
+    """The semantic tier calls `embed` on its own small pool and gives up after `embed_timeout`
+    seconds, so a slow embedding endpoint only costs a lookup that long before it counts as a miss."""
+
+    def __init__(self, max_entries: int = 2048, ttl: float = 86400,
+                 embed: Optional[Callable[[str], List[float]]] = None,
+                 similarity_threshold: float = 0.95, embed_timeout: float = 2.0, embed_workers: int = 4):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self.embed_timeout = embed_timeout
+        self._embed_pool = None
+        if embed:
+            _require_numpy()
+            self._embed_pool = ThreadPoolExecutor(max_workers=embed_workers, thread_name_prefix="cache-embed")
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()   # key -> (expires, value)
+        self._vectors = collections.OrderedDict()   # key -> (context_key, value), in LRU order
+        self._by_context: Dict[str, _ContextVectors] = {}
+        self._counters = collections.Counter()
+
+    def lookup(self, context: str, message: str) -> CacheLookup:
+        normalized = normalize_text(message)
+        context_key = _digest(normalize_text(context))
+        lookup = CacheLookup(self, context_key, _digest(context_key, normalized), normalized)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(lookup.key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(lookup.key)
+                self._counters["hits_exact"] += 1
+                lookup.value, lookup.tier = entry[1], "exact"
+                return lookup
+            if entry:
+                del self._entries[lookup.key]
+
+        if self.embed and normalized:
+            lookup.value = self._semantic_match(lookup, now)
+            if lookup.value is not None:
+                lookup.tier = "semantic"
+                return lookup
+
+        with self._lock:
+            self._counters["misses"] += 1
+        return lookup
+
+    def _semantic_match(self, lookup: CacheLookup, now: float) -> Optional[Dict]:
+        future = self._embed_pool.submit(self.embed, lookup.message)
+        try:
+            lookup.vector = _unit(future.result(self.embed_timeout))
+        except FutureTimeout:
+            future.cancel()
+            with self._lock:
+                self._counters["embed_timeouts"] += 1
+            logger.warning("Embedding lookup took over %.1fs, skipping semantic cache", self.embed_timeout)
+            return None
+        except Exception as e:
+            logger.warning("Embedding lookup failed, skipping semantic cache: %s", e)
+            return None
+        # Only answers given for the same system context are candidates
+        with self._lock:
+            candidates = self._by_context.get(lookup.context_key)
+        if candidates is None or candidates.matrix.shape[1] != lookup.vector.shape[0]:
+            return None
+        scores = candidates.matrix @ lookup.vector
+        scores[candidates.expires <= now] = -1.0
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+        key = candidates.keys[best]
+        with self._lock:
+            entry = self._vectors.get(key)
+            if entry is None:  # Evicted since the snapshot
+                return None
+            self._vectors.move_to_end(key)
+            self._counters["hits_semantic"] += 1
+            return entry[1]
+
+    def _store(self, lookup: CacheLookup, value: Dict):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[lookup.key] = (expires, value)
+            self._entries.move_to_end(lookup.key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if lookup.vector is not None:
+                self._vectors[lookup.key] = (lookup.context_key, value)
+                self._vectors.move_to_end(lookup.key)
+                vectors = self._by_context.get(lookup.context_key)
+                # A new context, or vectors from a different embedding model: start over
+                if vectors is None or vectors.matrix.shape[1] != lookup.vector.shape[0]:
+                    self._by_context[lookup.context_key] = _ContextVectors(
+                        (lookup.key,), lookup.vector[None, :], np.array([expires])
+                    )
+                else:
+                    self._by_context[lookup.context_key] = vectors.with_row(lookup.key, lookup.vector, expires)
+                while len(self._vectors) > self.max_entries:
+                    key, (context_key, _) = self._vectors.popitem(last=False)
+                    remaining = self._by_context[context_key].without(key)
+                    if remaining is None:
+                        del self._by_context[context_key]
+                    else:
+                        self._by_context[context_key] = remaining
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "semantic_entries": len(self._vectors),
+                "hits_exact": self._counters["hits_exact"],
+                "hits_semantic": self._counters["hits_semantic"],
+                "misses": self._counters["misses"],
+                "embed_timeouts": self._counters["embed_timeouts"],
+            }
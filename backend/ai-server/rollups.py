@@ -0,0 +1,85 @@
+"""
+HausPet AI Server - Vitals Rollups
+Per-pet 1-minute / 1-hour / 1-day aggregates of sensor readings, merged
+incrementally as readings are stored so charts never scan raw history.
+"""
+
+import datetime
+from typing import Dict, List, Optional
+
+from vitals import VITAL_COLUMNS
+
+# Resolution name -> bucket width, finest first
+RESOLUTIONS = {
+    "1m": datetime.timedelta(minutes=1),
+    "1h": datetime.timedelta(hours=1),
+    "1d": datetime.timedelta(days=1),
+}
+
+DEFAULT_MIN_POINTS = 100
+
+
+def bucket_start(timestamp: datetime.datetime, resolution: str) -> datetime.datetime:
+    """Truncate a timestamp to the start of its bucket"""
+    if resolution == "1m":
+        return timestamp.replace(second=0, microsecond=0)
+    if resolution == "1h":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if resolution == "1d":
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown resolution: {resolution}")
+
+
+def aggregate_readings(rows: List[Dict]) -> List[Dict]:
+    """Fold a batch of sensor_data rows into partial rollup rows for every resolution"""
+    buckets = {}
+    for row in rows:
+        for resolution in RESOLUTIONS:
+            key = (row["pet_id"], resolution, bucket_start(row["timestamp"], resolution))
+            agg = buckets.get(key)
+            if agg is None:
+                agg = buckets[key] = _empty_bucket(*key)
+            agg["reading_count"] += 1
+            for column in VITAL_COLUMNS:
+                value = row.get(column)
+                if value is None:
+                    continue
+                low, high = agg[f"{column}_min"], agg[f"{column}_max"]
+                agg[f"{column}_min"] = value if low is None or value < low else low
+                agg[f"{column}_max"] = value if high is None or value > high else high
+                agg[f"{column}_sum"] += value
+                agg[f"{column}_count"] += 1
+    return list(buckets.values())
+
+
+def _empty_bucket(pet_id: int, resolution: str, start: datetime.datetime) -> Dict:
+    agg = {"pet_id": pet_id, "resolution": resolution, "bucket_start": start, "reading_count": 0}
+    for column in VITAL_COLUMNS:
+        agg.update({f"{column}_min": None, f"{column}_max": None,
+                    f"{column}_sum": 0.0, f"{column}_count": 0})
+    return agg
+
+
+def choose_resolution(start: Optional[datetime.datetime], end: Optional[datetime.datetime],
+                      min_points: int = DEFAULT_MIN_POINTS) -> str:
+    """Coarsest resolution that still gives at least `min_points` buckets across the window"""
+    if start is None:
+        return "raw"
+    window = (end or datetime.datetime.utcnow()) - start
+    for resolution, width in reversed(list(RESOLUTIONS.items())):
+        if window / width >= min_points:
+            return resolution
+    return "raw"
+
+
+def serialize_rollup(row) -> Dict:
+    item = {"timestamp": row.timestamp.isoformat(), "count": row.reading_count}
+    for column in VITAL_COLUMNS:
+        count = getattr(row, f"{column}_count")
+        item[column] = {
+            "min": getattr(row, f"{column}_min"),
+            "max": getattr(row, f"{column}_max"),
+            "mean": round(getattr(row, f"{column}_sum") / count, 2) if count else None,
+            "count": count,
+        }
+    return item
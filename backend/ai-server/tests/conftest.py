@@ -0,0 +1,32 @@
+"""
+HausPet AI Server - Test Fixtures
+The app reads its configuration at import, so it is imported once per test
+session against a temporary SQLite database.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("hauspet")
+    os.environ['POSTGRES_URL'] = f"sqlite:///{directory}/hauspet_test.db"
+    os.environ['OPENAI_API_KEY'] = 'test-key'
+    os.environ['TTS_CACHE_DIR'] = str(directory / "tts-cache")
+    # Cheap, inline hashing so tests exercise the database rather than PBKDF2
+    os.environ['PASSWORD_HASH_ITERATIONS'] = '1000'
+    os.environ['PASSWORD_HASH_WORKERS'] = '0'
+    import app as m
+    with m.app.app_context():
+        m.db.create_all()
+    return m
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
@@ -0,0 +1,74 @@
+import time
+import datetime
+
+import pytest
+from sqlalchemy import event
+
+
+def seed_owner(m, pets, readings=20):
+    """An owner with `pets` pets; returns (auth headers, expected latest reading id and alert counts per pet)"""
+    db = m.db
+    user = m.User(email=f"dashboard-{pets}-{time.time()}@hauspet.net")
+    user.set_password("secret-password")
+    db.session.add(user)
+    db.session.flush()
+    owned = [m.Pet(name=f"Pet {i}", species="dog", age=3, weight=30, user_id=user.id) for i in range(pets)]
+    db.session.add_all(owned)
+    db.session.flush()
+
+    start = datetime.datetime.utcnow() - datetime.timedelta(hours=1)
+    expected = {}
+    for i, pet in enumerate(owned):
+        rows = [m.SensorData(pet_id=pet.id, timestamp=start + datetime.timedelta(seconds=10 * r),
+                             heart_rate=80 + r % 20, temperature=38.5, spo2=97, activity_level=0.5)
+                for r in range(readings)]
+        db.session.add_all(rows)
+        db.session.add(m.PetLocation(pet_id=pet.id, lat=52.52, lng=13.40, geohash="u33dc0cpn",
+                                     battery_level=90, recorded_at=start))
+        alerts = [m.HealthAlert(pet_id=pet.id, severity=("critical", "warning")[a % 2], health_score=40,
+                                resolved=a >= i % 4) for a in range(4)]
+        db.session.add_all(alerts)
+        db.session.flush()
+        open_alerts = [a for a in alerts if not a.resolved]
+        expected[pet.id] = (rows[-1].id, len(open_alerts), sum(a.severity == "critical" for a in open_alerts))
+    db.session.commit()
+    return {'Authorization': f'Bearer {m._issue_token(user)}'}, expected
+
+
+@pytest.fixture
+def statements(app_module, monkeypatch):
+    """SQL statements executed while the test runs; auth claims are trusted so they don't add lookups"""
+    monkeypatch.setitem(app_module.app.config, 'AUTH_MODE', 'claims')
+    executed = []
+
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    with app_module.app.app_context():
+        engine = app_module.db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def dashboard(client, headers):
+    body = client.get('/api/v1/dashboard', headers=headers).get_json()
+    return {p["id"]: ((p["latest_vitals"] or {}).get("id"), p["alerts"]["unresolved"], p["alerts"]["critical"])
+            for p in body["pets"]}
+
+
+def test_dashboard_reports_latest_vitals_and_open_alerts(app_module, client):
+    with app_module.app.app_context():
+        headers, expected = seed_owner(app_module, 5)
+    assert dashboard(client, headers) == expected
+
+
+def test_dashboard_query_count_does_not_grow_with_pets(app_module, client, statements):
+    counts = {}
+    for pets in (1, 10, 100):
+        with app_module.app.app_context():
+            headers, _ = seed_owner(app_module, pets, readings=5)
+        statements.clear()
+        dashboard(client, headers)
+        counts[pets] = len(statements)
+    assert counts[1] and len(set(counts.values())) == 1, f"query count grows with pets (N+1): {counts}"
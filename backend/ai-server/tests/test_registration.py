@@ -0,0 +1,38 @@
+import threading
+import collections
+
+import pytest
+
+
+def race(app, email, concurrency):
+    """Register `email` (in varying case) from `concurrency` threads released at the same instant"""
+    statuses = collections.Counter()
+    barrier = threading.Barrier(concurrency)
+    lock = threading.Lock()
+
+    def worker(i):
+        client = app.test_client()
+        variant = email.upper() if i % 2 else email
+        barrier.wait()
+        response = client.post('/api/v1/auth/register', json={'email': variant, 'password': 'secret-password'})
+        with lock:
+            statuses[response.status_code] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses
+
+
+@pytest.mark.parametrize("round_number", range(3))
+def test_concurrent_registrations_create_one_account(app_module, round_number):
+    statuses = race(app_module.app, f"race-{round_number}@hauspet.net", 16)
+    assert statuses == {201: 1, 409: 15}
+
+
+def test_registration_email_is_case_insensitive(client):
+    first = client.post('/api/v1/auth/register', json={'email': 'Case@HausPet.net', 'password': 'secret-password'})
+    again = client.post('/api/v1/auth/register', json={'email': 'case@hauspet.NET', 'password': 'secret-password'})
+    assert (first.status_code, again.status_code) == (201, 409)
@@ -0,0 +1,181 @@
+"""
+HausPet AI Server - TTS Audio Cache
+Content-addressed cache of synthesised speech keyed on (model, voice, text):
+a byte-bounded in-memory LRU in front of a byte-bounded disk tier read back
+through mmap.
+"""
+
+import os
+import mmap
+import hashlib
+import logging
+import tempfile
+import threading
+import collections
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def audio_key(model: str, voice: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\x00{voice}\x00{text}".encode()).hexdigest()
+
+
+class AudioCache:
+    """Two-tier LRU of MP3 bytes, each tier evicted by total byte size.
+
+    The disk tier is a directory shared by every worker. Nothing touches it
+    until the first get/put, and its bound is enforced from a scan of the
+    directory (oldest mtime first; hits refresh the mtime), repeated after
+    each worker writes 1/16 of the bound, so all workers together overshoot
+    by at most that much per worker.
+    """
+
+    SCAN_FRACTION = 16
+
+    def __init__(self, directory: str, max_memory_bytes: int = 32 * 1024 * 1024,
+                 max_disk_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._memory = collections.OrderedDict()   # key -> bytes
+        self._memory_bytes = 0
+        self._disk_ready = False
+        self._disk_entries = 0                     # As of the last scan
+        self._disk_bytes = 0
+        self._unscanned_bytes = 0                  # Written by this process since the last scan
+        self._counters = collections.Counter()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def _ensure_disk(self) -> bool:
+        """Create and index the directory on first use; False when the disk tier is off or unusable"""
+        if self._disk_ready or not self.max_disk_bytes:
+            return self._disk_ready
+        with self._scan_lock:
+            if not self._disk_ready:
+                try:
+                    os.makedirs(self.directory, exist_ok=True)
+                except OSError as e:
+                    logger.warning("TTS disk cache disabled, cannot create %s: %s", self.directory, e)
+                    self.max_disk_bytes = 0
+                    return False
+                self._scan()
+                self._disk_ready = True
+        return True
+
+    def _scan(self):
+        """Total the directory and delete the least recently used files beyond max_disk_bytes"""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".mp3"):
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        entries.append((stat.st_mtime, entry.path, stat.st_size))
+        except OSError as e:
+            logger.warning("Could not scan TTS cache %s: %s", self.directory, e)
+            return
+        total = sum(size for _, _, size in entries)
+        evicted = 0
+        for _, path, size in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Another worker evicted it first
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_entries = len(entries) - evicted
+            self._disk_bytes = total
+            self._unscanned_bytes = 0
+            self._counters["disk_evictions"] += evicted
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return audio
+        audio = self._read_disk(key) if self._ensure_disk() else None
+        with self._lock:
+            if audio is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._remember(key, audio)
+        return audio
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    audio = mapped[:]
+            # Recently used files are the last the scan evicts
+            os.utime(path)
+            return audio
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+
+    def put(self, key: str, audio: bytes):
+        if len(audio) <= self.max_disk_bytes and self._ensure_disk():
+            self._write_disk(key, audio)
+        with self._lock:
+            self._remember(key, audio)
+
+    def _write_disk(self, key: str, audio: bytes):
+        try:
+            # Write-then-rename so concurrent workers never read a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning("Could not write TTS cache entry %s: %s", key, e)
+            return
+        with self._lock:
+            self._unscanned_bytes += len(audio)
+            due = (self._disk_bytes + self._unscanned_bytes > self.max_disk_bytes
+                   or self._unscanned_bytes * self.SCAN_FRACTION >= self.max_disk_bytes)
+        # One scan per process at a time; a writer that finds one running leaves it to finish
+        if due and self._scan_lock.acquire(blocking=False):
+            try:
+                self._scan()
+            finally:
+                self._scan_lock.release()
+
+    def _remember(self, key: str, audio: bytes):
+        if len(audio) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._counters["memory_evictions"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": self._disk_entries,
+                "disk_bytes": self._disk_bytes + self._unscanned_bytes,
+                **{name: self._counters[name] for name in
+                   ("memory_hits", "disk_hits", "misses", "memory_evictions", "disk_evictions")},
+            }
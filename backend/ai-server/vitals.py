@@ -0,0 +1,84 @@
+"""
+HausPet AI Server - Vitals Queries
+Query-string parsing, keyset cursors and streamed JSON encoding for the
+pet vitals time-range API.
+"""
+
+import json
+import base64
+import datetime
+from typing import Dict, Iterable, Iterator, Tuple
+
+from ingest import parse_timestamp
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+VITAL_COLUMNS = ("heart_rate", "temperature", "spo2", "activity_level")
+RESOLUTION_CHOICES = ("auto", "raw", "1m", "1h", "1d")
+
+
+def encode_cursor(timestamp: datetime.datetime, row_id: int) -> str:
+    """Opaque cursor pointing just after (timestamp, id)"""
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    timestamp, row_id = base64.urlsafe_b64decode(padded).decode().split("|")
+    return datetime.datetime.fromisoformat(timestamp), int(row_id)
+
+
+def parse_range_args(args) -> Dict:
+    """Validate from/to/limit/cursor query args; raises ValueError on bad input"""
+    start = parse_timestamp(args.get("from"))
+    end = parse_timestamp(args.get("to"))
+    if start and end and start >= end:
+        raise ValueError("'from' must be earlier than 'to'")
+    limit = int(args.get("limit", DEFAULT_LIMIT))
+    if limit < 1:
+        raise ValueError("'limit' must be positive")
+    cursor = args.get("cursor")
+    resolution = args.get("resolution", "auto")
+    if resolution not in RESOLUTION_CHOICES:
+        raise ValueError(f"'resolution' must be one of {', '.join(RESOLUTION_CHOICES)}")
+    points = args.get("points")
+    return {
+        "from": start,
+        "to": end,
+        "limit": min(limit, MAX_LIMIT),
+        "cursor": decode_cursor(cursor) if cursor else None,
+        "resolution": resolution,
+        "points": int(points) if points else None,
+    }
+
+
+def serialize_reading(row) -> Dict:
+    return {
+        "id": row.id,
+        "timestamp": row.timestamp.isoformat(),
+        **{column: getattr(row, column) for column in VITAL_COLUMNS},
+    }
+
+
+def stream_page(pet_id: int, rows: Iterable, limit: int, resolution: str = "raw",
+                serialize=serialize_reading) -> Iterator[str]:
+    """Stream a page of rows as a JSON document without materialising the list.
+
+    `rows` should yield up to limit + 1 rows ordered by (timestamp, id); the
+    extra row only signals that another page exists.
+    """
+    yield f'{{"pet_id": {pet_id}, "resolution": {json.dumps(resolution)}, "data": ['
+    last = None
+    count = 0
+    has_more = False
+    for row in rows:
+        if count == limit:
+            has_more = True
+            break
+        yield ("," if count else "") + json.dumps(serialize(row))
+        last = row
+        count += 1
+    next_cursor = encode_cursor(last.timestamp, last.id) if has_more else None
+    yield f'], "count": {count}, "next_cursor": {json.dumps(next_cursor)}}}'
@@ -0,0 +1,127 @@
+"""
+HausPet AI Server - Pipelined Voice Replies
+Streams the chat completion, starts text-to-speech on each sentence as soon
+as it is complete, and relays the audio as a multipart/mixed stream of raw
+MP3 parts instead of one base64 blob.
+"""
+
+import re
+import json
+import uuid
+import collections
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from assistant import ConditionMarkerFilter
+
+TTS_MODEL = "tts-1"
+TTS_VOICE = "nova"
+
+# A sentence ends at . ! or ? (optionally followed by quotes/brackets) and whitespace
+SENTENCE_END = re.compile(r'[.!?]+["\')\]]*\s+')
+
+
+class SentenceSplitter:
+    """Accumulates streamed text and hands back complete sentences"""
+
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END.finditer(self._buffer):
+            # Very short fragments ("Hi! ") are merged into the next sentence
+            if match.end() - start < self.min_chars:
+                continue
+            sentences.append(self._buffer[start:match.end()].strip())
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def finish(self) -> List[str]:
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
+
+
+class MultipartWriter:
+    """Encodes multipart/mixed parts for a streamed response"""
+
+    def __init__(self):
+        self.boundary = f"hauspet-{uuid.uuid4().hex}"
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/mixed; boundary={self.boundary}"
+
+    def part(self, content_type: str, body: bytes, headers: Dict[str, str] = None) -> bytes:
+        lines = [f"--{self.boundary}", f"Content-Type: {content_type}", f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode() + body + b"\r\n"
+
+    def json_part(self, data: Dict) -> bytes:
+        return self.part("application/json", json.dumps(data).encode())
+
+    def close(self) -> bytes:
+        return f"--{self.boundary}--\r\n".encode()
+
+
+def synthesize(client, text: str) -> bytes:
+    return client.audio.speech.create(model=TTS_MODEL, voice=TTS_VOICE, input=text).content
+
+
+def pipelined_reply(stream: Optional[Iterable], submit_tts: Callable, writer: MultipartWriter,
+                    transcribed_text: str, cached: Optional[Dict] = None,
+                    on_complete: Optional[Callable[[Dict], None]] = None) -> Iterator[bytes]:
+    """Yield multipart parts: the transcript, one audio/mpeg part per sentence, then the summary.
+
+    `stream` yields the streamed chat completion's chunks. `submit_tts(sentence)`
+    schedules TTS work and returns a future, so sentences are synthesised
+    concurrently while the completion is still streaming; parts are emitted
+    strictly in sentence order. A `cached` answer is used instead of the stream
+    (which may then be None), and `on_complete` receives a freshly generated one.
+    """
+    yield writer.json_part({"transcribed_text": transcribed_text})
+
+    marker_filter = ConditionMarkerFilter()
+    splitter = SentenceSplitter()
+    pending = collections.deque()
+    index = 0
+
+    def schedule(sentences):
+        nonlocal index
+        for sentence in sentences:
+            pending.append((index, sentence, submit_tts(sentence)))
+            index += 1
+
+    def audio_part(item):
+        sentence_index, _, future = item
+        return writer.part("audio/mpeg", future.result(), {"X-Sentence-Index": str(sentence_index)})
+
+    if cached is not None:
+        response_text, condition = cached["response"], cached["condition_detected"]
+        schedule(splitter.feed(response_text) + splitter.finish())
+    else:
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                schedule(splitter.feed(marker_filter.feed(delta)))
+            while pending and pending[0][2].done():
+                yield audio_part(pending.popleft())
+        schedule(splitter.feed(marker_filter.finish()) + splitter.finish())
+        response_text, condition = marker_filter.text, marker_filter.condition
+        if on_complete:
+            on_complete({"response": response_text, "condition_detected": condition})
+
+    while pending:
+        yield audio_part(pending.popleft())
+
+    yield writer.json_part({
+        "transcribed_text": transcribed_text,
+        "response_text": response_text,
+        "condition_detected": condition,
+        "cached": cached is not None,
+        "sentences": index
+    })
+    yield writer.close()
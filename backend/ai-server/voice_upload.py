@@ -0,0 +1,110 @@
+"""
+HausPet AI Server - Voice Upload Limits
+Bounds on voice chat recordings: the request is refused from its
+Content-Length before the body is read, and the spooled upload is checked
+for size and, for M4A/MP4 and WAV, duration read from the container header,
+so the recording can go to Whisper as a file without ever being held in
+worker memory.
+"""
+
+import struct
+from typing import BinaryIO, Optional
+
+# Room for the multipart boundaries and small form fields (pet_id) around the audio part
+MULTIPART_OVERHEAD = 16 * 1024
+
+# MP4 boxes that contain the movie header; everything else is skipped by seeking past it
+_MP4_CONTAINERS = {b"moov"}
+
+
+class UploadRejected(ValueError):
+    """Raised when a voice upload breaks a limit; `status` is the HTTP status to answer with"""
+
+    def __init__(self, message: str, status: int = 413):
+        super().__init__(message)
+        self.status = status
+
+
+def check_content_length(content_length: Optional[int], max_bytes: int):
+    """Refuse a request before its body is read"""
+    if content_length is None:
+        raise UploadRejected("Content-Length is required for audio uploads", 411)
+    if content_length > max_bytes + MULTIPART_OVERHEAD:
+        raise UploadRejected(f"Audio upload exceeds {max_bytes} bytes")
+
+
+def _mp4_duration(stream: BinaryIO, end: int) -> Optional[float]:
+    """Duration from the mvhd box, walking box headers without reading media data"""
+    position = stream.tell()
+    while position + 8 <= end:
+        stream.seek(position)
+        size, kind = struct.unpack(">I4s", stream.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", stream.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - position
+        if size < header:
+            return None
+        if kind in _MP4_CONTAINERS:
+            stream.seek(position + header)
+            return _mp4_duration(stream, position + size)
+        if kind == b"mvhd":
+            version = stream.read(4)[0]
+            if version == 1:
+                stream.seek(16, 1)
+                timescale, duration = struct.unpack(">IQ", stream.read(12))
+            else:
+                stream.seek(8, 1)
+                timescale, duration = struct.unpack(">II", stream.read(8))
+            return duration / timescale if timescale else None
+        position += size
+    return None
+
+
+def _wav_duration(stream: BinaryIO, end: int) -> Optional[float]:
+    position, byte_rate = 12, None
+    while position + 8 <= end:
+        stream.seek(position)
+        kind, size = struct.unpack("<4sI", stream.read(8))
+        if kind == b"fmt ":
+            byte_rate = struct.unpack("<8xI", stream.read(12))[0]
+        elif kind == b"data":
+            return size / byte_rate if byte_rate else None
+        position += 8 + size + (size & 1)
+    return None
+
+
+def probe_duration(stream: BinaryIO) -> Optional[float]:
+    """Seconds of audio for M4A/MP4 and WAV, or None when the format isn't recognised"""
+    stream.seek(0, 2)
+    end = stream.tell()
+    stream.seek(0)
+    head = stream.read(12)
+    try:
+        if head[4:8] == b"ftyp":
+            stream.seek(0)
+            return _mp4_duration(stream, end)
+        if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+            return _wav_duration(stream, end)
+    except (struct.error, IndexError):
+        return None
+    finally:
+        stream.seek(0)
+    return None
+
+
+def check_upload(stream: BinaryIO, max_bytes: int, max_seconds: float) -> int:
+    """Check a spooled upload's size and duration; returns its size and leaves it rewound"""
+    stream.seek(0, 2)
+    size = stream.tell()
+    stream.seek(0)
+    if not size:
+        raise UploadRejected("Audio file is empty", 400)
+    if size > max_bytes:
+        raise UploadRejected(f"Audio upload exceeds {max_bytes} bytes")
+    duration = probe_duration(stream)
+    if duration is not None and duration > max_seconds:
+        raise UploadRejected(f"Recording is {duration:.0f}s long; the limit is {max_seconds:g}s")
+    return size
@@ -0,0 +1,148 @@
+"""
+HausPet AI Server - Write-Behind Buffer
+In-process queue that lets request handlers hand off rows and return
+immediately while a background thread flushes them in batches.
+"""
+
+import os
+import time
+import atexit
+import logging
+import threading
+import collections
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Bounded queue drained by a daemon flusher in size- or time-bounded batches"""
+
+    def __init__(self, flush_fn: Callable[[List[Dict]], None], max_queue: int = 50000,
+                 max_batch: int = 1000, flush_interval: float = 1.0):
+        self.flush_fn = flush_fn
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self._in_flight = 0
+        self._counters = {
+            "enqueued": 0,
+            "flushed": 0,
+            "rejected": 0,
+            "failed": 0,
+            "flushes": 0,
+            "flush_seconds_total": 0.0,
+            "flush_seconds_last": 0.0,
+            "flush_seconds_max": 0.0,
+        }
+        atexit.register(self.drain)
+
+    def enqueue(self, rows: List[Dict]) -> bool:
+        """Queue rows for writing; returns False when the buffer is full"""
+        with self._cond:
+            if len(self._queue) + len(rows) > self.max_queue:
+                self._counters["rejected"] += len(rows)
+                return False
+            self._queue.extend(rows)
+            self._counters["enqueued"] += len(rows)
+            if len(self._queue) >= self.max_batch:
+                self._cond.notify_all()
+        self._ensure_started()
+        return True
+
+    def _ensure_started(self):
+        # Started lazily and per-pid so a gunicorn --preload fork gets its own flusher
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._stopping = False
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="write-behind-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            with self._cond:
+                while not self._stopping and len(self._queue) < self.max_batch:
+                    remaining = self.flush_interval - (time.monotonic() - last_flush)
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+                self._in_flight = len(batch)
+                if not batch and self._stopping:
+                    return
+            last_flush = time.monotonic()
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch: List[Dict]):
+        start = time.perf_counter()
+        try:
+            self.flush_fn(batch)
+            ok = True
+        except Exception:
+            logger.exception("Write-behind flush of %d rows failed", len(batch))
+            ok = False
+        elapsed = time.perf_counter() - start
+        with self._cond:
+            self._counters["flushed" if ok else "failed"] += len(batch)
+            self._counters["flushes"] += 1
+            self._counters["flush_seconds_total"] += elapsed
+            self._counters["flush_seconds_last"] = elapsed
+            self._counters["flush_seconds_max"] = max(self._counters["flush_seconds_max"], elapsed)
+            self._in_flight = 0
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """Block until everything queued so far has been flushed"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._queue or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else self.flush_interval)
+        return True
+
+    def drain(self, timeout: float = 30.0):
+        """Flush whatever is queued and stop the flusher (called at shutdown)"""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid() or not thread.is_alive():
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        thread.join(timeout)
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait before retrying"""
+        return max(1, int(round(self.flush_interval)))
+
+    def stats(self) -> Dict:
+        with self._cond:
+            counters = dict(self._counters)
+            depth = len(self._queue)
+            in_flight = self._in_flight
+        flushes = counters.pop("flushes")
+        total = counters.pop("flush_seconds_total")
+        return {
+            "queue_depth": depth,
+            "queue_capacity": self.max_queue,
+            "in_flight": in_flight,
+            **{k: v for k, v in counters.items() if not k.startswith("flush_seconds")},
+            "flushes": flushes,
+            "flush_latency_ms": {
+                "last": round(counters["flush_seconds_last"] * 1000, 3),
+                "avg": round(total / flushes * 1000, 3) if flushes else 0.0,
+                "max": round(counters["flush_seconds_max"] * 1000, 3),
+            },
+        }